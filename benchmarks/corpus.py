@@ -0,0 +1,52 @@
+"""
+Fixed molecule corpus for the benchmarks.
+
+Every entry is the keyword arguments for `chemdraw.Molecule`. Keep the entries stable; changing one makes results
+incomparable with older runs.
+"""
+import pathlib
+
+MOL_FILES = pathlib.Path(__file__).parents[1] / "examples" / "mol_files"
+
+
+def large_smiles() -> str:
+    """
+    Methacrylate chain with a styrene block (990 atoms, 999 bonds, 10 rings).
+    V2000 mole files (what RDKit writes below 1000 atoms or bonds) cap both counts at 999, so this is about the
+    largest molecule chemdraw can parse.
+    """
+    return "CC(C)(C(=O)OC)" * 130 + "CC(c1ccccc1)" * 10
+
+
+def _mole_file(file_name: str) -> str:
+    with open(MOL_FILES / file_name, "r") as file:
+        return file.read()
+
+
+def get_corpus() -> dict[str, dict]:
+    return {
+        "small": dict(smiles="CCCC1(CC(O1)C2=CC(=NC2=O)OC)O"),
+        "medium": dict(smiles="CC12CCC%11C(C1CCC2O[Si](C)(OC3CCC4C3(CCC5C4CCC6=CC(=O)CCC56C)C)OC7CCC8C7(CCC9C8CCC%10="
+                              "CC(=O)CCC9%10C)C)CCC%12=CC(=O)CCC%11%12C"),
+        "polymer_diblock": dict(mole_file=_mole_file("poly_diblock.txt")),
+        "polymer_iPP": dict(mole_file=_mole_file("poly_iPP_generic.txt")),
+        "polymer_norobornene": dict(mole_file=_mole_file("poly_norobornene.txt")),
+        "macrocycle": dict(smiles="O=C1CCCCCNC(=O)CCCCCNC(=O)CCCCCNC(=O)CCCCCN1"),
+        "large": dict(smiles=large_smiles()),
+    }
+
+
+# molecules cycled through to fill the grids
+GRID_MOLECULES = [
+    "CCCCCCCCCC",
+    "CC(CC(CCC)C)CC",
+    "CCC1CC1",
+    "O1CCCCC1C",
+    "C1CCC(F)C1",
+    "C1=CC=CC=C1C",
+    "C(C(C)NC)C2=CC=C1OCOC1=C2",
+    "CC(C)(C)N(C)C(=O)C14C3C2C1C5C2C3C45C(=O)C69C8C7C6C%10C7C8C9%10",
+    "CC3C(C(=O)OCC1=CCN2C1C(CC2)OC(=O)C(CC(=O)O3)(C(C)C)O)(C(C)C)O",
+    "CCCC1(CC(O1)C2=CC(=NC2=O)OC)O"
+]
+GRID_SIZES = [4, 16, 64]
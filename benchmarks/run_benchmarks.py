@@ -0,0 +1,256 @@
+"""
+Benchmarks for parsing, drawing, serialization and grids.
+
+    python benchmarks/run_benchmarks.py                        # write benchmarks/results/<time stamp>.json
+    python benchmarks/run_benchmarks.py -k draw -r 10          # only benchmarks with 'draw' in the name
+    python benchmarks/run_benchmarks.py --compare base.json    # print the change against an older run
+
+Each benchmark is run `warmup` times, then timed `repeat` times with `time.perf_counter`. Benchmarks that cannot run
+here (e.g. SVG export without a Chrome install for kaleido) are stored as skipped.
+"""
+import argparse
+import datetime
+import functools
+import json
+import os
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+import plotly
+import plotly.graph_objs as go
+
+import chemdraw
+from chemdraw.drawers.styles import ResolvedStyles
+
+from corpus import get_corpus, GRID_MOLECULES, GRID_SIZES
+
+RESULTS_FOLDER = pathlib.Path(__file__).parent / "results"
+CORPUS = get_corpus()
+SKIPPED_STAGES = ("debug",)  # development only; one annotation per element makes it minutes long on large molecules
+
+
+class Benchmark:
+    def __init__(self, name: str, func: Callable, setup: Callable = None):
+        """
+        Parameters
+        ----------
+        name: str
+            unique name; used to match results between runs
+        func: Callable
+            timed function; called with the arguments returned by `setup`
+        setup: Callable
+            untimed function called before each call of `func`; returns a tuple of arguments for `func`
+        """
+        self.name = name
+        self.func = func
+        self.setup = setup
+
+    def __repr__(self) -> str:
+        return self.name
+
+    def run(self, repeat: int, warmup: int) -> dict:
+        try:
+            for _ in range(warmup):
+                self._call()
+            times = [self._call() for _ in range(repeat)]
+        except Exception as e:
+            message = next((line.strip() for line in str(e).splitlines() if line.strip()), "")
+            return {"skipped": f"{type(e).__name__}: {message}"}
+
+        return {
+            "repeat": repeat,
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.fmean(times),
+            "stdev": statistics.stdev(times) if repeat > 1 else 0.0,
+        }
+
+    def _call(self) -> float:
+        args = () if self.setup is None else self.setup()
+        start = time.perf_counter()
+        self.func(*args)
+        return time.perf_counter() - start
+
+
+## fixtures (built on first use, in the untimed setup) ##
+@functools.cache
+def _drawer(name: str) -> chemdraw.Drawer:
+    return chemdraw.Drawer(chemdraw.Molecule(**CORPUS[name]), title=name)
+
+
+@functools.cache
+def _figure(name: str) -> go.Figure:
+    return _drawer(name).draw()
+
+
+@functools.cache
+def _stage_drawer(name: str) -> chemdraw.Drawer:
+    """ Drawer with every stage turned on, so each stage has something to draw. """
+    molecule = chemdraw.Molecule(**CORPUS[name])
+    for element in molecule.atoms[::4] + molecule.bonds[::4]:
+        element.highlight.show = True
+    for ring in molecule.rings or []:
+        ring.highlight.show = True
+
+    config = chemdraw.Config()
+    config.atom_numbers.show = True
+    config.bond_numbers.show = True
+    config.ring_numbers.show = True
+    return chemdraw.Drawer(molecule, title=name, config=config)
+
+
+def _stage_setup(name: str) -> tuple[chemdraw.Drawer, go.Figure]:
+    drawer = _stage_drawer(name)
+    drawer.config.layout.get_scaling(drawer.molecule, drawer.title)
+    drawer.styles = ResolvedStyles(drawer.config, drawer.molecule)
+    return drawer, go.Figure()
+
+
+@functools.cache
+def _grid_molecules(size: int) -> list[chemdraw.Molecule]:
+    return [chemdraw.Molecule(GRID_MOLECULES[i % len(GRID_MOLECULES)]) for i in range(size)]
+
+
+## benchmarks ##
+def molecule_benchmarks(name: str) -> list[Benchmark]:
+    benchmarks = [
+        Benchmark(f"molecule_init[{name}]", lambda: chemdraw.Molecule(**CORPUS[name])),
+        Benchmark(f"drawer_draw[{name}]", lambda drawer: drawer.draw(), lambda: (_drawer(name),)),
+        Benchmark(f"to_json[{name}]", lambda fig: fig.to_json(), lambda: (_figure(name),)),
+        Benchmark(f"to_html[{name}]", lambda fig: fig.to_html(include_plotlyjs=False, full_html=False),
+                  lambda: (_figure(name),)),
+        Benchmark(f"to_svg[{name}]", lambda fig: fig.to_image(format="svg"), lambda: (_figure(name),)),
+    ]
+
+    for key in chemdraw.Config().drawers:
+        if key in SKIPPED_STAGES:
+            continue
+        benchmarks.append(
+            Benchmark(f"stage_{key}[{name}]", functools.partial(_draw_stage, key), functools.partial(_stage_setup, name))
+        )
+
+    return benchmarks
+
+
+def _draw_stage(key: str, drawer: chemdraw.Drawer, fig: go.Figure):
+    drawer._draw_stage(fig, key)
+
+
+def grid_benchmarks(size: int, folder: str) -> list[Benchmark]:
+    file_name = os.path.join(folder, f"grid_{size}.html")
+
+    def draw_html(molecules: list[chemdraw.Molecule]):
+        chemdraw.GridDrawer(molecules).draw_html(file_name)
+
+    return [Benchmark(f"grid_html[{size}]", draw_html, lambda: (_grid_molecules(size),))]
+
+
+def get_benchmarks(folder: str, filter_: str = None) -> list[Benchmark]:
+    benchmarks = []
+    for name in CORPUS:
+        benchmarks += molecule_benchmarks(name)
+    for size in GRID_SIZES:
+        benchmarks += grid_benchmarks(size, folder)
+
+    if filter_ is not None:
+        benchmarks = [benchmark for benchmark in benchmarks if filter_ in benchmark.name]
+    return benchmarks
+
+
+def get_metadata() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=pathlib.Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    from rdkit import rdBase
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "plotly": plotly.__version__,
+        "rdkit": rdBase.rdkitVersion,
+    }
+
+
+def run(repeat: int = 5, warmup: int = 1, filter_: str = None) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for benchmark in get_benchmarks(folder, filter_):
+            results[benchmark.name] = result = benchmark.run(repeat, warmup)
+            if "skipped" in result:
+                print(f"{benchmark.name:<45} skipped ({result['skipped'][:60]})")
+            else:
+                print(f"{benchmark.name:<45} {result['median'] * 1000:10.3f} ms")
+
+    return {"metadata": get_metadata(), "results": results}
+
+
+def compare(new: dict, old: dict, threshold: float = 0.1) -> list[str]:
+    """
+    Print the change in median time of the benchmarks in both runs.
+
+    Returns
+    -------
+    regressions: list[str]
+        names of benchmarks more than `threshold` (fraction) slower
+    """
+    regressions = []
+    print(f"\n{'benchmark':<45} {'old [ms]':>10} {'new [ms]':>10} {'ratio':>7}")
+    for name, result in new["results"].items():
+        old_result = old["results"].get(name)
+        if old_result is None or "median" not in result or "median" not in old_result:
+            continue
+
+        ratio = result["median"] / old_result["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "slower"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "faster"
+        print(f"{name:<45} {old_result['median'] * 1000:10.3f} {result['median'] * 1000:10.3f} {ratio:7.2f} {flag}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="chemdraw benchmarks")
+    parser.add_argument("-o", "--output", help="result file (default: benchmarks/results/<time stamp>.json)")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("-w", "--warmup", type=int, default=1, help="untimed runs per benchmark")
+    parser.add_argument("-k", "--filter", dest="filter_", help="only run benchmarks with this in the name")
+    parser.add_argument("--compare", help="older result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="fractional change in median flagged by --compare (default: 0.1)")
+    args = parser.parse_args()
+
+    data = run(args.repeat, args.warmup, args.filter_)
+
+    output = args.output
+    if output is None:
+        RESULTS_FOLDER.mkdir(exist_ok=True)
+        output = RESULTS_FOLDER / (datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output, "w") as file:
+        json.dump(data, file, indent=2)
+    print(f"\nresults saved to: {output}")
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            regressions = compare(data, json.load(file), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,7 @@
 from chemdraw.objects.molecule import Molecule
+from chemdraw.objects.polymer import Polymer
 from chemdraw.drawers.drawer import Drawer, Config
 from chemdraw.drawers.drawer_grid import GridDrawer, GridConfig
+from chemdraw.drawers.export_manifest import ExportManifest
+from chemdraw.drawers.drawer_async import AsyncRenderer, draw_batch_async
+from chemdraw.drawers.drawer_gif import GifDrawer, GifFrame
@@ -0,0 +1,326 @@
+"""
+Bulk depiction from the command line.
+
+    chemdraw molecules.smi -o out/ --format svg
+    chemdraw library.sdf -o out.zip --format png --preset thumbnail --jobs 8
+    cat molecules.smi | chemdraw - -o out.tar.gz --option atoms.show_carbons=true
+
+Input: SMILES (one per line, optional name after a space/tab) or SDF (by extension, or `--input-format`).
+Output: a directory, .zip or .tar(.gz) archive, or a .pack file (see chemdraw.utils.sinks); files are named
+'<record index>_<name>.<format>'.
+`--no-rdkit` reads SDF records without loading RDKit.
+A journal ('<output>.journal') records finished records, once their files are flushed to the output. `--resume` skips
+the records whose files are in the output after an interrupted (or killed) run; journaled records missing from the
+output are drawn again. Not for compressed tar output (.tar.gz, .tgz, .tar.bz2, .tar.xz).
+"""
+import argparse
+import concurrent.futures
+import os
+import re
+import sys
+import time
+from typing import Iterable, Iterator, TextIO
+
+from chemdraw.objects.molecule import Molecule
+from chemdraw.drawers.drawer import Drawer, Config
+from chemdraw.drawers.config_options import get_config
+from chemdraw.utils.sinks import open_sink, can_append, Sink, CHUNK_SIZE
+
+FORMATS = ("svg", "png", "html", "json")
+FLUSH_INTERVAL = 2  # [s] the sink is flushed (and its records journaled) this often, or every CHUNK_SIZE bytes
+PRESETS = {
+    "default": {},
+    "thumbnail": {"layout.width": "250", "layout.height": "250", "title.show": "false", "level_of_detail.auto": "true"},
+    "numbered": {"atom_numbers.show": "true", "bond_numbers.show": "true"},
+    "all_atoms": {"atoms.show_carbons": "true"},
+}
+
+
+class Record:
+    def __init__(self, index: int, name: str = None, smiles: str = None, mole_file: str = None):
+        self.index = index
+        self.name = name
+        self.smiles = smiles
+        self.mole_file = mole_file
+
+    def __repr__(self) -> str:
+        return f"{self.index}: {self.name or self.smiles}"
+
+    def file_name(self, format_: str) -> str:
+        name = f"{self.index:06d}"
+        if self.name:
+            name += "_" + re.sub(r"[^A-Za-z0-9._-]+", "_", self.name)[:60]
+        return f"{name}.{format_}"
+
+
+## input ##
+def read_smiles(file: TextIO) -> Iterator[Record]:
+    index = 0
+    for line in file:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = line.split(maxsplit=1)
+        yield Record(index, name=parts[1] if len(parts) > 1 else None, smiles=parts[0])
+        index += 1
+
+
+def read_sdf(file: TextIO) -> Iterator[Record]:
+    index = 0
+    lines = []
+    for line in file:
+        if line.startswith("$$$$"):
+            if any(line_.strip() for line_ in lines):
+                yield _sdf_record(index, lines)
+                index += 1
+            lines = []
+        else:
+            lines.append(line.rstrip("\r\n"))
+
+    if any(line_.strip() for line_ in lines):
+        yield _sdf_record(index, lines)
+
+
+def _sdf_record(index: int, lines: list[str]) -> Record:
+    """ mole file is everything up to 'M  END'; the rest are data fields """
+    end = next((i for i, line in enumerate(lines) if line.startswith("M  END")), len(lines) - 1)
+    return Record(index, name=lines[0].strip() or None, mole_file="\n".join(lines[:end + 1]))
+
+
+def read_records(file: TextIO, input_format: str) -> Iterator[Record]:
+    if input_format == "sdf":
+        return read_sdf(file)
+    return read_smiles(file)
+
+
+## rendering (in worker processes) ##
+_worker_config: Config | None = None
+_worker_format: str | None = None
+_worker_titles: bool = False
+_worker_use_rdkit: bool = True
+
+
+def _init_worker(format_: str, options: dict[str, str], titles: bool, use_rdkit: bool = True):
+    global _worker_config, _worker_format, _worker_titles, _worker_use_rdkit
+    _worker_config = get_config(options)
+    _worker_format = format_
+    _worker_titles = titles
+    _worker_use_rdkit = use_rdkit
+
+
+def _render(record: Record) -> tuple[Record, bytes | None, str | None]:
+    """ Returns the record, the rendered file or None, and the error or None. """
+    try:
+        molecule = Molecule(smiles=record.smiles, mole_file=record.mole_file, name=record.name,
+                            use_rdkit=_worker_use_rdkit)
+        drawer = Drawer(molecule, title=record.name if _worker_titles else None, config=_worker_config)
+        return record, drawer.draw_bytes(_worker_format), None
+    except Exception as e:
+        return record, None, f"{type(e).__name__}: {str(e).strip()}"
+
+
+## journal ##
+class Journal:
+    """ Tab separated lines: record index, 'ok' or 'failed', file name or error. """
+
+    def __init__(self, location: str, resume: bool = False):
+        self.location = location
+        self.done = self._load() if resume else {}  # record index: file name
+        self._file = open(location, "a" if resume else "w", encoding="utf-8")
+
+    def __repr__(self) -> str:
+        return f"{self.location} (# done: {len(self.done)})"
+
+    def _load(self) -> dict[int, str]:
+        if not os.path.exists(self.location):
+            return {}
+        done = {}
+        with open(self.location, "r", encoding="utf-8") as file:
+            for line in file:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) >= 3 and parts[1] == "ok":
+                    done[int(parts[0])] = parts[2]
+        return done
+
+    def write(self, index: int, ok: bool, text: str):
+        text = " ".join(text.split())  # one line
+        self._file.write(f"{index}\t{'ok' if ok else 'failed'}\t{text}\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class Summary:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.number_rendered = 0
+        self.number_failed = 0
+        self.number_skipped = 0
+        self.number_bytes = 0
+
+    def __repr__(self) -> str:
+        elapsed = time.perf_counter() - self.start
+        rate = self.number_rendered / elapsed if elapsed > 0 else 0
+        return f"rendered: {self.number_rendered}, failed: {self.number_failed}, skipped (resumed): " \
+               f"{self.number_skipped}, {self.number_bytes / 1024 ** 2:.1f} MB in {elapsed:.1f} s " \
+               f"({rate:.1f} molecules/s)"
+
+
+def run(records: Iterable[Record], sink: Sink, journal: Journal, format_: str, options: dict[str, str],
+        jobs: int = 1, titles: bool = False, use_rdkit: bool = True, done: set[str] = None) -> Summary:
+    """ `done`: file names already in the sink (resume); their records are skipped """
+    summary = Summary()
+    unflushed = _Unflushed(sink, journal)
+
+    def handle(record: Record, data: bytes | None, error: str | None):
+        if error is None:
+            file_name = record.file_name(format_)
+            sink.write(file_name, data)
+            unflushed.add(record.index, file_name, len(data))
+            summary.number_rendered += 1
+            summary.number_bytes += len(data)
+        else:
+            journal.write(record.index, False, error)
+            summary.number_failed += 1
+            print(f"failed: {record} ({error[:200]})", file=sys.stderr)
+
+    records = _skip_done(records, format_, done if done is not None else set(), summary)
+    try:
+        if jobs <= 1:
+            _init_worker(format_, options, titles, use_rdkit)
+            for record in records:
+                handle(*_render(record))
+            return summary
+
+        # bounded number of records in flight, so large inputs are streamed
+        with concurrent.futures.ProcessPoolExecutor(jobs, initializer=_init_worker,
+                                                    initargs=(format_, options, titles, use_rdkit)) as executor:
+            pending = set()
+            for record in records:
+                pending.add(executor.submit(_render, record))
+                if len(pending) >= 4 * jobs:
+                    finished, pending = concurrent.futures.wait(pending,
+                                                                return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in finished:
+                        handle(*future.result())
+            for future in concurrent.futures.as_completed(pending):
+                handle(*future.result())
+    finally:
+        unflushed.flush()
+
+    return summary
+
+
+class _Unflushed:
+    """ Records written to the sink but not yet journaled; journaled in a batch after each flush of the sink. """
+
+    def __init__(self, sink: Sink, journal: Journal):
+        self.sink = sink
+        self.journal = journal
+        self.records: list[tuple[int, str]] = []
+        self.number_bytes = 0
+        self.last_flush = time.perf_counter()
+
+    def add(self, index: int, file_name: str, number_bytes: int):
+        self.records.append((index, file_name))
+        self.number_bytes += number_bytes
+        if self.number_bytes >= CHUNK_SIZE or time.perf_counter() - self.last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        self.sink.flush()
+        for index, file_name in self.records:
+            self.journal.write(index, True, file_name)
+        self.records = []
+        self.number_bytes = 0
+        self.last_flush = time.perf_counter()
+
+
+def _skip_done(records: Iterable[Record], format_: str, done: set[str], summary: Summary) -> Iterator[Record]:
+    for record in records:
+        if record.file_name(format_) in done:
+            summary.number_skipped += 1
+            continue
+        yield record
+
+
+def _reconcile(journal: Journal, sink: Sink) -> set[str]:
+    """ File names in the sink; journaled records whose file isn't there (output cut off) are drawn again. """
+    names = set(sink.names())
+    missing = [index for index, file_name in journal.done.items() if file_name not in names]
+    if missing:
+        print(f"resume: {len(missing)} journaled records are not in the output (e.g. record {min(missing)}); "
+              f"drawing them again", file=sys.stderr)
+    return names
+
+
+def _parse_options(options: list[str]) -> dict[str, str]:
+    out = {}
+    for option in options:
+        if "=" not in option:
+            raise ValueError(f"Invalid option (expected key=value): '{option}'")
+        key, value = option.split("=", 1)
+        out[key.strip()] = value.strip()
+    return out
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(prog="chemdraw", description="Draw molecules from a SMILES or SDF file.")
+    parser.add_argument("input", help="SMILES (.smi, .txt) or SDF (.sdf, .sd) file; '-' for stdin")
+    parser.add_argument("-o", "--output", required=True, help="directory, .zip, .tar(.gz) or .pack file")
+    parser.add_argument("-f", "--format", default="svg", choices=FORMATS)
+    parser.add_argument("--input-format", choices=("smi", "sdf"), help="default: by file extension (stdin: smi)")
+    parser.add_argument("--preset", default="default", choices=list(PRESETS))
+    parser.add_argument("--option", action="append", default=[], metavar="KEY=VALUE",
+                        help="config option, e.g. layout.width=400 (repeatable; applied after the preset)")
+    parser.add_argument("--titles", action="store_true", help="draw the record name as title")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--no-rdkit", action="store_true",
+                        help="read SDF records without RDKit (rings and aromaticity from the bond table)")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip records whose files are in the output of an earlier run")
+    parser.add_argument("--journal", help="default: <output>.journal")
+    args = parser.parse_args(argv)
+
+    try:
+        options = PRESETS[args.preset] | _parse_options(args.option)
+        get_config(options)  # check options before starting workers
+    except ValueError as e:
+        parser.error(str(e))
+    if args.resume and not can_append(args.output):
+        parser.error(f"--resume can't append to a compressed tar file ({args.output}); "
+                     f"use .tar, .zip, .pack or a directory")
+
+    input_format = args.input_format
+    if input_format is None:
+        input_format = "sdf" if args.input.lower().endswith((".sdf", ".sd")) else "smi"
+    journal_location = args.journal if args.journal is not None else args.output.rstrip("/\\") + ".journal"
+
+    file = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    journal = Journal(journal_location, args.resume)
+    try:
+        try:
+            sink = open_sink(args.output, append=args.resume)
+        except (ValueError, OSError) as e:
+            print(f"can't open the output {args.output}: {e}", file=sys.stderr)
+            sys.exit(1)
+        with sink:
+            done = _reconcile(journal, sink) if args.resume else None
+            summary = run(read_records(file, input_format), sink, journal, args.format, options, args.jobs,
+                          args.titles, not args.no_rdkit, done)
+    except KeyboardInterrupt:
+        print(f"interrupted; continue with --resume (journal: {journal_location})", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        journal.close()
+        if file is not sys.stdin:
+            file.close()
+
+    print(summary, file=sys.stderr)
+    if summary.number_failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Set config values from strings (query parameters, command line).
+
+    config = get_config({"layout.width": "400", "atoms.show_carbons": "true", "bonds.line_format.color": "red"})
+
+Only existing, public, non-callable attributes can be set. The new value is converted to the type of the current one
+(bool, int, float or str); attributes that are None take numbers as float and everything else as str.
+"""
+from chemdraw.drawers.drawer import Config
+
+_TRUE = ("true", "1", "yes", "on")
+_FALSE = ("false", "0", "no", "off")
+
+
+def set_config_option(config: Config, path: str, value: str):
+    names = path.split(".")
+    obj = config
+    for i, name in enumerate(names):
+        if not name or name.startswith("_") or not hasattr(obj, name) or callable(getattr(obj, name)):
+            raise ValueError(f"Invalid config option: '{path}'")
+        if i < len(names) - 1:
+            obj = getattr(obj, name)
+
+    current = getattr(obj, names[-1])
+    if isinstance(current, (list, dict, tuple)) or (hasattr(current, "__dict__") and current is not None):
+        raise ValueError(f"Config option '{path}' is not a single value.")
+    setattr(obj, names[-1], _convert(path, value, current))
+
+
+def _convert(path: str, value: str, current):
+    try:
+        if isinstance(current, bool):
+            if value.lower() in _TRUE:
+                return True
+            if value.lower() in _FALSE:
+                return False
+            raise ValueError
+        if isinstance(current, int):
+            return int(value)
+        if isinstance(current, float):
+            return float(value)
+        if current is None:
+            try:
+                return float(value)
+            except ValueError:
+                return value
+    except ValueError:
+        raise ValueError(f"Invalid value for config option '{path}': '{value}' (expected {type(current).__name__})")
+
+    return value
+
+
+def get_config(options: dict[str, str], config: Config = None) -> Config:
+    config = config if config is not None else Config()
+    for path, value in options.items():
+        set_config_option(config, path, value)
+    return config
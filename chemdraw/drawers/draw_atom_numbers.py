@@ -21,7 +21,7 @@ class ConfigDrawerAtomNumber:
 
 
 def draw_atom_numbers(fig: go.Figure, config: ConfigDrawerAtomNumber, atoms: list[Atom]) -> go.Figure:
-    if not config.show:
+    if not config.show or not config.parent.level_of_detail.show_numbers:
         return fig
 
     if config.method:
@@ -1,7 +1,8 @@
 import numpy as np
 import plotly.graph_objs as go
 
-from chemdraw.drawers.general_classes import Font
+from chemdraw.drawers.general_classes import Font, StyleTable
+from chemdraw.drawers.styles import ResolvedStyles
 from chemdraw.objects.atoms import Atom
 
 
@@ -32,74 +33,51 @@ class ConfigDrawerAtoms:
         return self.text_y_offset
 
 
-def draw_atoms(fig: go.Figure, config: ConfigDrawerAtoms, atoms: list[Atom]) -> go.Figure:
+def draw_atoms(fig: go.Figure, config: ConfigDrawerAtoms, atoms: list[Atom], styles: ResolvedStyles) -> go.Figure:
     if not config.show:
         return fig
 
+    font = styles["atoms.font"]
     if config.method:
-        return _add_atoms_with_scatter(fig, config, atoms)
+        return _add_atoms_with_scatter(fig, config, font, atoms)
     else:
-        return _add_atoms_with_annotations(fig, config, atoms)
+        return _add_atoms_with_annotations(fig, config, font, atoms)
 
 
-def _add_atoms_with_annotations(fig: go.Figure, config: ConfigDrawerAtoms, atoms: list[Atom]) -> go.Figure:
-    for atom in atoms:
-        if not config.show_carbons and atom.symbol == "C":
-            continue  # skip drawing carbons
-
-        symbol, x, y = _get_symbol(config, atom)
-        font = config.font.get_attr("family", atom.font)
-        font_size = config.font.get_attr("size", config.font.get_attr("size", atom.font))
+def _add_atoms_with_annotations(fig: go.Figure, config: ConfigDrawerAtoms, font: StyleTable, atoms: list[Atom]) \
+        -> go.Figure:
+    text, xy, atom_index = get_atom_labels(config, font, atoms)
 
+    for i in range(len(text)):
+        atom = atoms[atom_index[i]]
         fig.add_annotation(
-            x=x,
-            y=y,
-            text=symbol,
+            x=xy[i, 0],
+            y=xy[i, 1],
+            text=text[i],
             showarrow=False,
             font=dict(
-                family=font,
-                size=font_size,
-                color=_get_color(config, atom)
+                family=font["family"][atom.id_],
+                size=font["size"][atom.id_],
+                color=_get_color(config, font, atom)
             ),
         )
 
     return fig
 
 
-def _add_atoms_with_scatter(fig: go.Figure, config: ConfigDrawerAtoms, atoms: list[Atom]) -> go.Figure:
-    xy = np.empty((int(len(atoms) * 1.5), 2), dtype="float64")
-    counter = 0
-    symbols = []
-    for atom in atoms:
-        if not config.show_carbons and atom.symbol == "C":
-            continue  # skip drawing carbons
-        symbol, x, y, direction = _get_symbol(config, atom)
-        symbols.append(symbol)
-        xy[counter, :] = [x, y - config.get_text_y_offset()]
-        counter += 1
-
-        # add hydrogens that are above or below atom
-        if direction is not None:
-            hydrogen_symbol = _get_hydrogen_symbol(atom)
-            if config.font.get_attr("bold", atom.font):
-                hydrogen_symbol = "<b>" + hydrogen_symbol + "</b>"
-            symbols.append(hydrogen_symbol)
-            top_offset = config.font.get_attr("top_offset", atom.font)
-            if direction == "up":
-                xy[counter, :] = [atom.coordinates[0], atom.coordinates[1] + top_offset - config.get_text_y_offset()]
-            else:
-                xy[counter, :] = [atom.coordinates[0], atom.coordinates[1] - top_offset - config.get_text_y_offset()]
-            counter += 1
+def _add_atoms_with_scatter(fig: go.Figure, config: ConfigDrawerAtoms, font: StyleTable, atoms: list[Atom]) \
+        -> go.Figure:
+    text, xy, _ = get_atom_labels(config, font, atoms)
 
     fig.add_trace(
         go.Scatter(
-            x=xy[:counter, 0], y=xy[:counter, 1],
+            x=xy[:, 0], y=xy[:, 1] - config.get_text_y_offset(),
             mode="text",
-            text=symbols,
+            text=text.tolist(),
             textfont=dict(
                 family=config.font.family,
                 color=config.font.color,
-                size=max([int(config.font.get_attr("size", atoms[0].font)), 1])
+                size=max([int(font["size"][0]), 1])
             ),
             **config.scatter_kwargs
         ))
@@ -107,65 +85,98 @@ def _add_atoms_with_scatter(fig: go.Figure, config: ConfigDrawerAtoms, atoms: li
     return fig
 
 
-def _get_symbol(config: ConfigDrawerAtoms, atom: Atom) -> tuple[str, float, float, str | None]:
-    # add hydrogen
-    symbol, align, direction = _add_hydrogen_text(atom)
-
-    if config.font.get_attr("bold", atom.font):
-        symbol = "<b>" + symbol + "</b>"
-
-    x, y = _text_alignment(config, atom, align)
-    return symbol, x, y, direction
-
-
-def _add_hydrogen_text(atom: Atom) -> tuple[str, str, str | None]:
-    """ add hydrogen and subscript to atoms"""
-    if atom.number_hydrogens < 1:
-        return atom.symbol, "center", None
-
-    if abs(atom.vector[0]) > abs(atom.vector[1]) or len(atom.bonds) != 2:
-        if atom.vector[0] < 0:
-            # hydrogen on left side of atom
-            return _get_hydrogen_symbol(atom) + atom.symbol, "left", None
-        else:
-            # hydrogen on right side of atom
-            return atom.symbol + _get_hydrogen_symbol(atom), "right", None
+def get_atom_labels(config: ConfigDrawerAtoms, font: StyleTable, atoms: list[Atom]) \
+        -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Labels for all drawn atoms, with implicit hydrogens.
+
+    Hydrogens go on the left or right of the symbol when the atom's vector is mostly horizontal (or the atom does not
+    have two bonds), otherwise they get their own row above or below the atom. Each hydrogen row directly follows the
+    label of its atom. At small pixel sizes the hydrogen counts are left out (see chemdraw.drawers.level_of_detail).
+
+    Returns
+    -------
+    text: np.ndarray[str]
+        (n,) label text
+    xy: np.ndarray
+        (n, 2) label positions
+    atom_index: np.ndarray
+        (n,) index in `atoms` that each label belongs to
+    """
+    if not atoms:
+        return np.empty(0, dtype=object), np.empty((0, 2), dtype="float64"), np.empty(0, dtype="int64")
+
+    molecule = atoms[0].parent
+    symbols = np.array([atom.symbol for atom in atoms], dtype="U")
+    if config.show_carbons:
+        index = np.arange(len(atoms))
     else:
-        if atom.vector[1] > 0:
-            # hydrogen on top side of atom
-            return atom.symbol, "center", "up"
-        else:
-            # hydrogen on right side of atom
-            return atom.symbol, "center", "down"
-
-
-def _get_hydrogen_symbol(atom: Atom) -> str:
-    if atom.number_hydrogens < 1:
-        return ""
-
-    if atom.number_hydrogens == 1:
-        subscript = ""
+        index = np.flatnonzero(symbols != "C")  # skip drawing carbons
+
+    symbols = symbols[index]
+    ids = np.array([atoms[i].id_ for i in index], dtype="int64")
+    number_hydrogens = np.array([atoms[i].number_hydrogens for i in index], dtype="int64")
+    vectors = molecule.geometry.atom_vectors[ids]
+    degrees = molecule.geometry.atom_degrees[ids]
+    coordinates = molecule.atom_coordinates[ids]
+
+    # hydrogen direction
+    has_hydrogens = number_hydrogens >= 1
+    horizontal = has_hydrogens & ((np.abs(vectors[:, 0]) > np.abs(vectors[:, 1])) | (degrees != 2))
+    left = horizontal & (vectors[:, 0] < 0)
+    right = horizontal & ~left
+    vertical = has_hydrogens & ~horizontal
+    up = vectors[vertical, 1] > 0
+
+    # text
+    if config.parent.level_of_detail.show_hydrogen_counts:
+        hydrogens = np.where(
+            number_hydrogens == 1,
+            "H",
+            np.char.add(np.char.add("H<sub>", number_hydrogens.astype("U")), "</sub>")
+        )
     else:
-        subscript = "<sub>" + str(atom.number_hydrogens) + "</sub>"
-
-    return "H" + subscript
-
-
-def _text_alignment(config: ConfigDrawerAtoms, atom: Atom, align: str) -> tuple[float, float]:
-    offset = config.font.get_attr("offset", atom.font)
-    if align == "center":
-        return atom.coordinates[0], atom.coordinates[1]
-    elif align == "left":
-        return atom.coordinates[0] - offset, atom.coordinates[1]
-    elif align == "right":
-        return atom.coordinates[0] + offset, atom.coordinates[1]
-
-    raise ValueError("Coding error")
-
-
-def _get_color(config: ConfigDrawerAtoms, atom: Atom) -> str:
+        hydrogens = np.full(len(ids), "H")
+    labels = np.where(left, np.char.add(hydrogens, symbols), np.where(right, np.char.add(symbols, hydrogens), symbols))
+    bold = font["bold"][ids]
+    labels = _bold(labels, bold)
+    hydrogens = _bold(hydrogens[vertical], bold[vertical])
+
+    # positions
+    offset = font["offset"][ids]
+    label_xy = coordinates.copy()
+    label_xy[left, 0] -= offset[left]
+    label_xy[right, 0] += offset[right]
+    hydrogen_xy = coordinates[vertical]
+    top_offset = font["top_offset"][ids[vertical]]
+    hydrogen_xy[:, 1] += np.where(up, top_offset, -top_offset)
+
+    # merge; hydrogen rows follow their atom's label
+    vertical_int = vertical.astype("int64")
+    label_rows = np.arange(len(ids)) + np.cumsum(vertical_int) - vertical_int
+    hydrogen_rows = label_rows[vertical] + 1
+    number_rows = len(ids) + len(hydrogen_rows)
+
+    text = np.empty(number_rows, dtype=object)
+    text[label_rows] = labels
+    text[hydrogen_rows] = hydrogens
+    xy = np.empty((number_rows, 2), dtype="float64")
+    xy[label_rows] = label_xy
+    xy[hydrogen_rows] = hydrogen_xy
+    atom_index = np.empty(number_rows, dtype="int64")
+    atom_index[label_rows] = index
+    atom_index[hydrogen_rows] = index[vertical]
+
+    return text, xy, atom_index
+
+
+def _bold(text: np.ndarray, bold: np.ndarray) -> np.ndarray:
+    return np.where(bold, np.char.add(np.char.add("<b>", text), "</b>"), text)
+
+
+def _get_color(config: ConfigDrawerAtoms, font: StyleTable, atom: Atom) -> str:
     if config.colors_add:
         if atom.symbol in config.colors:
             return config.colors[atom.symbol]
 
-    return config.font.get_attr("color", atom.font)
+    return font["color"][atom.id_]
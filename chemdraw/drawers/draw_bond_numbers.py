@@ -21,7 +21,7 @@ class ConfigDrawerBondNumber:
 
 
 def draw_bond_numbers(fig: go.Figure, config: ConfigDrawerBondNumber, bonds: list[Bond]) -> go.Figure:
-    if not config.show:
+    if not config.show or not config.parent.level_of_detail.show_numbers:
         return fig
 
     if config.method:
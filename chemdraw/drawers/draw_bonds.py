@@ -1,8 +1,10 @@
 import numpy as np
 import plotly.graph_objs as go
 
-from chemdraw.drawers.general_classes import Line
+from chemdraw.drawers.general_classes import Line, StyleTable
+from chemdraw.drawers.styles import ResolvedStyles
 from chemdraw.objects.bonds import Bond, BondType, BondAlignment, BondStereoChem
+import chemdraw.drawers.webgl as webgl
 import chemdraw.utils.vector_math as vector_math
 import chemdraw.utils.general_math as general_math
 
@@ -28,42 +30,53 @@ class ConfigDrawerBonds:
         return f"show: {self.show}"
 
 
-def draw_bonds(fig: go.Figure, config: ConfigDrawerBonds, bonds: list[Bond]) -> go.Figure:
+def draw_bonds(fig: go.Figure, config: ConfigDrawerBonds, bonds: list[Bond], styles: ResolvedStyles) -> go.Figure:
     if not config.show:
         return fig
 
+    line = styles["bonds.line_format"]
+    # webgl or small pixel sizes: one trace per style
+    batch = webgl.LineBatch() if config.parent.webgl or config.parent.level_of_detail.batch_bonds else None
     for bond in bonds:
         x, y = bond.get_coordinates(config.parent.atoms.show_carbons, config.offset)
         if bond.type_ == BondType.single:
             if bond.stereo_chem != BondStereoChem.default:
-                fig = _draw_stereo_bond(fig, config, x, y, bond)
+                fig = _draw_stereo_bond(fig, config, line, x, y, bond, batch)
             else:
-                fig = _draw_bond_on_fig(fig, config, x, y, bond)
+                fig = _draw_bond_on_fig(fig, config, line, x, y, bond, batch)
         elif bond.type_ == BondType.double:
             if bond.alignment == BondAlignment.center:
-                fig = _bond_double_center(fig, config, x, y, bond)
+                fig = _bond_double_center(fig, config, line, x, y, bond, batch)
             else:
-                fig = _double_bond_offset(fig, config, x, y, bond)
+                fig = _double_bond_offset(fig, config, line, x, y, bond, batch)
         else:
-            fig = _bond_triple(fig, config, x, y, bond)
+            fig = _bond_triple(fig, config, line, x, y, bond, batch)
 
+    if batch is not None:
+        fig = batch.add_to_fig(fig, webgl.get_scatter(config), webgl.get_scatter_kwargs(config))
     return fig
 
 
-def _draw_bond_on_fig(fig: go.Figure, config: ConfigDrawerBonds, x, y, bond) -> go.Figure:
+def _draw_bond_on_fig(fig: go.Figure, config: ConfigDrawerBonds, line: StyleTable, x, y, bond,
+                      batch: webgl.LineBatch = None) -> go.Figure:
+    if batch is not None:
+        batch.add_line(x, y, line["color"][bond.id_], line["width"][bond.id_])
+        return fig
+
     return fig.add_trace(
         go.Scatter(
             x=x, y=y,
             mode="lines",
             line=dict(
-                color=config.line_format.get_attr("color", bond.line_format),
-                width=config.line_format.get_attr("width", bond.line_format),
+                color=line["color"][bond.id_],
+                width=line["width"][bond.id_],
             ),
             **config.scatter_kwargs
         ))
 
 
-def _bond_double_center(fig: go.Figure, config: ConfigDrawerBonds, x, y, bond: Bond) -> go.Figure:
+def _bond_double_center(fig: go.Figure, config: ConfigDrawerBonds, line: StyleTable, x, y, bond: Bond,
+                        batch: webgl.LineBatch = None) -> go.Figure:
     x_left = x + bond.perpendicular[0] * config.double_bond_offset / 2
     x_right = x - bond.perpendicular[0] * config.double_bond_offset / 2
     y_left = y + bond.perpendicular[1] * config.double_bond_offset / 2
@@ -79,14 +92,15 @@ def _bond_double_center(fig: go.Figure, config: ConfigDrawerBonds, x, y, bond: B
         y_right = [y0, y1]
 
     # left
-    fig = _draw_bond_on_fig(fig, config, x_left, y_left, bond)
+    fig = _draw_bond_on_fig(fig, config, line, x_left, y_left, bond, batch)
     # right
-    fig = _draw_bond_on_fig(fig, config, x_right, y_right, bond)
+    fig = _draw_bond_on_fig(fig, config, line, x_right, y_right, bond, batch)
 
     return fig
 
 
-def _double_bond_offset(fig: go.Figure, config: ConfigDrawerBonds, x, y, bond: Bond) -> go.Figure:
+def _double_bond_offset(fig: go.Figure, config: ConfigDrawerBonds, line: StyleTable, x, y, bond: Bond,
+                        batch: webgl.LineBatch = None) -> go.Figure:
     if bond.alignment == BondAlignment.perpendicular:  # same side as perpendicular
         x_off = x + bond.perpendicular[0] * config.double_bond_offset
         y_off = y + bond.perpendicular[1] * config.double_bond_offset
@@ -95,7 +109,7 @@ def _double_bond_offset(fig: go.Figure, config: ConfigDrawerBonds, x, y, bond: B
         y_off = y - bond.perpendicular[1] * config.double_bond_offset
 
     # center
-    fig = _draw_bond_on_fig(fig, config, x, y, bond)
+    fig = _draw_bond_on_fig(fig, config, line, x, y, bond, batch)
     # right/left
     if config.double_bond_offset_length != 1:
         x0, x1, y0, y1 = vector_math.shorten_line(x_off[0], x_off[1], y_off[0], y_off[1],
@@ -103,12 +117,13 @@ def _double_bond_offset(fig: go.Figure, config: ConfigDrawerBonds, x, y, bond: B
         x_off = [x0, x1]
         y_off = [y0, y1]
 
-    fig = _draw_bond_on_fig(fig, config, x_off, y_off, bond)
+    fig = _draw_bond_on_fig(fig, config, line, x_off, y_off, bond, batch)
 
     return fig
 
 
-def _bond_triple(fig: go.Figure, config: ConfigDrawerBonds, x, y, bond: Bond) -> go.Figure:
+def _bond_triple(fig: go.Figure, config: ConfigDrawerBonds, line: StyleTable, x, y, bond: Bond,
+                 batch: webgl.LineBatch = None) -> go.Figure:
     x_left = x + bond.perpendicular[0] * config.triple_bond_offset
     x_right = x - bond.perpendicular[0] * config.triple_bond_offset
     y_left = y + bond.perpendicular[1] * config.triple_bond_offset
@@ -119,11 +134,11 @@ def _bond_triple(fig: go.Figure, config: ConfigDrawerBonds, x, y, bond: Bond) ->
         x_right, y_right = _shorten_bond_triple(config, bond, x_right, y_right)
 
     # center
-    fig = _draw_bond_on_fig(fig, config, x, y, bond)
+    fig = _draw_bond_on_fig(fig, config, line, x, y, bond, batch)
     # left
-    fig = _draw_bond_on_fig(fig, config, x_left, y_left, bond)
+    fig = _draw_bond_on_fig(fig, config, line, x_left, y_left, bond, batch)
     # right
-    fig = _draw_bond_on_fig(fig, config, x_right, y_right, bond)
+    fig = _draw_bond_on_fig(fig, config, line, x_right, y_right, bond, batch)
 
     return fig
 
@@ -160,8 +175,9 @@ def _shorten_bond_triple(config: ConfigDrawerBonds, bond: Bond, x: np.ndarray, y
     return x, y
 
 
-def _draw_stereo_bond(fig: go.Figure, config: ConfigDrawerBonds, x: np.ndarray, y: np.ndarray, bond: Bond) -> go.Figure:
-    color = config.line_format.get_attr("color", bond.line_format)
+def _draw_stereo_bond(fig: go.Figure, config: ConfigDrawerBonds, line: StyleTable, x: np.ndarray, y: np.ndarray,
+                      bond: Bond, batch: webgl.LineBatch = None) -> go.Figure:
+    color = line["color"][bond.id_]
 
     if bond.stereo_chem == BondStereoChem.up:
         x_left = x[1] + bond.perpendicular[0] * config.stereo_offset
@@ -170,6 +186,9 @@ def _draw_stereo_bond(fig: go.Figure, config: ConfigDrawerBonds, x: np.ndarray,
         y_right = y[1] - bond.perpendicular[1] * config.stereo_offset
         x_plot = np.array([x[0], x_left, x_right, x[0]])
         y_plot = np.array([y[0], y_left, y_right, y[0]])
+        if batch is not None:
+            batch.add_fill(x_plot, y_plot, color)
+            return fig
 
         fig.add_trace(
             go.Scatter(x=x_plot, y=y_plot, mode="lines", fill="toself", fillcolor=color,
@@ -178,6 +197,9 @@ def _draw_stereo_bond(fig: go.Figure, config: ConfigDrawerBonds, x: np.ndarray,
 
         return fig
 
+    if not config.parent.level_of_detail.show_hashes:
+        return _draw_bond_on_fig(fig, config, line, x, y, bond, batch)
+
     # down
     num_lines = config.stereo_wedge_number_lines
     xy = general_math.points_along_line((x[0], y[0]), (x[1], y[1]), num_lines + 2)
@@ -191,6 +213,9 @@ def _draw_stereo_bond(fig: go.Figure, config: ConfigDrawerBonds, x: np.ndarray,
         i_ = i * 3
         points[i_:i_ + 2, :] = general_math.get_offset_points(xy[i, :], bond.perpendicular, offset[i])
         points[i_ + 2, :] = [None, None]
+    if batch is not None:
+        batch.add_line(points[:-1, 0], points[:-1, 1], color, config.stereo_wedge_line_width)
+        return fig
 
     fig.add_trace(
         go.Scatter(x=points[:, 0], y=points[:, 1], mode="lines",
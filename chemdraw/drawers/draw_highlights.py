@@ -2,9 +2,11 @@
 import numpy as np
 import plotly.graph_objs as go
 
-from chemdraw.drawers.general_classes import Highlight
+from chemdraw.drawers.general_classes import Highlight, StyleTable
+from chemdraw.drawers.styles import ResolvedStyles
 from chemdraw.objects.atoms import Atom
 from chemdraw.objects.bonds import Bond
+import chemdraw.drawers.webgl as webgl
 
 
 class ConfigDrawerHighlights:
@@ -21,37 +23,74 @@ class ConfigDrawerHighlights:
         return f"show atoms: {self.atoms.show}, show bonds: {self.bonds.show}"
 
 
-def draw_highlights(fig: go.Figure, config: ConfigDrawerHighlights, atoms: list[Atom], bonds: list[Bond])\
-     -> go.Figure:
+def draw_highlights(fig: go.Figure, config: ConfigDrawerHighlights, atoms: list[Atom], bonds: list[Bond],
+                    styles: ResolvedStyles) -> go.Figure:
     if not atoms[0].parent.has_highlights:
         return fig
 
+    if config.parent.webgl:  # batched, but SVG (see chemdraw.drawers.webgl)
+        return _add_highlights_batched(fig, config, styles, atoms, bonds)
+
+    if config.bonds.show:
+        fig = _add_highlight_to_bonds(fig, config, styles["highlights.bonds"], bonds)
+
+    if config.atoms.show:
+        fig = _add_highlight_to_atoms(fig, config, styles["highlights.atoms"], atoms)
+
+    return fig
+
+
+def _add_highlights_batched(fig: go.Figure, config: ConfigDrawerHighlights, styles: ResolvedStyles,
+                            atoms: list[Atom], bonds: list[Bond]) -> go.Figure:
+    """ one line trace per bond highlight style and one marker trace for all atom highlights """
     if config.bonds.show:
-        fig = _add_highlight_to_bonds(fig, config, bonds)
+        highlight = styles["highlights.bonds"]
+        batch = webgl.LineBatch()
+        for bond in bonds:
+            if _bond_highlighted(config, bond):
+                batch.add_line(bond.x, bond.y, highlight["color"][bond.id_], highlight["size"][bond.id_])
+        fig = batch.add_to_fig(fig, go.Scatter, config.scatter_kwargs)
 
     if config.atoms.show:
-        fig = _add_highlight_to_atoms(fig, config, atoms)
+        highlight = styles["highlights.atoms"]
+        ids = [atom.id_ for atom in atoms if _atom_highlighted(config, atom)]
+        if ids:
+            xy = atoms[0].parent.atom_coordinates[ids]
+            fig.add_trace(go.Scatter(x=xy[:, 0], y=xy[:, 1], mode="markers",
+                                     marker=dict(color=highlight["color"][ids].tolist(),
+                                                 size=highlight["size"][ids].tolist()),
+                                     **config.scatter_kwargs))
 
     return fig
 
 
-def _add_highlight_to_atoms(fig: go.Figure, config: ConfigDrawerHighlights, atoms: list[Atom]) -> go.Figure:
+def _atom_highlighted(config: ConfigDrawerHighlights, atom: Atom) -> bool:
+    return atom.highlight.show or config.highlight_atoms_on_bonds and any([bond.highlight.show for bond in atom.bonds])
+
+
+def _bond_highlighted(config: ConfigDrawerHighlights, bond: Bond) -> bool:
+    return bond.highlight.show or \
+        (config.highlight_bonds_between_atoms and all([atom.highlight.show for atom in bond.atoms]))
+
+
+def _add_highlight_to_atoms(fig: go.Figure, config: ConfigDrawerHighlights, highlight: StyleTable,
+                            atoms: list[Atom]) -> go.Figure:
     for atom in atoms:
-        if atom.highlight.show or config.highlight_atoms_on_bonds and any([bond.highlight.show for bond in atom.bonds]):
-            color = config.atoms.color if atom.highlight.color is None else atom.highlight.color
-            size = config.atoms.size if atom.highlight.size is None else atom.highlight.size
+        if _atom_highlighted(config, atom):
+            color = highlight["color"][atom.id_]
+            size = highlight["size"][atom.id_]
             fig.add_trace(go.Scatter(x=[atom.coordinates[0]], y=[atom.coordinates[1]], mode="markers",
                                      marker=dict(color=color, size=size), **config.scatter_kwargs))
 
     return fig
 
 
-def _add_highlight_to_bonds(fig: go.Figure, config: ConfigDrawerHighlights, bonds: list[Bond]) -> go.Figure:
+def _add_highlight_to_bonds(fig: go.Figure, config: ConfigDrawerHighlights, highlight: StyleTable,
+                            bonds: list[Bond]) -> go.Figure:
     for bond in bonds:
-        if bond.highlight.show or \
-                (config.highlight_bonds_between_atoms and all([atom.highlight.show for atom in bond.atoms])):
-            color = config.bonds.color if bond.highlight.color is None else bond.highlight.color
-            width = config.bonds.size if bond.highlight.size is None else bond.highlight.size
+        if _bond_highlighted(config, bond):
+            color = highlight["color"][bond.id_]
+            width = highlight["size"][bond.id_]
             fig.add_trace(go.Scatter(x=bond.x, y=bond.y, mode="lines",
                                      line=dict(color=color, width=width), **config.scatter_kwargs))
 
@@ -1,9 +1,10 @@
 import numpy as np
 import plotly.graph_objs as go
 
-from chemdraw.drawers.general_classes import Font, Line
+from chemdraw.drawers.general_classes import Font, Line, StyleTable
+from chemdraw.drawers.styles import ResolvedStyles
 from chemdraw.objects.parenthesis import Parenthesis
-from chemdraw.utils import vector_math
+import chemdraw.drawers.webgl as webgl
 
 
 def parabola(x: np.ndarray, prefactor: float = 0.4) -> np.ndarray:
@@ -48,108 +49,122 @@ class ConfigDrawerParenthesis:
         return self.offset
 
 
-def draw_parenthesis(fig: go.Figure, config: ConfigDrawerParenthesis, parenthesis: list[Parenthesis]) -> go.Figure:
-    if not config.show:
+def draw_parenthesis(fig: go.Figure, config: ConfigDrawerParenthesis, parenthesis: list[Parenthesis],
+                     styles: ResolvedStyles) -> go.Figure:
+    """ all brackets as one line trace (one per line style) and all sub/superscripts as one text trace """
+    if not config.show or not parenthesis:
         return fig
 
-    for parenthesis_ in parenthesis:
-        xy = _get_parenthesis_points(config, parenthesis_)
+    coordinates, vectors, sizes = get_bracket_arrays(config, parenthesis)
+    fig = _add_lines(fig, config, styles["parenthesis.line_format"], coordinates, vectors, sizes)
+    fig = _add_scripts(fig, config, styles["parenthesis.sub_script_font"], styles["parenthesis.super_script_font"],
+                       parenthesis, coordinates, vectors, sizes)
+    return fig
+
 
+def get_bracket_arrays(config: ConfigDrawerParenthesis, parenthesis: list[Parenthesis]) \
+        -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns
+    -------
+    coordinates: np.ndarray[:, 2]
+    vectors: np.ndarray[:, 2]
+        unit vectors the brackets open to
+    sizes: np.ndarray[:]
+        half the bracket length (config size for brackets without their own)
+
+    """
+    coordinates = np.array([parenthesis_.coordinates for parenthesis_ in parenthesis], dtype="float64")
+    vectors = np.array([parenthesis_.vector for parenthesis_ in parenthesis], dtype="float64")
+    sizes = np.array([parenthesis_.size if parenthesis_.size is not None else config.get_size()
+                      for parenthesis_ in parenthesis], dtype="float64")
+    return coordinates, vectors, sizes
+
+
+def get_parenthesis_points(config: ConfigDrawerParenthesis, coordinates: np.ndarray, vectors: np.ndarray,
+                           sizes: np.ndarray) -> np.ndarray:
+    """
+    (n, points, 2) bracket points: the shape function sampled over each bracket's own size (one call for all
+    brackets), rotated so +y is the bracket's vector, and moved to the bracket position (+ offset along the vector).
+    """
+    x = sizes[:, None] * np.linspace(-1, 1, config.points)[None, :]
+    xy = np.stack((x, config.func(x)), axis=-1)
+
+    # rows: where the x and y axis go
+    units = vectors / np.linalg.norm(vectors, axis=1)[:, None]
+    rotations = np.stack((np.column_stack((units[:, 1], -units[:, 0])), units), axis=1)
+    shifts = coordinates + config.get_offset() * vectors
+    return np.einsum("npj,njk->npk", xy, rotations) + shifts[:, None, :]
+
+
+def _add_lines(fig: go.Figure, config: ConfigDrawerParenthesis, line: StyleTable, coordinates: np.ndarray,
+               vectors: np.ndarray, sizes: np.ndarray) -> go.Figure:
+    # brackets back to back, separated by a nan row (gap in the line)
+    xy = np.full((len(coordinates), config.points + 1, 2), np.nan)
+    xy[:, :-1] = get_parenthesis_points(config, coordinates, vectors, sizes)
+
+    if line.is_uniform("color") and line.is_uniform("width"):
+        groups = {(line.defaults["color"], line.defaults["width"]): slice(None)}
+    else:
+        groups = {}
+        for i, style in enumerate(zip(line["color"].tolist(), line["width"].tolist())):
+            groups.setdefault(style, []).append(i)
+
+    scatter = webgl.get_scatter(config)
+    for (color, width), index in groups.items():
+        points = xy[index].reshape(-1, 2)[:-1]
         fig.add_trace(
-            go.Scatter(
-                x=xy[:, 0], y=xy[:, 1],
+            scatter(
+                x=points[:, 0], y=points[:, 1],
                 mode="lines",
                 line=dict(
-                    color=config.line_format.get_attr("color", parenthesis_.line_format),
-                    width=config.line_format.get_attr("width", parenthesis_.line_format),
+                    color=color,
+                    width=width,
                     ),
-                **config.scatter_kwargs
+                **webgl.get_scatter_kwargs(config)
             ))
 
-        # add sub_script
-        if config.sub_script_font.get_attr("show", parenthesis_.sub_script_font):
-            if parenthesis_.sub_script is None:
-                continue
-
-            xy = _get_sub_script_coordinates(config, parenthesis_)
-            fig.add_trace(
-                go.Scatter(
-                    x=[xy[0]], y=[xy[1]],
-                    mode="text",
-                    text=parenthesis_.sub_script,
-                    textfont=dict(
-                        family=config.sub_script_font.get_attr("family", parenthesis_.sub_script_font),
-                        color=config.sub_script_font.get_attr("color", parenthesis_.sub_script_font),
-                        size=config.sub_script_font.get_attr("size", parenthesis_.sub_script_font),
-                        ),
-                    **config.scatter_kwargs
-                ))
-
-        # add super_script
-        if config.super_script_font.get_attr("show", parenthesis_.super_script_font):
-            if parenthesis_.super_script is None:
-                continue
-
-            xy = _get_super_script_coordinates(config, parenthesis_)
-            fig.add_trace(
-                go.Scatter(
-                    x=[xy[0]], y=[xy[1]],
-                    mode="text",
-                    text=parenthesis_.super_script,
-                    textfont=dict(
-                        family=config.super_script_font.get_attr("family", parenthesis_.super_script_font),
-                        color=config.super_script_font.get_attr("color", parenthesis_.super_script_font),
-                        size=config.super_script_font.get_attr("size", parenthesis_.super_script_font),
-                        ),
-                    **config.scatter_kwargs
-                ))
-
     return fig
 
 
-def _get_parenthesis_points(config: ConfigDrawerParenthesis, parenthesis: Parenthesis) -> np.ndarray:
-    # create parenthesis points
-    if parenthesis.size is None:
-        size = config.get_size()
-    else:
-        size = parenthesis.size
-
-    x = np.linspace(-size, size, config.points)
-    y = config.func(x)
-
-    # move and rotate into position
-    xy = np.array((x, y)).T
-    rot_matrix = vector_math.rotation_matrix(np.array([0, 1]), parenthesis.vector)
-    xy = np.dot(xy, rot_matrix)
-    xy += parenthesis.coordinates
-    xy += config.get_offset() * parenthesis.vector
-
-    return xy
-
-
-def _get_sub_script_coordinates(config: ConfigDrawerParenthesis, parenthesis: Parenthesis) -> np.ndarray:
-    # create parenthesis points
-    if parenthesis.size is None:
-        size = config.get_size()
-    else:
-        size = parenthesis.size
-
-    perpendicular = vector_math.perpendicular(parenthesis.vector)
-    xy = parenthesis.coordinates + perpendicular * size
-    xy -= parenthesis.vector * config.sub_script_font.get_attr("offset", parenthesis.sub_script_font)
-
-    return xy
+def _add_scripts(fig: go.Figure, config: ConfigDrawerParenthesis, sub_script_font: StyleTable,
+                 super_script_font: StyleTable, parenthesis: list[Parenthesis], coordinates: np.ndarray,
+                 vectors: np.ndarray, sizes: np.ndarray) -> go.Figure:
+    # subscript at the end of the bracket on the perpendicular side, superscript at the other end
+    perpendiculars = np.column_stack((-vectors[:, 1], vectors[:, 0])) * sizes[:, None]
+    xy, text, family, color, size = [], [], [], [], []
+    for font, attr_, sign in ((sub_script_font, "sub_script", 1), (super_script_font, "super_script", -1)):
+        scripts = [getattr(parenthesis_, attr_) for parenthesis_ in parenthesis]
+        index = np.flatnonzero(font["show"] & np.array([script is not None for script in scripts], dtype=bool))
+        offsets = np.asarray(font["offset"][index], dtype="float64")
+        xy.append(coordinates[index] + sign * perpendiculars[index] - vectors[index] * offsets[:, None])
+        text += [scripts[i] for i in index]
+        family += font["family"][index].tolist()
+        color += font["color"][index].tolist()
+        size += np.maximum(font["size"][index], 1).tolist()
+
+    if not text:
+        return fig
 
+    xy = np.concatenate(xy)
+    fig.add_trace(
+        go.Scatter(
+            x=xy[:, 0], y=xy[:, 1],
+            mode="text",
+            text=text,
+            textfont=dict(
+                family=_single_value(family),
+                color=_single_value(color),
+                size=_single_value(size),
+                ),
+            **config.scatter_kwargs
+        ))
 
-def _get_super_script_coordinates(config: ConfigDrawerParenthesis, parenthesis: Parenthesis) -> np.ndarray:
-    # create parenthesis points
-    if parenthesis.size is None:
-        size = config.get_size()
-    else:
-        size = parenthesis.size
+    return fig
 
-    perpendicular = vector_math.perpendicular(parenthesis.vector)
-    xy = parenthesis.coordinates - perpendicular * size
-    xy -= parenthesis.vector * config.super_script_font.get_attr("offset", parenthesis.super_script_font)
 
-    return xy
+def _single_value(values: list):
+    """ one value if all texts share it, otherwise one per text """
+    if all(value == values[0] for value in values):
+        return values[0]
+    return values
@@ -3,6 +3,8 @@ import numpy as np
 import plotly.graph_objs as go
 
 from chemdraw.drawers.general_classes import Highlight
+from chemdraw.drawers.styles import ResolvedStyles
+from chemdraw.objects.molecule import Molecule
 from chemdraw.objects.rings import Ring
 
 
@@ -15,14 +17,17 @@ class ConfigDrawerRingHighlights:
         return f"show ring highlights: {self.ring.show}"
 
 
-def draw_ring_highlight(fig: go.Figure, config: ConfigDrawerRingHighlights, rings: list[Ring]) -> go.Figure:
-    if not config.ring.show or not rings or not rings[0].parent.ring_highlights:
+def draw_ring_highlight(fig: go.Figure, config: ConfigDrawerRingHighlights, molecule: Molecule,
+                        styles: ResolvedStyles) -> go.Figure:
+    if not config.ring.show or not molecule.ring_highlights:  # False if the rings were never built
         return fig
 
-    for ring in rings:
+    rings = molecule.rings
+    highlight = styles["ring_highlights.ring"]
+    for i, ring in enumerate(rings):
         if ring.highlight.show:
-            xy = _get_coordinates(config, ring)
-            color = config.ring.get_attr("color", ring.highlight)
+            xy = _get_coordinates(highlight["offset"][i], ring)
+            color = highlight["color"][i]
 
             fig.add_trace(go.Scatter(x=xy[:, 0], y=xy[:, 1], mode="lines", fill='toself', fillcolor=color,
                                      line=dict(color='rgba(0, 0, 0, 0)')))
@@ -30,10 +35,9 @@ def draw_ring_highlight(fig: go.Figure, config: ConfigDrawerRingHighlights, ring
     return fig
 
 
-def _get_coordinates(config: ConfigDrawerRingHighlights, ring: Ring) -> np.ndarray:
+def _get_coordinates(offset: float, ring: Ring) -> np.ndarray:
     xy = ring.coordinates
     xy = sort_circle_points(xy)
-    offset = config.ring.get_attr("offset", ring.highlight)
     if offset == 1:
         return xy
 
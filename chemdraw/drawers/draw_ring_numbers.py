@@ -3,6 +3,7 @@ import numpy as np
 import plotly.graph_objs as go
 
 from chemdraw.drawers.general_classes import Font
+from chemdraw.objects.molecule import Molecule
 from chemdraw.objects.rings import Ring
 
 
@@ -19,8 +20,12 @@ class ConfigDrawerRingNumber:
         return f"show: {self.show}"
 
 
-def draw_ring_numbers(fig: go.Figure, config: ConfigDrawerRingNumber, rings: list[Ring]) -> go.Figure:
-    if not config.show:
+def draw_ring_numbers(fig: go.Figure, config: ConfigDrawerRingNumber, molecule: Molecule) -> go.Figure:
+    if not config.show or not config.parent.level_of_detail.show_numbers:
+        return fig
+
+    rings = molecule.rings  # only built when needed
+    if not rings:
         return fig
 
     if config.method:
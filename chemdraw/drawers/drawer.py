@@ -1,8 +1,19 @@
 
+import os
+import webbrowser
+
+import numpy as np
 import plotly.graph_objs as go
 
 from chemdraw.objects.molecule import Molecule
 import chemdraw.drawers.layout as layout
+import chemdraw.drawers.level_of_detail as level_of_detail
+from chemdraw.drawers.styles import ResolvedStyles
+from chemdraw.drawers.trace_registry import TraceRegistry
+from chemdraw.drawers.export_manifest import ExportManifest
+from chemdraw.utils.object_state import get_state, get_fingerprint
+from chemdraw.utils.sinks import Sink
+import chemdraw.utils.instrumentation as instrumentation
 import chemdraw.drawers.draw_debug as draw_debug
 import chemdraw.drawers.draw_title as draw_title
 import chemdraw.drawers.draw_atoms as draw_atoms
@@ -16,14 +27,22 @@ import chemdraw.drawers.draw_ring_highlights as draw_ring_highlights
 
 
 class Config:
+    # function: drawer stage; kwargs: inputs passed to it
+    # element_attrs: atom/bond/... attributes the stage reads (a change re-draws the stage in Drawer.update)
+    # configs: config sections the stage reads (default: its own)
+    # elements: molecule lists the element_attrs are on (default: the ones in kwargs)
     drawers = {
         "bonds": {
             "function": draw_bonds.draw_bonds,
-            "kwargs": ["bonds"]  # fig is added by default
+            "kwargs": ["bonds", "styles"],  # fig is added by default
+            "element_attrs": ["line_format", "_alignment", "_show"],
+            "configs": ["bonds", "atoms", "webgl", "level_of_detail"],
         },
         "atoms": {
             "function": draw_atoms.draw_atoms,
-            "kwargs": ["atoms"]  # fig is added by default
+            "kwargs": ["atoms", "styles"],  # fig is added by default
+            "element_attrs": ["font", "_show"],
+            "configs": ["atoms", "level_of_detail"],
         },
         "title": {
             "function": draw_title.draw_title,
@@ -35,27 +54,41 @@ class Config:
         },
         "atom_numbers": {
             "function": draw_atom_numbers.draw_atom_numbers,
-            "kwargs": ["atoms"]  # fig is added by default
+            "kwargs": ["atoms"],  # fig is added by default
+            "element_attrs": ["number"],
+            "configs": ["atom_numbers", "level_of_detail"],
         },
         "bond_numbers": {
             "function": draw_bond_numbers.draw_bond_numbers,
-            "kwargs": ["bonds"]  # fig is added by default
+            "kwargs": ["bonds"],  # fig is added by default
+            "element_attrs": ["number"],
+            "configs": ["bond_numbers", "level_of_detail"],
         },
         "ring_numbers": {
             "function": draw_ring_numbers.draw_ring_numbers,
-            "kwargs": ["rings"]  # fig is added by default
+            "kwargs": ["molecule"],  # fig is added by default
+            "element_attrs": ["number"],
+            "elements": ["rings"],
+            "configs": ["ring_numbers", "level_of_detail"],
         },
         "highlights": {
             "function": draw_highlights.draw_highlights,
-            "kwargs": ["atoms", "bonds"]  # fig is added by default
+            "kwargs": ["atoms", "bonds", "styles"],  # fig is added by default
+            "element_attrs": ["highlight"],
+            "configs": ["highlights", "webgl"],
         },
         "ring_highlights": {
             "function": draw_ring_highlights.draw_ring_highlight,
-            "kwargs": ["rings"]  # fig is added by default
+            "kwargs": ["molecule", "styles"],  # fig is added by default
+            "element_attrs": ["highlight"],
+            "elements": ["rings"],
         },
         "parenthesis":  {
             "function": draw_parenthesis.draw_parenthesis,
-            "kwargs": ["parenthesis"]  # fig is added by default
+            "kwargs": ["parenthesis", "styles"],  # fig is added by default
+            "element_attrs": ["line_format", "sub_script_font", "super_script_font", "_show", "sub_script",
+                              "super_script", "vector", "size", "bond_position"],
+            "configs": ["parenthesis", "webgl"],
         },
     }
 
@@ -64,8 +97,10 @@ class Config:
         self.draw_order = ["ring_highlights", "highlights", "bonds", "atoms", "parenthesis",
                            "atom_numbers", "bond_numbers", "ring_numbers",
                            "debug", "title"]
+        self.webgl = False  # Scattergl traces for bonds and brackets (large molecules; see chemdraw.drawers.webgl)
 
         self.layout = layout.ConfigLayout(self)
+        self.level_of_detail = level_of_detail.ConfigLevelOfDetail(self)
         self.bonds = draw_bonds.ConfigDrawerBonds(self)
         self.atoms = draw_atoms.ConfigDrawerAtoms(self)
         self.parenthesis = draw_parenthesis.ConfigDrawerParenthesis(self)
@@ -95,6 +130,9 @@ class Drawer:
 
         self.title = title
         self.config = config if config is not None else Config()
+        self.styles: ResolvedStyles | None = None
+        self.trace_registry: TraceRegistry | None = None
+        self.report: instrumentation.Report | None = None  # see chemdraw.utils.instrumentation
 
     def __repr__(self) -> str:
         text = "Drawer for: "
@@ -117,16 +155,92 @@ class Drawer:
 
         return fig
 
+    def update(self, auto_open: bool = False) -> go.Figure:
+        """
+        Re-draw only the stages whose config or element formats (highlights, fonts, numbers, ...) changed since the
+        last `draw`; the other traces of the figure are left untouched.
+        A change to the geometry, layout, title or draw order re-draws every stage.
+        """
+        if self.trace_registry is None:
+            return self.draw(auto_open=auto_open)
+
+        fig = self.trace_registry.figure
+        if self.trace_registry.layout_signature != self._layout_signature():
+            self.trace_registry.remove_all()
+            fig = self._draw(fig)
+        else:
+            self.report = instrumentation.new_report("update", self.title or self.molecule.name)
+            with instrumentation.stage(self.report, "scaling"):
+                self.config.layout.get_scaling(self.molecule, self.title)
+                self.config.level_of_detail.set_pixels_per_bond(self.molecule.geometry.bond_length)
+                self.styles = ResolvedStyles(self.config, self.molecule)
+            for key in self.config.draw_order:
+                signature = self._stage_signature(key)
+                if signature != self.trace_registry.entries[key].signature:
+                    stage_fig = go.Figure()
+                    with instrumentation.stage(self.report, key, stage_fig):
+                        stage_fig = self._draw_stage(stage_fig, key)
+                    self.trace_registry.replace(key, signature, stage_fig.data, stage_fig.layout.annotations)
+            instrumentation.finish(self.report)
+
+        fig = self.config.layout.apply_layout(fig)
+
+        if auto_open:
+            fig.show()
+
+        return fig
+
     def _draw(self, fig: go.Figure) -> go.Figure:
-        self.config.layout.get_scaling(self.molecule, self.title)
+        self.report = instrumentation.new_report("draw", self.title or self.molecule.name)
+        self.trace_registry = TraceRegistry(fig, self._layout_signature())
+        with instrumentation.stage(self.report, "scaling"):
+            self.config.layout.get_scaling(self.molecule, self.title)
+            self.config.level_of_detail.set_pixels_per_bond(self.molecule.geometry.bond_length)
+            self.styles = ResolvedStyles(self.config, self.molecule)
 
         for key in self.config.draw_order:
-            func = self.config.drawers[key]["function"]
-            kwargs = self._get_kwargs(key, self.config.drawers[key]["kwargs"])
-            fig = func(fig, **kwargs)
+            signature = self._stage_signature(key)
+            trace_start, annotation_start = len(fig.data), len(fig.layout.annotations)
+            with instrumentation.stage(self.report, key, fig):
+                fig = self._draw_stage(fig, key)
+            self.trace_registry.add(key, signature, trace_start, annotation_start)
 
+        instrumentation.finish(self.report)
         return fig
 
+    def _draw_stage(self, fig: go.Figure, key: str) -> go.Figure:
+        func = self.config.drawers[key]["function"]
+        kwargs = self._get_kwargs(key, self.config.drawers[key]["kwargs"])
+        return func(fig, **kwargs)
+
+    def _layout_signature(self) -> tuple:
+        """ Everything that changes the scaling or the position of the traces. """
+        geometry = id(self.molecule), self.molecule.coordinate_version
+        return get_state(self.config.layout), get_state(self.config.title), self.title, geometry, \
+            tuple(self.config.draw_order)
+
+    def _stage_signature(self, key: str) -> tuple:
+        """ Everything a drawer stage reads, except the layout. """
+        drawer = self.config.drawers[key]
+        signature = [get_state(drawer["function"])]
+        signature += [get_state(getattr(self.config, config)) for config in drawer.get("configs", [key])]
+
+        element_attrs = drawer.get("element_attrs", [])
+        names = drawer.get("elements", [name for name in ("atoms", "bonds", "rings", "parenthesis")
+                                        if name in drawer["kwargs"]])
+        for name in names:
+            if element_attrs:
+                if name == "rings" and not self.molecule.rings_built:
+                    signature.append(None)  # not built yet, so nothing set on them
+                    continue
+                elements = getattr(self.molecule, name)
+                signature.append(
+                    tuple(tuple(get_state(getattr(element, attr_, None)) for attr_ in element_attrs)
+                          for element in elements)
+                )
+
+        return tuple(signature)
+
     def _get_kwargs(self, key: str, kwargs: list[str]) -> dict:
         kwargs_out = {"config": getattr(self.config, key)}
         if "title" in kwargs:
@@ -141,18 +255,112 @@ class Drawer:
             kwargs_out["rings"] = getattr(self.molecule, "rings")
         if "parenthesis" in kwargs:
             kwargs_out["parenthesis"] = getattr(self.molecule, "parenthesis")
+        if "styles" in kwargs:
+            kwargs_out["styles"] = self.styles
 
         return kwargs_out
 
-    def draw_img(self, file_location: str = "molecule.svg", transparent_background: bool = True) -> str:
+    def fingerprint(self) -> str:
+        """
+        Stable hash of everything that changes the drawing: the molecule (canonical SMILES, atoms, bonds and
+        coordinates), the title, the full config and the per-element formats. Equal between sessions and machines.
+        """
+        molecule = self.molecule
+        molecule_state = (
+            molecule.canonical_smiles,
+            [atom.symbol for atom in molecule.atoms],
+            molecule.bond_atom_ids,
+            molecule.bond_types,
+            _round(molecule.atom_coordinates),
+            _round(molecule.parenthesis_coordinates),
+        )
+        stages = [(key, self._stage_signature(key)) for key in self.config.draw_order]
+        return get_fingerprint((molecule_state, self.title, get_state(self.config), self.config.drawers, stages))
+
+    def draw_img(self, file_location: str = "molecule.svg", transparent_background: bool = True,
+                 manifest: ExportManifest = None, sink: Sink = None) -> str:
+        """
+        `manifest`: skip the export if the file is current (see ExportManifest)
+        `sink`: write the image into the sink (directory or archive; see chemdraw.utils.sinks) as `file_location`
+        """
+        if sink is not None:
+            if manifest is not None:
+                raise ValueError("'manifest' and 'sink' can't be used together.")
+            sink.write(file_location, self.draw_bytes(_image_format(file_location), transparent_background))
+            return file_location
+
         if transparent_background:
             self.config.layout.background_color = "rgba(0,0,0,0)"
 
+        if manifest is not None:
+            fingerprint = self.fingerprint()
+            if manifest.is_current(file_location, fingerprint):
+                return file_location
+
         fig = self.draw()
         fig.write_image(file_location)
+        if manifest is not None:
+            manifest.add(file_location, fingerprint)
         return file_location
 
-    def draw_html(self, file_location: str = "molecule.html", auto_open: str = False) -> str:
+    def draw_html(self, file_location: str = "molecule.html", auto_open: str = False,
+                  manifest: ExportManifest = None) -> str:
+        """ `manifest`: skip the export if the file is current (see ExportManifest) """
+        if manifest is not None:
+            fingerprint = self.fingerprint()
+            if manifest.is_current(file_location, fingerprint):
+                if auto_open:
+                    webbrowser.open("file://" + os.path.realpath(file_location))
+                return file_location
+
         fig = self.draw()
         fig.write_html(file_location, auto_open=auto_open)
+        if manifest is not None:
+            manifest.add(file_location, fingerprint)
         return file_location
+
+    def draw_bytes(self, format_: str = "svg", transparent_background: bool = True) -> bytes:
+        """
+        Drawing as file content, without writing a file.
+        format_: 'svg', 'png', 'jpeg', 'webp', 'pdf' (kaleido), 'html' or 'json' (plotly figure)
+        """
+        if format_ == "json":
+            return self.draw().to_json().encode("utf-8")
+        if format_ == "html":
+            return self.draw().to_html().encode("utf-8")
+
+        if transparent_background:
+            self.config.layout.background_color = "rgba(0,0,0,0)"
+        return self.draw().to_image(format=format_)
+
+    ## async (see chemdraw.drawers.drawer_async); don't run two at once on the same Drawer ##
+    async def draw_img_async(self, file_location: str = "molecule.svg", transparent_background: bool = True,
+                             manifest: ExportManifest = None, renderer=None) -> str:
+        return await _get_renderer(renderer).run(self.draw_img, file_location, transparent_background, manifest)
+
+    async def draw_html_async(self, file_location: str = "molecule.html", manifest: ExportManifest = None,
+                              renderer=None) -> str:
+        return await _get_renderer(renderer).run(self.draw_html, file_location, False, manifest)
+
+    async def draw_bytes_async(self, format_: str = "svg", transparent_background: bool = True,
+                               renderer=None) -> bytes:
+        return await _get_renderer(renderer).run(self.draw_bytes, format_, transparent_background)
+
+
+def _image_format(file_location: str) -> str:
+    format_ = os.path.splitext(file_location)[1][1:].lower()
+    if format_ == "jpg":
+        return "jpeg"
+    return format_ or "svg"
+
+
+def _get_renderer(renderer):
+    from chemdraw.drawers.drawer_async import get_default_renderer  # drawer_async imports this module
+    return renderer if renderer is not None else get_default_renderer()
+
+
+def _round(array: np.ndarray | None) -> np.ndarray | None:
+    """ Drop float noise; + 0.0 turns -0.0 into 0.0. """
+    if array is None:
+        return None
+    return np.round(array, 6) + 0.0
@@ -0,0 +1,158 @@
+"""
+asyncio support: drawing (RDKit parsing, figure building, kaleido export) runs in a bounded executor so the event loop
+stays free.
+
+    png = await chemdraw.Drawer("CCO").draw_bytes_async("png")
+    svgs = await draw_batch_async(["CCO", "c1ccccc1O"], "svg", timeout=10)
+
+Backpressure: a renderer lets at most `max_pending` jobs into the executor; further callers wait in the event loop.
+Timeouts start once a job is in the executor (time waiting for a slot doesn't count).
+Cancellation: cancelling a task (or a timeout) removes its job if it has not started; a job already running in a worker
+finishes, but its result is dropped. The job keeps its slot until it has finished.
+Threads share the GIL, and RDKit holds it while laying out a molecule (~1 s for ~1000 atoms). Use
+`AsyncRenderer(processes=True)` when huge molecules must not slow the event loop.
+"""
+import asyncio
+import concurrent.futures
+import copy
+import functools
+import os
+from typing import Any, Callable
+
+from chemdraw.objects.molecule import Molecule
+from chemdraw.drawers.drawer import Drawer, Config
+
+
+class AsyncRenderer:
+    def __init__(self, max_workers: int = None, max_pending: int = None, processes: bool = False,
+                 executor: concurrent.futures.Executor = None):
+        """
+        Parameters
+        ----------
+        max_workers: int
+            workers (default: min(4, cpu count)); ignored if `executor` is given
+        max_pending: int
+            jobs allowed in the executor at once, running or queued (default: 2 * max_workers)
+        processes: bool
+            True: worker processes; jobs are pickled (Drawer methods draw a copy of the Drawer)
+            False: worker threads
+        executor: concurrent.futures.Executor
+            own executor
+        """
+        if max_workers is None:
+            max_workers = min(4, os.cpu_count() or 1)
+        if executor is None:
+            if processes:
+                executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+            else:
+                executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="chemdraw")
+        self.executor = executor
+        self.max_pending = max_pending if max_pending is not None else 2 * max_workers
+        self._semaphores: dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+    def __repr__(self) -> str:
+        return f"max_pending: {self.max_pending}, executor: {type(self.executor).__name__}"
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """ asyncio semaphores belong to one event loop. """
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores = {loop_: semaphore for loop_, semaphore in self._semaphores.items()
+                                if not loop_.is_closed()}
+            self._semaphores[loop] = asyncio.Semaphore(self.max_pending)
+        return self._semaphores[loop]
+
+    async def run(self, func: Callable, *args, timeout: float = None, **kwargs) -> Any:
+        """
+        Run `func(*args, **kwargs)` in the executor once there is room.
+        `timeout` [s]: counted from the moment the job gets a slot; raises asyncio.TimeoutError
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore()
+        await semaphore.acquire()
+        try:
+            job = self.executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            semaphore.release()
+            raise
+        # the slot is freed when the job is done (or removed before it started), not when the caller stops waiting
+        job.add_done_callback(lambda _: _release_threadsafe(loop, semaphore))
+        return await asyncio.wait_for(asyncio.wrap_future(job), timeout)
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _release_threadsafe(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore):
+    """ done callback of the executor job; runs in the worker thread (or the loop's thread if it never started) """
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:  # loop closed
+        pass
+
+
+_default_renderer: AsyncRenderer | None = None
+
+
+def get_default_renderer() -> AsyncRenderer:
+    global _default_renderer
+    if _default_renderer is None:
+        _default_renderer = AsyncRenderer()
+    return _default_renderer
+
+
+def set_default_renderer(renderer: AsyncRenderer):
+    global _default_renderer
+    _default_renderer = renderer
+
+
+def render_bytes(molecule: str | Molecule, format_: str = "svg", config: Config = None, title: str = None) \
+        -> bytes:
+    """ Parse and draw in one call (runs in the worker). The config is copied, as drawing changes its layout. """
+    config = copy.deepcopy(config) if config is not None else None
+    return Drawer(molecule, title=title, config=config).draw_bytes(format_)
+
+
+async def draw_batch_async(molecules: list[str | Molecule],
+                           format_: str = "svg",
+                           config: Config = None,
+                           titles: list[str] = None,
+                           renderer: AsyncRenderer = None,
+                           timeout: float = None
+                           ) -> list[bytes | Exception]:
+    """
+    Draw many molecules concurrently (bounded by the renderer).
+
+    Parameters
+    ----------
+    molecules: list[str | Molecule]
+        SMILES or molecules
+    format_: str
+        see `Drawer.draw_bytes`
+    config: Config
+        shared config; every job draws with its own copy
+    titles: list[str]
+        one per molecule
+    renderer: AsyncRenderer
+        default: `get_default_renderer()`
+    timeout: float
+        per molecule [s], from the moment it gets a slot in the renderer; a slow molecule gives
+        asyncio.TimeoutError without holding up the others
+
+    Returns
+    -------
+    results: list[bytes | Exception]
+        in the order of `molecules`; failed or timed out molecules give their exception
+
+    """
+    renderer = renderer if renderer is not None else get_default_renderer()
+    if titles is None:
+        titles = [None] * len(molecules)
+    elif len(titles) != len(molecules):
+        raise ValueError("'titles' must be the same length as 'molecules'.")
+
+    async def job(molecule: str | Molecule, title: str) -> bytes:
+        return await renderer.run(render_bytes, molecule, format_, config, title, timeout=timeout)
+
+    return await asyncio.gather(*(job(molecule, title) for molecule, title in zip(molecules, titles)),
+                                return_exceptions=True)
@@ -0,0 +1,271 @@
+"""
+Animated depictions (GIF or APNG), e.g. stepping through highlighted substructures or reaction sites.
+
+    frames = [GifFrame(atoms=[0, 1, 2]), GifFrame(bonds=[3, 4], color="rgb(235,127,127)"), GifFrame(rings=[0])]
+    GifDrawer(molecule, frames).draw_gif("steps.gif")
+
+The molecule is rendered once (kaleido, without the highlight stages, transparent background). Every frame is the
+background, that frame's highlights drawn with PIL, and the molecule layer on top, so a 50 frame animation costs about
+one static render. All frames are quantized to one shared palette (GIF: 256 colors).
+The highlights set on the molecule are not drawn; each frame has its own. Sizes and colors come from the resolved
+highlight styles (config and element overrides) unless the frame sets a color.
+"""
+import io
+import os
+import re
+
+import numpy as np
+import plotly.graph_objs as go
+
+from chemdraw.drawers.drawer import Drawer, Config
+from chemdraw.drawers.draw_ring_highlights import _get_coordinates as get_ring_highlight_coordinates
+from chemdraw.objects.molecule import Molecule
+from chemdraw.utils.sinks import Sink
+
+FORMATS = {".gif": "GIF", ".png": "PNG", ".apng": "PNG"}
+HIGHLIGHT_STAGES = ("ring_highlights", "highlights")
+
+
+class GifFrame:
+    def __init__(self,
+                 atoms: list[int] = None,
+                 bonds: list[int] = None,
+                 rings: list[int] = None,
+                 color: str = None,
+                 duration: int = None
+                 ):
+        """
+        Parameters
+        ----------
+        atoms, bonds, rings: list[int]
+            ids of the highlighted elements
+        color: str
+            color of all highlights of the frame (default: highlight styles)
+        duration: int
+            [ms] (default: GifDrawer.duration)
+
+        """
+        self.atoms = atoms if atoms is not None else []
+        self.bonds = bonds if bonds is not None else []
+        self.rings = rings if rings is not None else []
+        self.color = color
+        self.duration = duration
+
+    def __repr__(self) -> str:
+        return f"atoms: {self.atoms}, bonds: {self.bonds}, rings: {self.rings}"
+
+
+class GifDrawer:
+    def __init__(self,
+                 molecule: Molecule,
+                 frames: list[GifFrame],
+                 title: str = None,
+                 config: Config = None,
+                 duration: int = 500,
+                 loop: int = 0,
+                 background_color: str = None
+                 ):
+        """
+        Parameters
+        ----------
+        molecule: Molecule
+        frames: list[GifFrame]
+        title: str
+        config: Config
+        duration: int
+            [ms] per frame
+        loop: int
+            number of loops (0: forever)
+        background_color: str
+            default: config.layout.background_color (white if it is transparent)
+
+        """
+        if not frames:
+            raise ValueError("Provide at least one frame.")
+        self.drawer = Drawer(molecule, title=title, config=config)
+        self.frames = frames
+        self.duration = duration
+        self.loop = loop
+        self.background_color = background_color
+
+    def __repr__(self) -> str:
+        return f"{self.drawer.molecule} || # frames: {len(self.frames)}"
+
+    @property
+    def molecule(self) -> Molecule:
+        return self.drawer.molecule
+
+    @property
+    def config(self) -> Config:
+        return self.drawer.config
+
+    def draw_frames(self) -> list:
+        """ frames as RGB PIL images (before the palette is applied) """
+        from PIL import Image
+        static, to_pixels = self._draw_static_layer()
+        background = Image.new("RGBA", static.size, self._get_background_color())
+
+        frames = []
+        for frame in self.frames:
+            image = background.copy()
+            self._draw_highlights(image, frame, to_pixels)
+            image.alpha_composite(static)
+            frames.append(image.convert("RGB"))
+
+        return frames
+
+    def draw_bytes(self, format_: str = "gif") -> bytes:
+        """ format_: 'gif', 'png' or 'apng' (animated PNG) """
+        extension = "." + format_.lower()
+        if extension not in FORMATS:
+            raise ValueError(f"Invalid animation format: '{format_}' (options: {[k[1:] for k in FORMATS]})")
+
+        frames = quantize_frames(self.draw_frames(), self._highlight_colors())
+        durations = [frame.duration if frame.duration is not None else self.duration for frame in self.frames]
+        data = io.BytesIO()
+        frames[0].save(data, format=FORMATS[extension], save_all=True, append_images=frames[1:],
+                       duration=durations if len(frames) > 1 else durations[0], loop=self.loop, optimize=False)
+        return data.getvalue()
+
+    def draw_gif(self, file_location: str = "molecule.gif", sink: Sink = None) -> str:
+        """
+        `file_location`: '.gif', or '.png'/'.apng' for an animated PNG
+        `sink`: write the file into the sink (directory or archive; see chemdraw.utils.sinks) as `file_location`
+        """
+        data = self.draw_bytes(os.path.splitext(file_location)[1][1:] or "gif")
+        if sink is not None:
+            sink.write(file_location, data)
+        else:
+            with open(file_location, "wb") as file:
+                file.write(data)
+        return file_location
+
+    def _draw_static_layer(self):
+        """ molecule without highlights on a transparent background, and the data -> pixel transform """
+        from PIL import Image
+        layout = self.config.layout
+        draw_order, background_color = self.config.draw_order, layout.background_color
+        self.config.draw_order = [key for key in draw_order if key not in HIGHLIGHT_STAGES]
+        layout.background_color = "rgba(0,0,0,0)"
+        try:
+            fig = self.drawer.draw()
+            static = Image.open(io.BytesIO(fig.to_image(format="png"))).convert("RGBA")
+        finally:
+            self.config.draw_order = draw_order
+            layout.background_color = background_color
+
+        return static, get_pixel_transform(fig, static.size)
+
+    def _get_background_color(self) -> tuple[int, int, int, int]:
+        color = to_rgba(self.background_color if self.background_color is not None
+                        else self.config.layout.background_color)
+        return color if color[3] > 0 else (255, 255, 255, 255)
+
+    def _highlight_colors(self) -> list[tuple[int, int, int, int]]:
+        """ every highlight color of the animation (so the shared palette has them) """
+        styles = self.drawer.styles
+        colors = {frame.color for frame in self.frames if frame.color is not None}
+        for key, attr_ in (("highlights.atoms", "atoms"), ("highlights.bonds", "bonds"),
+                           ("ring_highlights.ring", "rings")):
+            ids = {id_ for frame in self.frames if frame.color is None for id_ in getattr(frame, attr_)}
+            if ids:
+                colors.update(styles[key]["color"][sorted(ids)].tolist())
+        return [to_rgba(color) for color in sorted(colors)]
+
+    def _draw_highlights(self, image, frame: GifFrame, to_pixels):
+        """ rings, then bonds, then atoms (the drawer's order); each group is blended onto the image as one layer """
+        from PIL import Image, ImageDraw
+        styles = self.drawer.styles
+
+        def layer(draw_group):
+            overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
+            draw_group(ImageDraw.Draw(overlay))
+            image.alpha_composite(overlay)
+
+        if frame.rings:
+            highlight = styles["ring_highlights.ring"]
+            rings = self.molecule.rings
+
+            def draw_rings(draw):
+                for i in frame.rings:
+                    xy = to_pixels(get_ring_highlight_coordinates(highlight["offset"][i], rings[i]))
+                    draw.polygon([tuple(point) for point in xy.tolist()],
+                                 fill=to_rgba(frame.color or highlight["color"][i]))
+            layer(draw_rings)
+
+        if frame.bonds:
+            highlight = styles["highlights.bonds"]
+
+            def draw_bonds(draw):
+                for i in frame.bonds:
+                    bond = self.molecule.bonds[i]
+                    xy = to_pixels(np.column_stack((bond.x, bond.y)))
+                    width = max(int(round(highlight["size"][i])), 1)
+                    color = to_rgba(frame.color or highlight["color"][i])
+                    draw.line([tuple(point) for point in xy.tolist()], fill=color, width=width)
+                    for x, y in xy.tolist():  # round ends
+                        draw.ellipse((x - width / 2, y - width / 2, x + width / 2, y + width / 2), fill=color)
+            layer(draw_bonds)
+
+        if frame.atoms:
+            highlight = styles["highlights.atoms"]
+
+            def draw_atoms(draw):
+                xy = to_pixels(self.molecule.atom_coordinates[frame.atoms])
+                for i, (x, y) in zip(frame.atoms, xy.tolist()):
+                    radius = highlight["size"][i] / 2  # marker size is the diameter
+                    draw.ellipse((x - radius, y - radius, x + radius, y + radius),
+                                 fill=to_rgba(frame.color or highlight["color"][i]))
+            layer(draw_atoms)
+
+
+def get_pixel_transform(fig: go.Figure, size: tuple[int, int]):
+    """ function mapping (n, 2) data coordinates to pixels of the rendered figure (y down) """
+    width, height = size
+    margin = fig.layout.margin
+    left, right, top, bottom = (getattr(margin, side) or 0 for side in ("l", "r", "t", "b"))
+    x0, x1 = fig.layout.xaxis.range
+    y0, y1 = fig.layout.yaxis.range
+    scale = np.array(((width - left - right) / (x1 - x0), -(height - top - bottom) / (y1 - y0)))
+    offset = np.array((left - x0 * scale[0], top - y1 * scale[1]))
+
+    def to_pixels(xy: np.ndarray) -> np.ndarray:
+        return np.asarray(xy, dtype="float64").reshape(-1, 2) * scale + offset
+
+    return to_pixels
+
+
+def to_rgba(color: str) -> tuple[int, int, int, int]:
+    """ plotly color (names, hex, 'rgb(...)', 'rgba(..., alpha 0-1)') as 0-255 RGBA """
+    from PIL import ImageColor
+    match = re.fullmatch(r"\s*rgba\(([^)]*)\)\s*", color)
+    if match:
+        red, green, blue, alpha = (float(value) for value in match.group(1).split(","))
+        return int(red), int(green), int(blue), int(round(alpha * 255))
+    return ImageColor.getcolor(color.replace(" ", ""), "RGBA")
+
+
+def quantize_frames(frames: list, colors: list[tuple[int, int, int, int]] = None, number_colors: int = 256,
+                    number_samples: int = 8) -> list:
+    """
+    Convert RGB frames to palette images with one shared palette.
+    The palette comes from up to `number_samples` frames plus a strip of `colors` blended on the first frame's
+    background (top left pixel), so highlight colors of frames that are not sampled are in it too.
+    """
+    from PIL import Image
+    width, height = frames[0].size
+    samples = frames[::max(1, -(-len(frames) // number_samples))]
+    background = frames[0].getpixel((0, 0))
+    colors = colors or []
+    strip_height = 4 if colors else 0
+
+    montage = Image.new("RGB", (width, height * len(samples) + strip_height), background)
+    for i, frame in enumerate(samples):
+        montage.paste(frame, (0, i * height))
+    for i, color in enumerate(colors):
+        swatch = Image.new("RGBA", (max(width // len(colors), 1), strip_height), background + (255,))
+        swatch.alpha_composite(Image.new("RGBA", swatch.size, color))
+        montage.paste(swatch.convert("RGB"), (i * swatch.width, height * len(samples)))
+
+    palette = montage.quantize(number_colors, method=Image.Quantize.MEDIANCUT)
+    return [frame.quantize(palette=palette, dither=Image.Dither.NONE) for frame in frames]
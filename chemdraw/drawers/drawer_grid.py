@@ -1,12 +1,19 @@
-import copy
+import contextlib
+import io
 import math
 import os
+from typing import BinaryIO
 
 import plotly.graph_objs as go
 import numpy as np
 
 from chemdraw.drawers.drawer import Drawer, Config
 from chemdraw.objects.molecule import Molecule
+from chemdraw.drawers.export_manifest import ExportManifest
+from chemdraw.utils.sinks import Sink
+import chemdraw.drawers.sprite_sheet as sprite_sheet
+from chemdraw.utils.object_state import get_state, get_fingerprint
+import chemdraw.utils.instrumentation as instrumentation
 
 
 class GridConfig:
@@ -16,12 +23,13 @@ class GridConfig:
         self.drawer_config: Config = Config()
 
         # grid
-        self.cell_width: int = 600
+        self.cell_width: int = 600  # [px] layout size of every cell (small cells: see chemdraw.drawers.level_of_detail)
         self.cell_length: int = 600
 
         # general options
         self.include_titles: bool = True
-        self.scale_same_for_all_molecules: bool = True  # TODO: scale
+        self.scale_same_for_all_molecules: bool = True  # one scaling (bond widths, font sizes) for all cells
+        self.level_of_detail: bool = True  # sets the cells' `level_of_detail.auto` while drawing
 
         self.html_table_style: str = "table, th, td { border: 1px solid black; border-collapse: collapse;}"
 
@@ -39,8 +47,8 @@ def html_table_from_figs(figs: list[go.Figure], shape: tuple[int, int] | list[in
 
     Parameters
     ----------
-    figs: list[go.Figure, str]
-        list of figures to append together
+    figs: list[go.Figure | str]
+        list of figures (or their html bodies) to append together
     shape: tuple[int, int] | list[int, int]
         shape of grid
     filename:str
@@ -57,13 +65,7 @@ def html_table_from_figs(figs: list[go.Figure], shape: tuple[int, int] | list[in
         filename += ".html"
 
     # get htmls
-    if include_plotlyjs:
-        kwargs = {}
-    else:
-        kwargs = dict(include_plotlyjs="cdn")
-    fig_htmls = []
-    for fig in figs:
-        fig_htmls.append(fig.to_html(**kwargs).split('<body>')[1].split('</body>')[0])
+    fig_htmls = [fig if isinstance(fig, str) else fig_to_html_body(fig, include_plotlyjs) for fig in figs]
 
     # generate html
     with open(filename, 'w') as file:
@@ -95,36 +97,38 @@ def html_table_from_figs(figs: list[go.Figure], shape: tuple[int, int] | list[in
         os.system(fr"start {filename}")
 
 
-def png_table(imgs: list[str], shape: tuple[int, int], file_name: str = "molecule_grid.png", auto_open: bool = True):
-    from PIL import Image
-    imgs = copy.copy(imgs)
-
-    im = Image.open(imgs[0])
+def fig_to_html_body(fig: go.Figure, include_plotlyjs: bool = False) -> str:
+    if include_plotlyjs:
+        kwargs = {}
+    else:
+        kwargs = dict(include_plotlyjs="cdn")
+    return fig.to_html(**kwargs).split('<body>')[1].split('</body>')[0]
 
-    cell_width = im.width
-    cell_height = im.height
 
-    new_im = Image.new('RGB', (cell_width * shape[0], cell_height * shape[1]))
+def png_table(imgs: list[str | BinaryIO], shape: tuple[int, int], file_name: str | None = "molecule_grid.png",
+              auto_open: bool = True):
+    """ `imgs`: file names or file objects; `file_name` None: only return the image """
+    from PIL import Image
+    imgs = [Image.open(img) for img in imgs[:shape[0] * shape[1]]]
 
-    FLAG = True
-    for row in range(shape[1]):
-        for col in range(shape[0]):
-            try:
-                img = imgs.pop(0)
-            except IndexError:
-                FLAG = False
-                break
-            im = Image.open(img)
-            new_im.paste(im, (col*cell_width, row*cell_height))
+    # cells fit the largest image; smaller ones are centered
+    cell_width = max(im.width for im in imgs)
+    cell_height = max(im.height for im in imgs)
 
-        if not FLAG:
-            break
+    new_im = Image.new('RGB', (cell_width * shape[0], cell_height * shape[1]))
+    for i, im in enumerate(imgs):
+        row, col = divmod(i, shape[0])
+        new_im.paste(im, (col * cell_width + (cell_width - im.width) // 2,
+                          row * cell_height + (cell_height - im.height) // 2))
 
-    new_im.save(file_name)
+    if file_name is not None:
+        new_im.save(file_name)
 
     if auto_open:
         new_im.show()
 
+    return new_im
+
 
 class GridDrawer:
 
@@ -140,6 +144,7 @@ class GridDrawer:
         self.drawers = self._get_drawers()
         self.shape = self._get_shape(shape)
         self.grid = self._get_grid()
+        self.cell_reports: list[instrumentation.Report | None] = []  # see chemdraw.utils.instrumentation
 
     def _get_drawers(self) -> list[Drawer]:
         if self.config_drawer is None:
@@ -180,24 +185,153 @@ class GridDrawer:
     #
     #     return fig
 
-    def draw_html(self, file_name: str = "molecule_grid.html", auto_open: bool = False, **kwargs):
-        figs = []
-        for drawer in self.drawers:
-            figs.append(drawer.draw())
+    def get_bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        """ min and max corner of every cell (with its title); one pass over all coordinates """
+        coordinates = [drawer.molecule.atom_coordinates for drawer in self.drawers]
+        starts = np.cumsum([0] + [len(coordinates_) for coordinates_ in coordinates[:-1]])
+        coordinates = np.concatenate(coordinates)
+        mins = np.minimum.reduceat(coordinates, starts, axis=0)
+        maxs = np.maximum.reduceat(coordinates, starts, axis=0)
 
-        html_table_from_figs(figs, self.shape, file_name, auto_open=auto_open, style=self.config.html_table_style,
+        for i, drawer in enumerate(self.drawers):
+            if drawer.title is not None:
+                mins[i], maxs[i] = drawer.config.layout.add_title_bounds(mins[i], maxs[i], drawer.title)
+        return mins, maxs
+
+    @contextlib.contextmanager
+    def cell_settings(self):
+        """
+        Set every cell's layout size to `cell_width` x `cell_length` and its level of detail policy on or off
+        (`level_of_detail`); restored afterwards.
+        """
+        configs = {id(drawer.config): drawer.config for drawer in self.drawers}.values()
+        saved = [(config, config.layout.width, config.layout.height, config.level_of_detail.auto)
+                 for config in configs]
+        try:
+            for config in configs:
+                config.layout.width, config.layout.height = self.config.cell_width, self.config.cell_length
+                config.level_of_detail.auto = self.config.level_of_detail
+            yield
+        finally:
+            for config, width, height, auto in saved:
+                config.layout.width, config.layout.height = width, height
+                config.level_of_detail.auto = auto
+
+    @contextlib.contextmanager
+    def shared_scale(self):
+        """
+        With `scale_same_for_all_molecules`: fix the ranges of every cell's config to fit the largest cell, so all
+        cells are drawn with the same scaling (cells skip their own scaling); restored afterwards.
+        """
+        if not self.config.scale_same_for_all_molecules or not self.drawers:
+            yield
+            return
+
+        mins, maxs = self.get_bounds()
+        min_, max_ = mins.min(axis=0), maxs.max(axis=0)
+        attrs = ("range_x", "range_y", "scaling", "_clear_x_ranges", "_clear_y_ranges")
+        layouts = {id(drawer.config.layout): drawer.config.layout for drawer in self.drawers}.values()
+        saved = [(layout, [getattr(layout, attr) for attr in attrs]) for layout in layouts]
+        try:
+            for layout in layouts:
+                layout.set_ranges(min_, max_)
+                layout._clear_x_ranges = layout._clear_y_ranges = False
+            yield
+        finally:
+            for layout, values in saved:
+                for attr, value in zip(attrs, values):
+                    setattr(layout, attr, value)
+
+    def fingerprint(self) -> str:
+        """ Stable hash of the grid config, shape and the fingerprint of every cell (see `Drawer.fingerprint`). """
+        return get_fingerprint((get_state(self.config), self.shape, [drawer.fingerprint() for drawer in self.drawers]))
+
+    def draw_html(self, file_name: str = "molecule_grid.html", auto_open: bool = False,
+                  manifest: ExportManifest = None, **kwargs):
+        """ `manifest`: skip the export if the file is current (see ExportManifest) """
+        if manifest is not None:
+            if file_name[-5:] != ".html":
+                file_name += ".html"
+            fingerprint = get_fingerprint((self.fingerprint(), kwargs))
+            if manifest.is_current(file_name, fingerprint):
+                return
+
+        self.cell_reports = []
+        htmls = []
+        with self.cell_settings(), self.shared_scale():
+            for i, drawer in enumerate(self.drawers):
+                report = instrumentation.new_report("grid cell", i)
+                with instrumentation.stage(report, "draw"):
+                    fig = drawer.draw()
+                with instrumentation.stage(report, "html"):
+                    htmls.append(fig_to_html_body(fig, kwargs.get("include_plotlyjs", False)))
+                instrumentation.finish(report)
+                self.cell_reports.append(report)
+
+        html_table_from_figs(htmls, self.shape, file_name, auto_open=auto_open, style=self.config.html_table_style,
                              **kwargs)
+        if manifest is not None:
+            manifest.add(file_name, fingerprint)
 
     def draw_png(self, file_name: str = "molecule_grid.png", folder: str = "imgs", auto_open: bool = False,
-                 save_individual_imgs: bool = False):
-        make_new_folder(folder)
+                 save_individual_imgs: bool = False, manifest: ExportManifest = None, sink: Sink = None):
+        """
+        Cells are rendered in memory; `folder` is only used for `save_individual_imgs`.
+        `manifest`: skip the export if the file is current (see ExportManifest); with `save_individual_imgs` the
+        images of unchanged cells are reused too.
+        `sink`: write the grid (and the individual images as 'img<i>.png') into the sink (directory or archive; see
+        chemdraw.utils.sinks) instead of files
+        """
+        if sink is not None and manifest is not None:
+            raise ValueError("'manifest' and 'sink' can't be used together.")
+        if manifest is not None:
+            fingerprint = self.fingerprint()
+            if manifest.is_current(file_name, fingerprint):
+                return
+
+        to_folder = save_individual_imgs and sink is None
+        if to_folder:
+            make_new_folder(folder)
+        self.cell_reports = []
         imgs = []
-        for i, drawer in enumerate(self.drawers):
-            imgs.append(drawer.draw_img(file_location=folder + f"\\img{i}.png", transparent_background=False))
-
-        png_table(imgs, self.shape, file_name, auto_open)
-
-        if not save_individual_imgs:
-            # remove temporary images
-            for img in imgs:
-                os.remove(img)
+        with self.cell_settings(), self.shared_scale():
+            for i, drawer in enumerate(self.drawers):
+                report = instrumentation.new_report("grid cell", i)
+                with instrumentation.stage(report, "draw image"):
+                    if to_folder:
+                        imgs.append(drawer.draw_img(os.path.join(folder, f"img{i}.png"), transparent_background=False,
+                                                    manifest=manifest))
+                    else:
+                        data = drawer.draw_bytes("png", transparent_background=False)
+                        if save_individual_imgs:
+                            sink.write(f"img{i}.png", data)
+                        imgs.append(io.BytesIO(data))
+                instrumentation.finish(report)
+                self.cell_reports.append(report)
+
+        grid = png_table(imgs, self.shape, file_name if sink is None else None, auto_open)
+        if sink is not None:
+            buffer = io.BytesIO()
+            grid.save(buffer, format="PNG")
+            sink.write(file_name, buffer.getvalue())
+        if manifest is not None:
+            manifest.add(file_name, fingerprint)
+
+    def draw_sprite_sheets(self, file_name: str = "molecule_sprites.png", layout: str = "grid", max_size: int = 4096,
+                           padding: int = 0, transparent_background: bool = True, sink: Sink = None) -> dict:
+        """
+        Cells packed into one or more sprite sheets (PNG or WebP, by extension) with a JSON index of every cell's
+        pixel rectangle; see chemdraw.drawers.sprite_sheet. Returns the index.
+        """
+        self.cell_reports = []
+        imgs = []
+        with self.cell_settings(), self.shared_scale():
+            for i, drawer in enumerate(self.drawers):
+                report = instrumentation.new_report("grid cell", i)
+                with instrumentation.stage(report, "draw image"):
+                    imgs.append(drawer.draw_bytes("png", transparent_background=transparent_background))
+                instrumentation.finish(report)
+                self.cell_reports.append(report)
+
+        names = [drawer.title or drawer.molecule.name for drawer in self.drawers]
+        return sprite_sheet.draw_sprite_sheets(imgs, file_name, names, layout, max_size, padding, sink)
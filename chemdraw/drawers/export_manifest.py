@@ -0,0 +1,59 @@
+import json
+import os
+
+
+class ExportManifest:
+    """
+    Record of exported files and the fingerprint of the drawing in each (see `Drawer.fingerprint`).
+
+    Exports given a manifest are skipped when the file exists and the fingerprint has not changed.
+
+        with ExportManifest("imgs/manifest.json") as manifest:
+            for drawer in drawers:
+                drawer.draw_img(f"imgs/{drawer.molecule.name}.svg", manifest=manifest)
+
+    The manifest is written on `save()` (or leaving the `with` block).
+    """
+
+    def __init__(self, file_location: str = "manifest.json"):
+        self.file_location = file_location
+        self.folder = os.path.dirname(os.path.abspath(file_location))
+        self.entries: dict[str, str] = self._load()  # {file path relative to manifest: fingerprint}
+        self.number_written = 0
+        self.number_skipped = 0
+
+    def __repr__(self) -> str:
+        return f"# files: {len(self.entries)}, written: {self.number_written}, skipped: {self.number_skipped}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.save()
+
+    def _load(self) -> dict[str, str]:
+        if not os.path.exists(self.file_location):
+            return {}
+        with open(self.file_location, "r", encoding="utf-8") as file:
+            return json.load(file)["files"]
+
+    def _key(self, file_location: str) -> str:
+        return os.path.relpath(os.path.abspath(file_location), self.folder).replace(os.sep, "/")
+
+    def is_current(self, file_location: str, fingerprint: str) -> bool:
+        """ True if the file exists and was written from a drawing with this fingerprint. """
+        if self.entries.get(self._key(file_location)) == fingerprint and os.path.exists(file_location):
+            self.number_skipped += 1
+            return True
+        return False
+
+    def add(self, file_location: str, fingerprint: str):
+        self.entries[self._key(file_location)] = fingerprint
+        self.number_written += 1
+
+    def save(self):
+        os.makedirs(self.folder, exist_ok=True)
+        temp_file = self.file_location + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as file:
+            json.dump({"files": self.entries}, file, indent=0, sort_keys=True)
+        os.replace(temp_file, self.file_location)
@@ -1,5 +1,60 @@
-
 import abc
+from typing import Any
+
+import numpy as np
+
+
+class StyleTable:
+    """
+    Resolved style for a group of elements (e.g. all atoms of a molecule).
+
+    The config values are the defaults; only elements that set their own value are stored (sparse overrides).
+    Full arrays are built on first request, so drawers can look up the final value with `table[attr_][index]`.
+    """
+
+    def __init__(self, defaults: dict[str, Any], overrides: dict[str, dict[int, Any]], length: int):
+        self.defaults = defaults
+        self.overrides = overrides
+        self.length = length
+        self._arrays: dict[str, np.ndarray] = {}
+
+    def __repr__(self) -> str:
+        return f"{len(self.defaults)} attributes, {self.length} elements, " \
+               f"{sum(len(v) for v in self.overrides.values())} overrides"
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, attr_: str) -> np.ndarray:
+        if attr_ not in self._arrays:
+            self._arrays[attr_] = self._build_array(attr_)
+        return self._arrays[attr_]
+
+    def get(self, attr_: str, index: int):
+        """ Get the resolved value for a single element. """
+        return self.overrides[attr_].get(index, self.defaults[attr_])
+
+    def is_uniform(self, attr_: str) -> bool:
+        """ True if no element overrides the config value. """
+        return not self.overrides[attr_]
+
+    def _build_array(self, attr_: str) -> np.ndarray:
+        if attr_ not in self.defaults:
+            raise ValueError(f"Unsupported attribute for this style. {attr_}")
+
+        default = self.defaults[attr_]
+        if isinstance(default, bool):
+            dtype = "bool"
+        elif isinstance(default, (int, float)):
+            dtype = "float64"
+        else:
+            dtype = "object"
+
+        array = np.full(self.length, default, dtype=dtype)
+        for index, value in self.overrides[attr_].items():
+            array[index] = value
+
+        return array
 
 
 class Base(abc.ABC):
@@ -20,6 +75,29 @@ class Base(abc.ABC):
 
         return attr_out
 
+    def compile(self, others: list, scale: bool = True) -> StyleTable:
+        """
+        Resolve every attribute for all 'others' at once (others[i] is element i).
+
+        Same result as calling `get_attr` for each element and attribute, but the scaling and lookups are done once.
+        """
+        scaling = self.parent._scaling if scale and self.scale else 1
+
+        defaults = {}
+        for attr_, value in vars(self).items():
+            if attr_ == "parent" or value is None:
+                continue
+            defaults[attr_] = value / scaling if attr_ in self.scale else value
+
+        overrides = {attr_: {} for attr_ in defaults}
+        for i, other in enumerate(others):
+            for attr_, value in vars(other).items():
+                if value is None or attr_ not in defaults:
+                    continue
+                overrides[attr_][i] = value / scaling if attr_ in self.scale else value
+
+        return StyleTable(defaults, overrides, len(others))
+
 
 class Font(Base):
     scale = ["size"]
@@ -5,6 +5,8 @@ from chemdraw import Molecule
 
 
 class ConfigLayout:
+    runtime_attrs = ("scaling", "_clear_x_ranges", "_clear_y_ranges")  # only set while drawing
+
     def __init__(self, parent):
         self.parent = parent
 
@@ -31,53 +33,51 @@ class ConfigLayout:
 
     @property
     def range_ratio(self) -> float:
-        return self.range_x.ptp() / self.range_y.ptp()
+        return np.ptp(self.range_x) / np.ptp(self.range_y)
 
     def get_scaling(self, molecule: Molecule, title: str):
         if self.range_x is None or self.range_y is None:
-            min_ = np.min(molecule.atom_coordinates, axis=0)
-            max_ = np.max(molecule.atom_coordinates, axis=0)
-
-            if self.parent.title.show and title is not None:
-                title_height = self.parent.title.text_box_size(title)
-                if self.parent.title.location == "top":
-                    max_ += title_height
-                else:
-                    min_ -= title_height
-
-            threshold = 5 - self.range_offset
-            if self.range_x is None:
-                self._clear_x_ranges = True
-                if max_[0] > threshold or np.abs(min_[0]) > threshold:
-                    value = np.max((np.abs(min_[0] - self.range_offset), max_[0] + self.range_offset))
-                    self.range_x = np.array((-value, value))
-                else:
-                    self.range_x = np.array([-5, 5], dtype="float64")
-            if self.range_y is None:
-                self._clear_y_ranges = True
-                if max_[1] > threshold or np.abs(min_[1]) > threshold:
-                    value = np.max((np.abs(min_[1] - self.range_offset), max_[1] + self.range_offset))
-                    self.range_y = np.array((-value, value))
-                else:
-                    self.range_y = np.array([-5, 5], dtype="float64")
-
-            if np.__version__[0] < '2':
-                if self.fixed_domain and self.range_y.ptp() != self.range_x.ptp():
-                    if self.range_x.ptp() > self.range_y.ptp():
-                        self.range_y = self.range_x / self.domain_ratio
-                    else:
-                        self.range_x = self.range_y / self.domain_ratio
-
-                self.scaling = np.max((self.range_x.ptp(), self.range_y.ptp())) / 10
+            self._clear_x_ranges = self.range_x is None
+            self._clear_y_ranges = self.range_y is None
+            self.set_ranges(*self.get_bounds(molecule.atom_coordinates, title))
+
+    def get_bounds(self, coordinates: np.ndarray, title: str | None) -> tuple[np.ndarray, np.ndarray]:
+        """ min and max corner of the coordinates, with room for the title """
+        return self.add_title_bounds(np.min(coordinates, axis=0), np.max(coordinates, axis=0), title)
+
+    def add_title_bounds(self, min_: np.ndarray, max_: np.ndarray, title: str | None) \
+            -> tuple[np.ndarray, np.ndarray]:
+        if self.parent.title.show and title is not None:
+            title_height = self.parent.title.text_box_size(title)
+            if self.parent.title.location == "top":
+                max_ = max_ + title_height
+            else:
+                min_ = min_ - title_height
+        return min_, max_
+
+    def set_ranges(self, min_: np.ndarray, max_: np.ndarray):
+        """ Set the ranges that are None so the bounds fit (centered on 0), and the scaling. """
+        threshold = 5 - self.range_offset
+        if self.range_x is None:
+            if max_[0] > threshold or np.abs(min_[0]) > threshold:
+                value = np.max((np.abs(min_[0] - self.range_offset), max_[0] + self.range_offset))
+                self.range_x = np.array((-value, value))
+            else:
+                self.range_x = np.array([-5, 5], dtype="float64")
+        if self.range_y is None:
+            if max_[1] > threshold or np.abs(min_[1]) > threshold:
+                value = np.max((np.abs(min_[1] - self.range_offset), max_[1] + self.range_offset))
+                self.range_y = np.array((-value, value))
+            else:
+                self.range_y = np.array([-5, 5], dtype="float64")
+
+        if self.fixed_domain and np.ptp(self.range_y) != np.ptp(self.range_x):
+            if np.ptp(self.range_x) > np.ptp(self.range_y):
+                self.range_y = self.range_x / self.domain_ratio
             else:
-                # update to numpy 2 syntax
-                if self.fixed_domain and np.ptp(self.range_y) != np.ptp(self.range_x):
-                    if np.ptp(self.range_x) > np.ptp(self.range_y):
-                        self.range_y = self.range_x / self.domain_ratio
-                    else:
-                        self.range_x = self.range_y / self.domain_ratio
+                self.range_x = self.range_y / self.domain_ratio
 
-                self.scaling = np.max((np.ptp(self.range_x), np.ptp(self.range_y))) / 10
+        self.scaling = np.max((np.ptp(self.range_x), np.ptp(self.range_y))) / 10
 
     def apply_layout(self, fig: go.Figure, legend: bool = False) -> go.Figure:
         kwargs = {
@@ -124,3 +124,4 @@ class ConfigLayout:
         if self._clear_y_ranges:
             self.range_y = None
             self.scaling = 1
+        self._clear_x_ranges = self._clear_y_ranges = False
@@ -0,0 +1,61 @@
+"""
+Level of detail: at small pixel sizes (thumbnails, zoomed-out grids) details that can't be read are skipped or
+simplified, so they cost nothing to build or serialize. Opt-in (`auto = True`); grid cells have it on by default
+(`GridConfig.level_of_detail`).
+
+The measure is the pixels per bond: the median bond length times the pixels per coordinate unit of the layout (width
+over the x range, set with the scaling at the start of every draw).
+
+    pixels per bond < numbers_min_pixels           atom, bond and ring numbers are skipped
+    pixels per bond < hydrogen_counts_min_pixels   hydrogen counts left out of the atom labels ('NH2' -> 'NH')
+    pixels per bond < hashes_min_pixels            hashed wedge bonds drawn as plain (solid) bonds
+    pixels per bond < batch_min_pixels             bonds batched into one trace per style (as in webgl mode, but SVG)
+
+e.g. caffeine has ~100 pixels per bond at 600 px (full detail) and ~25 at 150 px (all of them apply).
+"""
+import numpy as np
+
+
+class ConfigLevelOfDetail:
+    runtime_attrs = ("pixels_per_bond",)  # only set while drawing
+
+    def __init__(self, parent):
+        self.parent = parent
+
+        self.auto = False  # True: apply the policy; False: always full detail
+        self.numbers_min_pixels = 50
+        self.hydrogen_counts_min_pixels = 30
+        self.hashes_min_pixels = 30
+        self.batch_min_pixels = 50
+
+        self.pixels_per_bond = None
+
+    def __repr__(self):
+        return f"auto: {self.auto}, pixels per bond: {self.pixels_per_bond}"
+
+    def set_pixels_per_bond(self, bond_length: float | None):
+        """ Call after the layout's ranges are set (`ConfigLayout.get_scaling`). """
+        if bond_length is None:
+            self.pixels_per_bond = None
+            return
+        layout = self.parent.layout
+        self.pixels_per_bond = float(bond_length * layout.width / np.ptp(layout.range_x))
+
+    @property
+    def show_numbers(self) -> bool:
+        return self._above(self.numbers_min_pixels)
+
+    @property
+    def show_hydrogen_counts(self) -> bool:
+        return self._above(self.hydrogen_counts_min_pixels)
+
+    @property
+    def show_hashes(self) -> bool:
+        return self._above(self.hashes_min_pixels)
+
+    @property
+    def batch_bonds(self) -> bool:
+        return not self._above(self.batch_min_pixels)
+
+    def _above(self, min_pixels: float) -> bool:
+        return not self.auto or self.pixels_per_bond is None or self.pixels_per_bond >= min_pixels
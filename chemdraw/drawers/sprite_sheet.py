@@ -0,0 +1,170 @@
+"""
+Sprite sheets: many depictions packed into a few large images (atlases) and a JSON index of every image's pixel
+rectangle, so a web page loads one file instead of thousands.
+
+    index = GridDrawer(smiles).draw_sprite_sheets("catalogue.png", layout="shelf")
+
+    catalogue_0.png, catalogue_1.png, ... and catalogue.json:
+    {"sheets": [{"file": "catalogue_0.png", "width": 4096, "height": 3600}, ...],
+     "sprites": [{"index": 0, "name": "ethanol", "sheet": 0, "x": 0, "y": 0, "width": 600, "height": 600}, ...]}
+
+Layouts:
+    'grid': cells the size of the largest image, filled row by row (sprite i is at a predictable place)
+    'shelf': images sorted by height and placed left to right in rows ("shelves"); less empty space when the sizes
+        differ
+A sheet is at most `max_size` pixels wide and high; the images that don't fit go on the next sheet.
+"""
+import io
+import json
+import math
+import os
+from typing import BinaryIO
+
+import numpy as np
+
+from chemdraw.utils.sinks import Sink
+
+LAYOUTS = ("grid", "shelf")
+FORMATS = {".png": "PNG", ".webp": "WEBP"}
+
+
+def pack_sprites(sizes: np.ndarray, layout: str = "grid", max_size: int = 4096, padding: int = 0) \
+        -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parameters
+    ----------
+    sizes: np.ndarray[:, 2]
+        width, height of every image [px]
+    layout: str
+        'grid' or 'shelf'
+    max_size: int
+        max. width and height of a sheet [px]
+    padding: int
+        space between images [px]
+
+    Returns
+    -------
+    placements: np.ndarray[:, 3]
+        sheet, x, y of every image (x, y: top left corner)
+    sheet_sizes: np.ndarray[:, 2]
+        width, height of every sheet
+
+    """
+    sizes = np.asarray(sizes, dtype=np.int64).reshape(-1, 2)
+    if len(sizes) == 0:
+        return np.zeros((0, 3), dtype=np.int64), np.zeros((0, 2), dtype=np.int64)
+    if np.any(sizes > max_size):
+        raise ValueError(f"Image larger than 'max_size' ({max_size} px): {sizes.max(axis=0).tolist()}")
+
+    if layout == "grid":
+        placements = _pack_grid(sizes, max_size, padding)
+    elif layout == "shelf":
+        placements = _pack_shelf(sizes, max_size, padding)
+    else:
+        raise ValueError(f"Invalid layout: '{layout}' (options: {LAYOUTS})")
+
+    number_sheets = placements[:, 0].max() + 1
+    sheet_sizes = np.zeros((number_sheets, 2), dtype=np.int64)
+    np.maximum.at(sheet_sizes, placements[:, 0], placements[:, 1:] + sizes)
+    return placements, sheet_sizes
+
+
+def _pack_grid(sizes: np.ndarray, max_size: int, padding: int) -> np.ndarray:
+    cell_width, cell_height = sizes.max(axis=0) + padding
+    columns = max(1, (max_size + padding) // cell_width)
+    rows = max(1, (max_size + padding) // cell_height)
+    columns = min(columns, math.ceil(math.sqrt(len(sizes))))  # close to square for few images
+    sheet, position = np.divmod(np.arange(len(sizes)), columns * rows)
+    row, column = np.divmod(position, columns)
+    return np.column_stack((sheet, column * cell_width, row * cell_height))
+
+
+def _pack_shelf(sizes: np.ndarray, max_size: int, padding: int) -> np.ndarray:
+    placements = np.zeros((len(sizes), 3), dtype=np.int64)
+    sheet = x = y = shelf_height = 0
+    for i in np.argsort(-sizes[:, 1], kind="stable"):
+        width, height = sizes[i]
+        if x > 0 and x + width > max_size:  # next shelf
+            x = 0
+            y += shelf_height + padding
+            shelf_height = 0
+        if y > 0 and y + height > max_size:  # next sheet
+            sheet += 1
+            x = y = shelf_height = 0
+        placements[i] = sheet, x, y
+        x += width + padding
+        shelf_height = max(shelf_height, height)
+
+    return placements
+
+
+def draw_sprite_sheets(imgs: list[bytes | str | BinaryIO],
+                       file_name: str = "sprites.png",
+                       names: list[str | None] = None,
+                       layout: str = "grid",
+                       max_size: int = 4096,
+                       padding: int = 0,
+                       sink: Sink = None
+                       ) -> dict:
+    """
+    Pack images into sprite sheets and write them with a JSON index.
+
+    Parameters
+    ----------
+    imgs: list[bytes | str | BinaryIO]
+        image data, file names or file objects
+    file_name: str
+        '<name>.png' or '<name>.webp'; sheets are written as '<name>_<i>.<ext>', the index as '<name>.json'
+    names: list[str | None]
+        one per image (stored in the index)
+    layout: str
+        'grid' or 'shelf' (see module docstring)
+    max_size: int
+        max. width and height of a sheet [px]
+    padding: int
+        space between images [px]
+    sink: Sink
+        write into the sink (see chemdraw.utils.sinks) instead of next to `file_name`
+
+    Returns
+    -------
+    index: dict
+        the JSON index
+
+    """
+    from PIL import Image
+    stem, extension = os.path.splitext(file_name)
+    if extension.lower() not in FORMATS:
+        raise ValueError(f"Invalid sprite sheet format: '{extension}' (options: {list(FORMATS)})")
+    if names is not None and len(names) != len(imgs):
+        raise ValueError("'names' must be the same length as 'imgs'.")
+
+    imgs = [Image.open(io.BytesIO(img) if isinstance(img, bytes) else img) for img in imgs]
+    sizes = np.array([img.size for img in imgs], dtype=np.int64).reshape(-1, 2)
+    placements, sheet_sizes = pack_sprites(sizes, layout, max_size, padding)
+
+    sheets = [Image.new("RGBA", (int(width), int(height)), (0, 0, 0, 0)) for width, height in sheet_sizes]
+    for img, (sheet, x, y) in zip(imgs, placements):
+        sheets[sheet].paste(img.convert("RGBA"), (int(x), int(y)))
+
+    index = {"sheets": [], "sprites": []}
+    for i, sheet in enumerate(sheets):
+        sheet_name = f"{stem}_{i}{extension}"
+        data = io.BytesIO()
+        sheet.save(data, format=FORMATS[extension.lower()], lossless=True)  # lossless: webp only
+        _write(sheet_name, data.getvalue(), sink)
+        index["sheets"].append({"file": os.path.basename(sheet_name), "width": sheet.width, "height": sheet.height})
+    for i, ((sheet, x, y), (width, height)) in enumerate(zip(placements.tolist(), sizes.tolist())):
+        index["sprites"].append({"index": i, "name": names[i] if names is not None else None, "sheet": sheet,
+                                 "x": x, "y": y, "width": width, "height": height})
+
+    _write(stem + ".json", json.dumps(index, indent=1).encode("utf-8"), sink)
+    return index
+
+
+def _write(file_name: str, data: bytes, sink: Sink | None):
+    if sink is not None:
+        sink.write(os.path.basename(file_name), data)
+    else:
+        with open(file_name, "wb") as file:
+            file.write(data)
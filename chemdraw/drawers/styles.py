@@ -0,0 +1,48 @@
+from chemdraw.drawers.general_classes import StyleTable
+
+
+class ResolvedStyles:
+    """
+    Style tables for one draw.
+
+    Each group merges a config format (e.g. `config.bonds.line_format`) with the matching format on every element
+    (e.g. `bond.line_format`). Groups are compiled the first time a drawer asks for them, so they use the scaling of
+    the current draw.
+    """
+    # key: (config attribute, format attribute, molecule attribute, element attribute, scale)
+    groups = {
+        "atoms.font": ("atoms", "font", "atoms", "font", True),
+        "bonds.line_format": ("bonds", "line_format", "bonds", "line_format", True),
+        "highlights.atoms": ("highlights", "atoms", "atoms", "highlight", False),
+        "highlights.bonds": ("highlights", "bonds", "bonds", "highlight", False),
+        "ring_highlights.ring": ("ring_highlights", "ring", "rings", "highlight", True),
+        "parenthesis.line_format": ("parenthesis", "line_format", "parenthesis", "line_format", True),
+        "parenthesis.sub_script_font": ("parenthesis", "sub_script_font", "parenthesis", "sub_script_font", True),
+        "parenthesis.super_script_font": ("parenthesis", "super_script_font", "parenthesis", "super_script_font",
+                                          True),
+    }
+
+    def __init__(self, config, molecule):
+        self.config = config
+        self.molecule = molecule
+        self._tables: dict[str, StyleTable] = {}
+
+    def __repr__(self) -> str:
+        return f"compiled: {list(self._tables)}"
+
+    def __getitem__(self, key: str) -> StyleTable:
+        if key not in self._tables:
+            self._tables[key] = self._compile(key)
+        return self._tables[key]
+
+    def _compile(self, key: str) -> StyleTable:
+        if key not in self.groups:
+            raise KeyError(f"Invalid style group. {key}")
+
+        config_attr, format_attr, molecule_attr, element_attr, scale = self.groups[key]
+        config_format = getattr(getattr(self.config, config_attr), format_attr)
+        elements = getattr(self.molecule, molecule_attr)
+        if elements is None:
+            elements = []
+
+        return config_format.compile([getattr(element, element_attr) for element in elements], scale=scale)
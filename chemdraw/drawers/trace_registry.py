@@ -0,0 +1,135 @@
+from typing import Any
+
+import plotly.graph_objs as go
+
+
+class TraceRegistryEntry:
+    def __init__(self, key: str, signature: Any, trace_start: int, trace_stop: int,
+                 annotation_start: int, annotation_stop: int):
+        self.key = key
+        self.signature = signature
+        self.trace_start = trace_start
+        self.trace_stop = trace_stop
+        self.annotation_start = annotation_start
+        self.annotation_stop = annotation_stop
+
+    def __repr__(self) -> str:
+        return f"{self.key}: traces [{self.trace_start}, {self.trace_stop}), " \
+               f"annotations [{self.annotation_start}, {self.annotation_stop})"
+
+    @property
+    def number_traces(self) -> int:
+        return self.trace_stop - self.trace_start
+
+    @property
+    def number_annotations(self) -> int:
+        return self.annotation_stop - self.annotation_start
+
+    def shift(self, traces: int, annotations: int):
+        self.trace_start += traces
+        self.trace_stop += traces
+        self.annotation_start += annotations
+        self.annotation_stop += annotations
+
+
+class TraceRegistry:
+    """
+    Records which traces and annotations of a figure each drawer stage made, and the inputs (signature) it was
+    drawn with. A stage can then be re-drawn in place without touching the rest of the figure.
+    """
+
+    def __init__(self, figure: go.Figure, layout_signature: Any):
+        self.figure = figure
+        self.layout_signature = layout_signature
+        self.entries: dict[str, TraceRegistryEntry] = {}
+
+    def __repr__(self) -> str:
+        return f"stages: {list(self.entries)}"
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    @property
+    def keys(self) -> list[str]:
+        return list(self.entries)
+
+    def add(self, key: str, signature: Any, trace_start: int, annotation_start: int):
+        """ Register the traces/annotations added to the figure since 'trace_start'/'annotation_start'. """
+        self.entries[key] = TraceRegistryEntry(key, signature, trace_start, len(self.figure.data),
+                                               annotation_start, len(self.figure.layout.annotations))
+
+    def replace(self, key: str, signature: Any, traces: tuple, annotations: tuple):
+        """ Swap the traces/annotations of one stage for new ones, keeping their position in the figure. """
+        entry = self.entries[key]
+        self._replace_traces(entry, traces)
+        self._replace_annotations(entry, annotations)
+        entry.signature = signature
+
+    def remove_all(self):
+        """ Remove every registered trace and annotation from the figure. """
+        if not self.entries:
+            return
+
+        entries = list(self.entries.values())
+        trace_start, trace_stop = entries[0].trace_start, entries[-1].trace_stop
+        annotation_start, annotation_stop = entries[0].annotation_start, entries[-1].annotation_stop
+
+        fig = self.figure
+        fig.data = fig.data[:trace_start] + fig.data[trace_stop:]
+        annotations = fig.layout.annotations
+        fig.layout.annotations = annotations[:annotation_start] + annotations[annotation_stop:]
+        self.entries = {}
+
+    def _shift_after(self, entry: TraceRegistryEntry, traces: int, annotations: int):
+        after = False
+        for entry_ in self.entries.values():
+            if after:
+                entry_.shift(traces, annotations)
+            elif entry_ is entry:
+                after = True
+
+    def _replace_traces(self, entry: TraceRegistryEntry, traces: tuple):
+        fig = self.figure
+        old = fig.data[entry.trace_start:entry.trace_stop]
+        if _same_structure(old, traces):
+            # only properties change -> update in place
+            with fig.batch_update():
+                for old_trace, new_trace in zip(old, traces):
+                    old_trace.update(new_trace.to_plotly_json(), overwrite=True)
+            return
+
+        # number or type of traces changed -> splice (plotly only allows removing or re-ordering existing traces)
+        kept = fig.data[:entry.trace_start] + fig.data[entry.trace_stop:]
+        fig.data = kept
+        fig.add_traces(list(traces))
+        added = fig.data[len(kept):]
+        fig.data = kept[:entry.trace_start] + added + kept[entry.trace_start:]
+
+        delta = len(traces) - entry.number_traces
+        entry.trace_stop += delta
+        self._shift_after(entry, delta, 0)
+
+    def _replace_annotations(self, entry: TraceRegistryEntry, annotations: tuple):
+        if entry.number_annotations == 0 and not annotations:
+            return
+
+        fig = self.figure
+        old = fig.layout.annotations
+        fig.layout.annotations = old[:entry.annotation_start] + tuple(annotations) + old[entry.annotation_stop:]
+
+        delta = len(annotations) - entry.number_annotations
+        entry.annotation_stop += delta
+        self._shift_after(entry, 0, delta)
+
+
+def _same_structure(old: tuple, new: tuple) -> bool:
+    if len(old) != len(new):
+        return False
+
+    for old_trace, new_trace in zip(old, new):
+        if type(old_trace) is not type(new_trace):
+            return False
+        if old_trace.to_plotly_json().keys() != new_trace.to_plotly_json().keys():
+            return False
+
+    return True
@@ -0,0 +1,60 @@
+"""
+WebGL mode for very large molecules (`Config.webgl = True`): bonds and brackets are drawn as go.Scattergl traces,
+batched into one trace per style (segments separated by nan rows), so pan and zoom stay interactive with ~10^5 bond
+segments.
+
+Text (atom labels with html, numbers, sub/superscripts, title) stays on go.Scatter. Plotly draws the WebGL canvas
+above all SVG traces, so highlights stay SVG too (they would hide the atom labels), batched the same way.
+"""
+import numpy as np
+import plotly.graph_objs as go
+
+
+def get_scatter(config) -> type[go.Scatter] | type[go.Scattergl]:
+    """ trace type of a stage's line and marker layers; `config`: the stage config (its parent is the Config) """
+    return go.Scattergl if config.parent.webgl else go.Scatter
+
+
+def get_scatter_kwargs(config) -> dict:
+    """ the stage's scatter_kwargs, without the ones Scattergl doesn't have """
+    if not config.parent.webgl:
+        return config.scatter_kwargs
+    return {key: value for key, value in config.scatter_kwargs.items() if key != "cliponaxis"}
+
+
+class LineBatch:
+    """ Lines and filled polygons collected by style; `add_to_fig` adds one trace per style. """
+
+    def __init__(self):
+        self.lines: dict[tuple, list[np.ndarray]] = {}  # (color, width): xy arrays
+        self.fills: dict[str, list[np.ndarray]] = {}  # color: xy arrays
+
+    def __repr__(self) -> str:
+        return f"# line styles: {len(self.lines)}, # fill colors: {len(self.fills)}"
+
+    def add_line(self, x, y, color: str, width: float):
+        self.lines.setdefault((color, width), []).append(_with_gap(x, y))
+
+    def add_fill(self, x, y, color: str):
+        self.fills.setdefault(color, []).append(_with_gap(x, y))
+
+    def add_to_fig(self, fig: go.Figure, scatter: type[go.Scatter] | type[go.Scattergl], scatter_kwargs: dict) \
+            -> go.Figure:
+        for color, xy in self.fills.items():
+            xy = np.concatenate(xy)[:-1]
+            fig.add_trace(scatter(x=xy[:, 0], y=xy[:, 1], mode="lines", fill="toself", fillcolor=color,
+                                  line=dict(color=color), **scatter_kwargs))
+        for (color, width), xy in self.lines.items():
+            xy = np.concatenate(xy)[:-1]
+            fig.add_trace(scatter(x=xy[:, 0], y=xy[:, 1], mode="lines", line=dict(color=color, width=width),
+                                  **scatter_kwargs))
+        return fig
+
+
+def _with_gap(x, y) -> np.ndarray:
+    """ (n + 1, 2) points and a nan row (gap before the next line) """
+    xy = np.empty((len(x) + 1, 2), dtype="float64")
+    xy[:-1, 0] = x
+    xy[:-1, 1] = y
+    xy[-1] = np.nan
+    return xy
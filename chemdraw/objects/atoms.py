@@ -1,7 +1,6 @@
 
 import numpy as np
 
-import chemdraw.utils.vector_math as vector_math
 from chemdraw.drawers.general_classes import Font, Highlight
 
 ATOM_VALENCY = {
@@ -29,10 +28,7 @@ class Atom:
 
         self.number_hydrogens = ATOM_VALENCY[self.symbol]
         self.bonds = []
-        self.rings = []
-
-        self._vector = None
-        self._number_of_bonds = None
+        self._rings = []  # filled when the molecule builds its rings
 
         # drawing stuff
         self._show = None
@@ -59,52 +55,20 @@ class Atom:
     @coordinates.setter
     def coordinates(self, coordinates: np.ndarray):
         self.parent.atom_coordinates[self.id_, :] = coordinates
+        self.parent.coordinate_version += 1
 
     @property
     def vector(self) -> np.ndarray:
-        if self._vector is None:
-            vector = np.zeros(2, dtype="float64")
-            if len(self.bonds) == 1:
-                self._vector = -1 * vector_math.normalize(self.bonds[0].center - self.coordinates)
-
-            elif len(self.bonds) == 2:
-                for bond in self.bonds:
-                    vector += vector_math.normalize(bond.center - self.coordinates)
-                self._vector = -1 * vector
-
-            elif len(self.bonds) == 3:
-                for bond in self.bonds:
-                    from chemdraw.objects.bonds import BondType
-                    if bond.type_ == BondType.double:
-                        self._vector = -1 * (bond.center - self.coordinates)
-                        break
-                else:
-                    for bond in self.bonds:
-                        vector += vector_math.normalize(bond.center - self.parent.coordinates)
-                        self._vector = vector_math.normalize(vector)
-
-            else:
-                # dots = {}
-                # for bond in self.bonds:
-                #     for bond_ in self.bonds:
-                #         dots[f"{np.max([bond.id_, bond_.id_])}_{np.min([bond.id_, bond_.id_])}"] = \
-                #         np.dot(bond.center-self.position, bond_.center-self.position)
-                #
-                # keys = []
-                # values = []
-                # for k, v in dots.items():
-                #     keys.append(k)
-                #     values.append(v)
-                self._vector = (1, 0)
-
-        return self._vector
+        return self.parent.geometry.atom_vectors[self.id_]
 
     @property
     def number_of_bonds(self) -> int:
-        if self._number_of_bonds is None:
-            self._number_of_bonds = np.sum([bond.type_.value for bond in self.bonds])
+        return self.parent.geometry.atom_number_of_bonds[self.id_]
 
-        return self._number_of_bonds
+    @property
+    def rings(self) -> list:
+        self.parent.rings  # builds the rings on first access
+        return self._rings
 
     @property
     def in_ring(self) -> bool:
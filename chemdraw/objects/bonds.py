@@ -37,14 +37,9 @@ class Bond:
         self.parent = parent
 
         self.atoms = []
-        self.rings = []
+        self._rings = []  # filled when the molecule builds its rings
 
-        self._x = None  # [x0, x1]
-        self._y = None  # [y0, y1]
-        self._vector = None
-        self._perpendicular = None
-        self._alignment = None
-        self._center = None
+        self._alignment = None  # set by user; otherwise taken from Molecule.geometry
 
         # drawing stuff
         self._show = None
@@ -92,10 +87,13 @@ class Bond:
     @property
     def alignment(self) -> BondAlignment:
         """ 0: center, 1: with perpendicular, 2: opposite of perpendicular"""
-        if self._alignment is None:
-            self._alignment = self._get_alignment()
+        if self._alignment is not None:
+            return self._alignment
 
-        return self._alignment
+        alignment = self.parent.geometry.bond_alignments[self.id_]
+        if alignment == self.parent.geometry.UNDECIDED:
+            return None
+        return BondAlignment(alignment)
 
     @alignment.setter
     def alignment(self, value: int | str):
@@ -110,6 +108,11 @@ class Bond:
 
         raise ValueError("Invalid BondAlignment")
 
+    @property
+    def rings(self) -> list:
+        self.parent.rings  # builds the rings on first access
+        return self._rings
+
     @property
     def in_ring(self) -> bool:
         return bool(self.rings)
@@ -140,45 +143,6 @@ class Bond:
 
         return x, y
 
-    def _get_alignment(self) -> BondAlignment:
-        # only look at double bonds
-        if self.type_ != BondType.double:
-            return BondAlignment.center
-
-        if self.in_ring:
-            ring_ = self.rings[0]
-            for ring in self.rings:
-                if ring.aromatic:
-                    ring_ = ring
-                    break
-
-            bond_ring_vector = ring_.center - self.center
-            return alignment_decision(self.perpendicular, bond_ring_vector)
-
-        # general
-        if self.atoms[0].number_of_bonds == 2 and self.atoms[1].number_of_bonds == 2:
-            return BondAlignment.center
-        elif self.atoms[0].number_of_bonds == 3 and self.atoms[1].number_of_bonds == 2:
-            return alignment_decision(self.perpendicular, self.atoms[0].vector)
-        elif self.atoms[0].number_of_bonds == 2 and self.atoms[1].number_of_bonds == 3:
-            return alignment_decision(self.perpendicular, self.atoms[1].vector)
-        elif self.atoms[0].number_of_bonds == 3 and self.atoms[1].number_of_bonds == 3:
-            return alignment_decision(self.perpendicular, self.atoms[1].vector)
-            # non-ring
-            # ring
-        elif self.atoms[0].number_of_bonds == 4 and self.atoms[1].number_of_bonds == 2:
-            return BondAlignment.center
-        elif self.atoms[0].number_of_bonds == 2 and self.atoms[1].number_of_bonds == 4:
-            return BondAlignment.center
-        elif self.atoms[0].number_of_bonds == 4 and self.atoms[1].number_of_bonds == 4:
-            return BondAlignment.center
-            # non-ring
-            # ring
-        elif self.atoms[0].number_of_bonds == 4 and self.atoms[1].number_of_bonds == 3:
-            return alignment_decision(self.perpendicular, self.atoms[1].vector)
-        elif self.atoms[0].number_of_bonds == 3 and self.atoms[1].number_of_bonds == 4:
-            return alignment_decision(self.perpendicular, self.atoms[0].vector)
-
     def get_bond_number_position(self, alignment: str, offset: float) -> tuple[float, float]:
         if alignment == "left":
             return self.center[0] + offset, self.center[1]
@@ -0,0 +1,276 @@
+import numpy as np
+
+from chemdraw.objects.bonds import BondType, BondAlignment
+import chemdraw.utils.vector_math as vector_math
+from chemdraw.utils.graph_traversal import Adjacency
+
+
+class MoleculeGeometry:
+    """
+    Geometry derived from the atom coordinates, computed for all atoms/bonds at once.
+
+    The tables are rebuilt lazily (on the next access) whenever `Molecule.coordinate_version` changes, so rotating or
+    moving a molecule never leaves stale atom vectors or bond alignments behind.
+    """
+    UNDECIDED = -1  # bond alignment code for double bonds with no rule
+
+    def __init__(self, molecule):
+        self.molecule = molecule
+        self.version = None
+
+        self._atom_vectors = None
+        self._atom_number_of_bonds = None
+        self._atom_degrees = None
+        self._adjacency = None
+        self._bond_alignments = None
+        self._bond_length = None
+
+    def __repr__(self) -> str:
+        return f"version: {self.version}"
+
+    @property
+    def atom_vectors(self) -> np.ndarray:
+        """ (number_atoms, 2) direction pointing away from the bonds of each atom """
+        self._check_version()
+        if self._atom_vectors is None:
+            molecule = self.molecule
+            self._atom_vectors = get_atom_vectors(molecule.atom_coordinates, molecule.bond_atom_ids,
+                                                  molecule.bond_types, molecule.coordinates)
+        return self._atom_vectors
+
+    @property
+    def atom_number_of_bonds(self) -> np.ndarray:
+        """ (number_atoms,) sum of bond orders of each atom (topology only; not tied to the version) """
+        if self._atom_number_of_bonds is None:
+            molecule = self.molecule
+            self._atom_number_of_bonds = get_atom_number_of_bonds(molecule.number_atoms, molecule.bond_atom_ids,
+                                                                  molecule.bond_types)
+        return self._atom_number_of_bonds
+
+    @property
+    def atom_degrees(self) -> np.ndarray:
+        """ (number_atoms,) number of bonds on each atom (topology only; not tied to the version) """
+        if self._atom_degrees is None:
+            molecule = self.molecule
+            self._atom_degrees = np.bincount(molecule.bond_atom_ids.ravel(), minlength=molecule.number_atoms)
+        return self._atom_degrees
+
+    @property
+    def adjacency(self) -> Adjacency:
+        """ neighbors of each atom as CSR arrays (see chemdraw.utils.graph_traversal; topology only) """
+        if self._adjacency is None:
+            self._adjacency = Adjacency.from_bonds(self.molecule.bond_atom_ids, self.molecule.number_atoms)
+        return self._adjacency
+
+    @property
+    def bond_length(self) -> float | None:
+        """ median bond length (None: no bonds) """
+        self._check_version()
+        if self._bond_length is None:
+            molecule = self.molecule
+            if len(molecule.bond_atom_ids) == 0:
+                return None
+            coordinates = molecule.atom_coordinates
+            bond_atom_ids = molecule.bond_atom_ids
+            self._bond_length = float(np.median(
+                np.linalg.norm(coordinates[bond_atom_ids[:, 0]] - coordinates[bond_atom_ids[:, 1]], axis=1)))
+        return self._bond_length
+
+    @property
+    def bond_alignments(self) -> np.ndarray:
+        """ (number_bonds,) BondAlignment value of each bond (UNDECIDED = -1) """
+        self._check_version()
+        if self._bond_alignments is None:
+            molecule = self.molecule
+            if np.any(molecule.bond_types == BondType.double.value):
+                rings = get_ring_arrays(molecule)
+            else:
+                rings = None  # only double bonds need ring data
+            self._bond_alignments = get_bond_alignments(molecule.atom_coordinates, molecule.bond_atom_ids,
+                                                        molecule.bond_types, self.atom_number_of_bonds,
+                                                        self.atom_vectors, rings)
+        return self._bond_alignments
+
+    def _check_version(self):
+        if self.version != self.molecule.coordinate_version:
+            self._atom_vectors = None
+            self._bond_alignments = None
+            self._bond_length = None
+            self.version = self.molecule.coordinate_version
+
+
+def _atom_bond_pairs(bond_atom_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """ One row per (atom, bond) pair: the two ends of every bond. """
+    atom_index = bond_atom_ids.ravel()
+    bond_index = np.repeat(np.arange(len(bond_atom_ids)), 2)
+    return atom_index, bond_index
+
+
+def _sum_rows(index: np.ndarray, values: np.ndarray, length: int) -> np.ndarray:
+    out = np.empty((length, 2), dtype="float64")
+    out[:, 0] = np.bincount(index, weights=values[:, 0], minlength=length)
+    out[:, 1] = np.bincount(index, weights=values[:, 1], minlength=length)
+    return out
+
+
+def get_atom_number_of_bonds(number_atoms: int, bond_atom_ids: np.ndarray, bond_types: np.ndarray) -> np.ndarray:
+    atom_index, bond_index = _atom_bond_pairs(bond_atom_ids)
+    return np.bincount(atom_index, weights=bond_types[bond_index], minlength=number_atoms).astype("int64")
+
+
+def get_atom_vectors(atom_coordinates: np.ndarray, bond_atom_ids: np.ndarray, bond_types: np.ndarray,
+                     center: np.ndarray) -> np.ndarray:
+    """
+    Direction pointing away from the bonds of each atom (used to place hydrogens, numbers and double bonds).
+
+    * 1 or 2 bonds: opposite of the sum of the unit vectors to the bond centers
+    * 3 bonds: away from the first double bond; if none, the normalized sum of the directions from the molecule
+      center to the bond centers
+    * otherwise: [1, 0]
+    """
+    number_atoms = len(atom_coordinates)
+    vectors = np.zeros((number_atoms, 2), dtype="float64")
+    vectors[:, 0] = 1
+    if len(bond_atom_ids) == 0:
+        return vectors
+
+    atom_index, bond_index = _atom_bond_pairs(bond_atom_ids)
+    degree = np.bincount(atom_index, minlength=number_atoms)
+    bond_centers = np.mean(atom_coordinates[bond_atom_ids], axis=1)
+
+    # 1 or 2 bonds
+    to_bond_center = vector_math.normalize_rows(bond_centers[bond_index] - atom_coordinates[atom_index])
+    summed = _sum_rows(atom_index, to_bond_center, number_atoms)
+    mask = (degree == 1) | (degree == 2)
+    vectors[mask] = -summed[mask]
+
+    # 3 bonds with a double bond (bonds are stored in id order, so the first is the smallest id)
+    double = bond_types[bond_index] == 2
+    first_double = np.full(number_atoms, len(bond_atom_ids))
+    np.minimum.at(first_double, atom_index[double], bond_index[double])
+    has_double = first_double < len(bond_atom_ids)
+    mask = (degree == 3) & has_double
+    vectors[mask] = -(bond_centers[first_double[mask]] - atom_coordinates[mask])
+
+    # 3 bonds without a double bond
+    mask = (degree == 3) & ~has_double
+    if np.any(mask):
+        from_center = vector_math.normalize_rows(bond_centers[bond_index] - np.asarray(center, dtype="float64"))
+        summed = _sum_rows(atom_index, from_center, number_atoms)
+        vectors[mask] = vector_math.normalize_rows(summed[mask])
+
+    return vectors
+
+
+def get_ring_arrays(molecule) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ring data as arrays.
+
+    Returns
+    -------
+    ring_centers: np.ndarray
+        (number_rings, 2)
+    ring_aromatic: np.ndarray
+        (number_rings,) bool
+    ring_index: np.ndarray
+        ring of each (ring, bond) pair
+    ring_bond_index: np.ndarray
+        bond of each (ring, bond) pair
+
+    """
+    rings = molecule.rings
+    number_rings = len(rings)
+    if number_rings == 0:
+        empty = np.empty(0, dtype="int64")
+        return np.empty((0, 2), dtype="float64"), np.empty(0, dtype="bool"), empty, empty
+
+    ring_sizes = np.array([len(ring.atom_ids) for ring in rings])
+    ring_atom_ids = np.concatenate([np.asarray(ring.atom_ids, dtype="int64") for ring in rings])
+    ring_atom_ring = np.repeat(np.arange(number_rings), ring_sizes)
+    ring_centers = _sum_rows(ring_atom_ring, molecule.atom_coordinates[ring_atom_ids], number_rings)
+    ring_centers /= ring_sizes[:, np.newaxis]
+
+    ring_aromatic = np.array([bool(ring.aromatic) for ring in rings])
+    ring_bond_index = np.array([bond.id_ for ring in rings for bond in ring.bonds], dtype="int64")
+    ring_index = np.repeat(np.arange(number_rings), [len(ring.bonds) for ring in rings])
+
+    return ring_centers, ring_aromatic, ring_index, ring_bond_index
+
+
+# (number of bonds of atom 0, number of bonds of atom 1) -> which atom vector decides the side of the double bond
+_ALIGN_WITH_ATOM_0 = ((3, 2), (3, 4))
+_ALIGN_WITH_ATOM_1 = ((2, 3), (3, 3), (4, 3))
+_ALIGN_CENTER = ((2, 2), (4, 2), (2, 4), (4, 4))
+
+
+def _pair_mask(number_bonds_0: np.ndarray, number_bonds_1: np.ndarray, pairs: tuple) -> np.ndarray:
+    mask = np.zeros(len(number_bonds_0), dtype="bool")
+    for value_0, value_1 in pairs:
+        mask |= (number_bonds_0 == value_0) & (number_bonds_1 == value_1)
+    return mask
+
+
+def _first_ring(rows: np.ndarray, ring_index: np.ndarray, length: int, number_rings: int) -> np.ndarray:
+    first = np.full(length, number_rings)
+    np.minimum.at(first, rows, ring_index)
+    return first
+
+
+def get_bond_alignments(atom_coordinates: np.ndarray, bond_atom_ids: np.ndarray, bond_types: np.ndarray,
+                        atom_number_of_bonds: np.ndarray, atom_vectors: np.ndarray,
+                        rings: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray] | None) -> np.ndarray:
+    """
+    Side of the second line of every double bond (BondAlignment values; MoleculeGeometry.UNDECIDED if no rule).
+
+    * ring bonds: towards the center of the first aromatic ring of the bond (else its first ring)
+    * other bonds: towards the vector of the atom with 3 bonds, or centered (see _ALIGN_* for the rules)
+    """
+    alignments = np.full(len(bond_atom_ids), BondAlignment.center.value, dtype="int8")
+    double = np.flatnonzero(bond_types == BondType.double.value)
+    if len(double) == 0:
+        return alignments
+
+    ids = bond_atom_ids[double]
+    start, end = atom_coordinates[ids[:, 0]], atom_coordinates[ids[:, 1]]
+    vector = vector_math.normalize_rows(end - start)
+    perpendicular = np.column_stack((-vector[:, 1], vector[:, 0]))
+    centers = (start + end) / 2
+
+    # general rules
+    number_bonds_0 = atom_number_of_bonds[ids[:, 0]]
+    number_bonds_1 = atom_number_of_bonds[ids[:, 1]]
+    with_atom_0 = _pair_mask(number_bonds_0, number_bonds_1, _ALIGN_WITH_ATOM_0)
+    with_atom_1 = _pair_mask(number_bonds_0, number_bonds_1, _ALIGN_WITH_ATOM_1)
+    centered = _pair_mask(number_bonds_0, number_bonds_1, _ALIGN_CENTER)
+
+    direction = np.zeros((len(double), 2), dtype="float64")
+    direction[with_atom_0] = atom_vectors[ids[with_atom_0, 0]]
+    direction[with_atom_1] = atom_vectors[ids[with_atom_1, 1]]
+    decided = with_atom_0 | with_atom_1
+
+    # ring rule (overrides the general rules)
+    if rings is not None and len(rings[0]) != 0:
+        ring_centers, ring_aromatic, ring_index, ring_bond_index = rings
+        number_rings = len(ring_centers)
+        row_of_bond = np.full(len(bond_atom_ids), -1)
+        row_of_bond[double] = np.arange(len(double))
+        rows = row_of_bond[ring_bond_index]
+        keep = rows >= 0
+        rows, ring_index = rows[keep], ring_index[keep]
+
+        first_ring = _first_ring(rows, ring_index, len(double), number_rings)
+        aromatic = ring_aromatic[ring_index]
+        first_aromatic = _first_ring(rows[aromatic], ring_index[aromatic], len(double), number_rings)
+        in_ring = first_ring < number_rings
+        ring = np.where(first_aromatic < number_rings, first_aromatic, first_ring)[in_ring]
+
+        direction[in_ring] = ring_centers[ring] - centers[in_ring]
+        decided |= in_ring
+        centered &= ~in_ring
+
+    side = np.where(np.einsum("ij,ij->i", perpendicular, direction) >= 0,
+                    BondAlignment.perpendicular.value, BondAlignment.opposite.value)
+    alignments[double] = np.where(decided, side, np.where(centered, BondAlignment.center.value,
+                                                           MoleculeGeometry.UNDECIDED))
+
+    return alignments
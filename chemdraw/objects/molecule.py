@@ -1,9 +1,10 @@
+import functools
+import importlib.util
 import os
 from typing import Any
 
 import numpy as np
 from sklearn.decomposition import PCA
-from rdkit import Chem
 
 from chemdraw.data_types import PointType
 from chemdraw.errors import RDKitError
@@ -12,7 +13,11 @@ from chemdraw.objects.atoms import Atom
 from chemdraw.objects.bonds import Bond
 from chemdraw.objects.rings import Ring
 from chemdraw.objects.parenthesis import Parenthesis
+from chemdraw.objects.geometry import MoleculeGeometry
 import chemdraw.utils.vector_math as vector_math
+import chemdraw.utils.graph_algorithms as graph_algorithms
+import chemdraw.utils.graph_traversal as graph_traversal
+import chemdraw.utils.instrumentation as instrumentation
 
 
 def get_mole_file(smiles: str) -> tuple[str, Any]:
@@ -30,23 +35,130 @@ def get_mole_file(smiles: str) -> tuple[str, Any]:
         mole file
 
     """
+    from rdkit import Chem
     mol = Chem.MolFromSmiles(smiles)
     return Chem.MolToMolBlock(mol), mol
 
 
-def add_atoms_bonds_to_rings(rings: list[Ring], bonds: list[Bond]):
-    bond_set = [set(bond.atom_ids) for bond in bonds]
+@functools.cache
+def rdkit_available() -> bool:
+    return importlib.util.find_spec("rdkit") is not None
+
+
+def get_ring_aromaticity(rings: list[list[int]], atom_symbols: list[str], bond_atom_ids: np.ndarray,
+                         bond_types: np.ndarray) -> list[bool]:
+    """
+    Simple Hückel rule from the bond table (no RDKit): a ring is aromatic if all its bonds are aromatic (type 4), or
+    if every ring atom gives pi electrons and they add up to 4n + 2:
+    * double (or aromatic) bond to a ring atom: 1
+    * exocyclic double bond to N, O or S (e.g. pyridone): 0
+    * N, O, S, P or Se without double bond: 2 (lone pair)
+    any other atom (e.g. sp3 carbon) makes the ring non-aromatic
+    """
+    ring_atoms = {atom for ring in rings for atom in ring}
+    bond_type = {}
+    double = {}
+    for (atom1, atom2), type_ in zip(bond_atom_ids.tolist(), bond_types.tolist()):
+        bond_type[(atom1, atom2)] = bond_type[(atom2, atom1)] = type_
+        if type_ in (2, 4):
+            double.setdefault(atom1, []).append((atom2, type_))
+            double.setdefault(atom2, []).append((atom1, type_))
+
+    aromatic = []
+    for ring in rings:
+        if all(bond_type.get((ring[i - 1], ring[i])) == 4 for i in range(len(ring))):
+            aromatic.append(True)
+            continue
+
+        electrons = 0
+        for atom in ring:
+            partners = double.get(atom, [])
+            if any(type_ == 4 or partner in ring_atoms for partner, type_ in partners):
+                electrons += 1
+            elif partners and atom_symbols[atom] == "C" and \
+                    all(atom_symbols[partner] in ("N", "O", "S") for partner, _ in partners):
+                pass
+            elif not partners and atom_symbols[atom] in ("N", "O", "S", "P", "Se"):
+                electrons += 2
+            else:
+                electrons = None
+                break
+        aromatic.append(electrons is not None and electrons % 4 == 2)
+
+    return aromatic
+
+
+def add_atoms_bonds_to_rings(rings: list[Ring], bonds: list[Bond], bond_atom_ids: np.ndarray, number_atoms: int):
+    """
+    Ring membership by an indexed join: the atom pairs around every ring (rings are in ring order) are looked up in
+    the sorted bond keys (min atom id * number_atoms + max atom id).
+    """
+    if not rings:
+        return
+
+    bond_keys = np.min(bond_atom_ids, axis=1) * number_atoms + np.max(bond_atom_ids, axis=1)
+    order = np.argsort(bond_keys)
+    ring_atoms = np.concatenate([np.asarray(ring.atom_ids, dtype="int64") for ring in rings])
+    next_atoms = np.concatenate([np.roll(np.asarray(ring.atom_ids, dtype="int64"), -1) for ring in rings])
+    pair_keys = np.minimum(ring_atoms, next_atoms) * number_atoms + np.maximum(ring_atoms, next_atoms)
+    position = np.minimum(np.searchsorted(bond_keys[order], pair_keys), len(order) - 1)
+    if np.any(bond_keys[order][position] != pair_keys):
+        raise ValueError("Ring atoms are not in ring order.")
+    ring_bond_ids = order[position]
+    ring_index = np.repeat(np.arange(len(rings)), [len(ring.atom_ids) for ring in rings])
+
+    sort = np.lexsort((ring_bond_ids, ring_index))  # bonds of each ring by id
+    for ring_id, bond_id in zip(ring_index[sort].tolist(), ring_bond_ids[sort].tolist()):
+        ring, bond = rings[ring_id], bonds[bond_id]
+        ring.bonds.append(bond)
+        bond._rings.append(ring)
+        ring.add_atoms(bond.atoms)
     for ring in rings:
-        ring_atom_ids = set(ring.atom_ids)
-        for i, bond in enumerate(bond_set):
-            if bond.issubset(ring_atom_ids):
-                ring.bonds.append(bonds[i])
-                bonds[i].rings.append(ring)
-                ring.add_atoms(bonds[i].atoms)
-                bonds[i].atoms[0].rings.append(ring)
-                bonds[i].atoms[1].rings.append(ring)
+        for atom in ring.atoms:
+            atom._rings.append(ring)
 
-        ring._center = get_center(ring.atoms)
+
+def get_sgroup_bonds(sgroup_atoms: list[list[int]], adjacency: graph_traversal.Adjacency) \
+        -> tuple[list[np.ndarray], list[np.ndarray]]:
+    """
+    Bonds of every S-group from the bonds of its atoms (one np.unique over all groups; no per bond list searches).
+
+    Returns
+    -------
+    contained: list[np.ndarray]
+        per group: bond ids with both atoms in the group
+    crossing: list[np.ndarray]
+        per group: bond ids with one atom in the group
+
+    """
+    number_groups = len(sgroup_atoms)
+    number_bonds = max(len(adjacency.indices) // 2, 1)
+    lengths = [len(atoms) for atoms in sgroup_atoms]
+    group_ids = np.repeat(np.arange(number_groups), lengths)
+    atoms = np.concatenate([np.asarray(atoms, dtype=np.int64) for atoms in sgroup_atoms]) if sum(lengths) \
+        else np.zeros(0, dtype=np.int64)
+    _, unique = np.unique(group_ids * adjacency.number_atoms + atoms, return_index=True)  # atoms listed twice
+    group_ids, atoms = group_ids[unique], atoms[unique]
+
+    degrees = adjacency.degrees[atoms]
+    positions = np.repeat(adjacency.indptr[atoms] - np.cumsum(degrees) + degrees, degrees) + np.arange(degrees.sum())
+    keys, counts = np.unique(np.repeat(group_ids, degrees) * number_bonds + adjacency.bond_ids[positions],
+                             return_counts=True)
+    groups, bonds = np.divmod(keys, number_bonds)
+
+    out = []
+    for mask in (counts == 2, counts == 1):
+        splits = np.searchsorted(groups[mask], np.arange(1, number_groups))
+        out.append(np.split(bonds[mask], splits) if number_groups else [])
+    return out[0], out[1]
+
+
+def _closest_bonds(points: np.ndarray, bond_ids: np.ndarray, bond_centers: np.ndarray) -> list[int | None]:
+    """ for each point, the bond (of `bond_ids`) with the closest center """
+    if len(bond_ids) == 0:
+        return [None] * len(points)
+    distances = np.linalg.norm(bond_centers[bond_ids][np.newaxis, :, :] - points[:, np.newaxis, :], axis=2)
+    return bond_ids[np.argmin(distances, axis=1)].tolist()
 
 
 def get_center(atoms: list[Atom]) -> np.ndarray:
@@ -81,17 +193,24 @@ def _add_bond_atoms(atoms: list[Atom], bonds: list[Bond]):
             atom.add_bond(bond)
 
 
-def _process_molecule_inputs(smiles: str | None, mole_file: str | None):
+def _process_molecule_inputs(smiles: str | None, mole_file: str | None, use_rdkit: bool = True,
+                             read_files: bool = True):
     if smiles is not None:  # get mole file from SMILES
+        if not rdkit_available():
+            raise RDKitError("RDKit is needed for SMILES input (not installed).")
         try:
             mole_file, _rdkit_molecule = get_mole_file(smiles)
         except Exception as e:
             raise RDKitError("RDKit could not parse your SMILES string.")
 
     elif mole_file is not None:  # get SMILES from mole file
-        if os.path.isfile(mole_file):
+        if read_files and os.path.isfile(mole_file):
             with open(mole_file, 'r') as file:
                 mole_file = file.read()
+        if not use_rdkit or not rdkit_available():
+            return None, mole_file, None
+
+        from rdkit import Chem
         try:
             _rdkit_molecule = Chem.MolFromMolBlock(mole_file)
         except Exception as e:
@@ -108,7 +227,9 @@ class Molecule:
                  smiles: str = None,
                  mole_file: str = None,
                  name: str = None,
-                 coordinates: PointType = (0, 0)
+                 coordinates: PointType = (0, 0),
+                 use_rdkit: bool = True,
+                 read_files: bool = True
                  ):
         """
         Parameters
@@ -120,52 +241,73 @@ class Molecule:
         name: str
             name of molecule
         coordinates: np.ndarray
+        use_rdkit: bool
+            False: read mole files without RDKit (rings and aromaticity from the bond table; `smiles` is None).
+            Also used when RDKit is not installed.
+        read_files: bool
+            False: `mole_file` is always mole file text, never opened as a path (untrusted input, e.g. a server)
 
         """
-        smiles, mole_file, _rdkit_molecule = _process_molecule_inputs(smiles, mole_file)
+        self.report = instrumentation.new_report("molecule", name)
+        with instrumentation.stage(self.report, "rdkit parse"):
+            smiles, mole_file, _rdkit_molecule = _process_molecule_inputs(smiles, mole_file, use_rdkit, read_files)
         self.name = name
         self.smiles = smiles
         self._rdkit_molecule = _rdkit_molecule
 
         # parse mole file
-        atom_symbols, atom_coordinates, bond_block, file_version, s_block = parse_mole_file(mole_file)
+        with instrumentation.stage(self.report, "mole file parse"):
+            atom_symbols, atom_coordinates, bond_block, file_version, s_block = parse_mole_file(mole_file)
+        self._setup(atom_symbols, atom_coordinates, bond_block, file_version, s_block, coordinates)
+        instrumentation.finish(self.report, self)
+
+    def _setup(self, atom_symbols: list[str], atom_coordinates: np.ndarray, bond_block: np.ndarray,
+               file_version: str, s_block: dict, coordinates: PointType):
+        """ Build the molecule from mole file arrays (parsed, or generated; see Polymer). """
         self._atom_coordinates = np.copy(atom_coordinates)
         self.atom_coordinates = atom_coordinates  # atoms coordinates are linked to this array
-        self.atoms: list[Atom] = self._add_atoms(atom_symbols)
-        self.bonds: list[Bond] = self._add_bonds(bond_block)
-        _add_bond_atoms(self.atoms, self.bonds)
+        self.coordinate_version = 0  # increase when coordinates change; invalidates 'geometry'
+        self.geometry = MoleculeGeometry(self)
+        self.bond_atom_ids: np.ndarray = bond_block[:, :2].astype("int64") - 1  # -1 is to start counting at 0
+        self.bond_types: np.ndarray = bond_block[:, 2].astype("int64")
+        with instrumentation.stage(self.report, "atoms and bonds"):
+            self.atoms: list[Atom] = self._add_atoms(atom_symbols)
+            self.bonds: list[Bond] = self._add_bonds(bond_block)
+            _add_bond_atoms(self.atoms, self.bonds)
         self.file_version: str = file_version
 
         # position
         self._coordinates = None
         self.parenthesis_coordinates = None
+        self._parenthesis_buffer = None
         self.coordinates = coordinates
 
-        # get rings
-        self.rings = self._add_rings()
-        add_atoms_bonds_to_rings(self.rings, self.bonds)
-
-        # get sblock
-        self.parenthesis = self._add_parenthesis(s_block)
+        # rings and parenthesis objects are built on first access; the bracket positions are needed now
+        self._rings: list[Ring] | None = None
+        self._parenthesis: list[Parenthesis] | None = None
+        self._sgroups = self._get_sgroups(s_block)
 
         # move center to zero
-        shift_amount = np.mean(atom_coordinates, axis=0)
-        self.atom_coordinates -= shift_amount
-        if self.parenthesis_coordinates is not None:
-            self.parenthesis_coordinates -= shift_amount
-            self._vector = self.parenthesis[0].vector
-        else:
-            # rotate if no parenthesis
-            self._vector = np.array([1, 0], dtype="float64")
-            self.atom_coordinates = _rotate_molecule(atom_coordinates, self._vector)
+        with instrumentation.stage(self.report, "pca"):
+            shift_amount = np.mean(atom_coordinates, axis=0)
+            self.atom_coordinates -= shift_amount
+            if self.parenthesis_coordinates is not None:
+                self.parenthesis_coordinates -= shift_amount
+                self._vector = vector_math.normalize(
+                    self.parenthesis_coordinates[1] - self.parenthesis_coordinates[0])  # first bracket's vector
+            else:
+                # rotate if no parenthesis
+                self._vector = np.array([1, 0], dtype="float64")
+                self.atom_coordinates = _rotate_molecule(atom_coordinates, self._vector)
+        self.coordinate_version += 1
 
     def __repr__(self) -> str:
         text = ""
         if self.name is not None:
             text += self.name + " || "
         text += f"# atoms: {self.number_atoms}, # bonds: {self.number_bonds}"
-        if self.parenthesis is not None:
-            text += f", # parenthesis: {len(self.parenthesis)}"
+        if self.parenthesis_coordinates is not None:
+            text += f", # parenthesis: {len(self.parenthesis_coordinates)}"
         return text
 
     @property
@@ -176,6 +318,36 @@ class Molecule:
     def number_bonds(self) -> int:
         return len(self.bonds)
 
+    @property
+    def canonical_smiles(self) -> str | None:
+        if self._rdkit_molecule is None:
+            return self.smiles
+        from rdkit import Chem
+        return Chem.MolToSmiles(self._rdkit_molecule)
+
+    @property
+    def rings(self) -> list[Ring]:
+        """ built on first access (ring perception and ring membership of atoms and bonds) """
+        if self._rings is None:
+            self._rings = self._add_rings()
+            add_atoms_bonds_to_rings(self._rings, self.bonds, self.bond_atom_ids, self.number_atoms)
+        return self._rings
+
+    @property
+    def rings_built(self) -> bool:
+        return self._rings is not None
+
+    @property
+    def parenthesis(self) -> list[Parenthesis]:
+        """ built on first access """
+        if self._parenthesis is None:
+            self._parenthesis = self._add_parenthesis()
+        return self._parenthesis
+
+    @property
+    def parenthesis_built(self) -> bool:
+        return self._parenthesis is not None
+
     @property
     def coordinates(self) -> np.ndarray:
         return self._coordinates
@@ -186,6 +358,7 @@ class Molecule:
         self.atom_coordinates += coordinates
         if self.parenthesis_coordinates is not None:
             self.parenthesis_coordinates += coordinates
+        self.coordinate_version += 1
 
     @property
     def vector(self) -> np.ndarray:
@@ -196,10 +369,13 @@ class Molecule:
         vector = vector_math.normalize(vector)
         rot_matrix = vector_math.rotation_matrix(self.vector, vector)
         self.atom_coordinates = np.dot(self.atom_coordinates, rot_matrix)
-        if self.parenthesis is not None:
-            for parenthesis_ in self.parenthesis:
+        if self.parenthesis_coordinates is not None:
+            self.parenthesis_coordinates = np.dot(self.parenthesis_coordinates, rot_matrix)
+        if self._parenthesis is not None:  # not built yet: vectors come from the rotated coordinates
+            for parenthesis_ in self._parenthesis:
                 parenthesis_.vector = np.dot(parenthesis_.vector, rot_matrix)
         self._vector = vector
+        self.coordinate_version += 1
 
     @property
     def atom_highlights(self) -> bool:
@@ -211,7 +387,9 @@ class Molecule:
 
     @property
     def ring_highlights(self) -> bool:
-        return any([ring.highlight.show for ring in self.rings])
+        if self._rings is None:
+            return False  # rings never accessed, so none can be highlighted
+        return any([ring.highlight.show for ring in self._rings])
 
     @property
     def has_highlights(self) -> bool:
@@ -234,52 +412,83 @@ class Molecule:
         return bonds
 
     def _add_rings(self) -> list[Ring]:
+        number_components = graph_traversal.connected_components(self.geometry.adjacency).max(initial=-1) + 1
+        if self.number_bonds - self.number_atoms + number_components == 0:  # cyclomatic number: no rings
+            return []
+
+        if self._rdkit_molecule is None:
+            ring_list = graph_algorithms.get_sssr(self.bond_atom_ids, self.number_atoms)
+            aromatic = get_ring_aromaticity(ring_list, [atom.symbol for atom in self.atoms], self.bond_atom_ids,
+                                            self.bond_types)
+            return [Ring(ring_list[i], i, self, aromatic[i]) for i in range(len(ring_list))]
+
+        from rdkit import Chem
         ring_list = [[i for i in list(ring)] for ring in Chem.GetSymmSSSR(self._rdkit_molecule)]
         aromatic = [self._rdkit_molecule.GetAtomWithIdx(ring[0]).GetIsAromatic() for ring in ring_list]
         return [Ring(ring_list[i], i, self, aromatic[i]) for i in range(len(ring_list))]
 
-    def _add_parenthesis(self, s_block: dict) -> list[Parenthesis]:
-        counter = 0
+    def _get_sgroups(self, s_block: dict) -> list[dict]:
+        """ SRU and GEN groups; adds their two bracket positions (SDI line centers) to `parenthesis_coordinates` """
+        sgroups = [v for v in s_block.values() if v["type_"] == Sgroup.SRU or v["type_"] == Sgroup.GEN]
+        if not sgroups:
+            return []
+
+        # group, bracket, line end, xy
+        positions = np.array([v["position"][:8] for v in sgroups], dtype="float64").reshape(-1, 2, 2, 2)
+        self._add_parenthesis_coordinates(positions.mean(axis=2).reshape(-1, 2))
+        sizes = np.linalg.norm(positions[:, :, 1] - positions[:, :, 0], axis=2) / 2
+        return [dict(v, sizes=tuple(size)) for v, size in zip(sgroups, sizes.tolist())]
+
+    def _add_parenthesis(self) -> list[Parenthesis]:
+        contained, crossing = get_sgroup_bonds([v.get("atoms", []) for v in self._sgroups], self.geometry.adjacency)
+        bond_centers = np.mean(self.atom_coordinates[self.bond_atom_ids], axis=1)
+
         parenthesis_list = []
-        for k, v in s_block.items():
-            if v["type_"] == Sgroup.SRU or v["type_"] == Sgroup.GEN:
-                kwargs = dict(
-                    atoms=[self.atoms[i] for i in v['atoms']] if 'atoms' in v else None,
-                    contained_bonds=[self.atoms[i] for i in v['bonds']] if 'bonds' in v else None,
-                    parent=self
-                )
-                pos = np.array(v["position"])
-                coordinate1 = np.array([np.mean([pos[0], pos[2]]), np.mean([pos[1], pos[3]])])
-                coordinate2 = np.array([np.mean([pos[4], pos[6]]), np.mean([pos[5], pos[7]])])
-                self._add_parenthesis_coordinates([coordinate1, coordinate2])
-                vector = vector_math.normalize(np.array(coordinate1-coordinate2))
-
-                par1 = Parenthesis(**kwargs,
-                                   id_=counter,
-                                   vector=-vector,
-                                   size=vector_math.pythagoras_theorem(pos[:2], pos[2:4])/2
-                                   )
-                counter += 1
-                par2 = Parenthesis(**kwargs,
-                                   id_=counter,
-                                   vector=vector,
-                                   sub_script=v["label"] if 'label' in v else None,
-                                   super_script=v["connectivity"].name if 'connectivity' in v else None,
-                                   size=vector_math.pythagoras_theorem(pos[4:6], pos[6:])/2
-                                   )
-                counter += 1
-                par1.partner = par2
-                par2.partner = par1
-                parenthesis_list += [par1, par2]
+        for k, v in enumerate(self._sgroups):
+            coordinates = self.parenthesis_coordinates[2 * k:2 * k + 2]
+            cross_bond1, cross_bond2 = _closest_bonds(coordinates, crossing[k], bond_centers)
+            kwargs = dict(
+                atoms=[self.atoms[i] for i in v['atoms']] if 'atoms' in v else None,
+                contained_bonds=[self.bonds[i] for i in contained[k].tolist()],
+                parent=self
+            )
+            vector = vector_math.normalize(np.array(coordinates[0] - coordinates[1]))
+
+            par1 = Parenthesis(**kwargs,
+                               id_=2 * k,
+                               vector=-vector,
+                               size=v["sizes"][0],
+                               cross_bond=self.bonds[cross_bond1] if cross_bond1 is not None else None
+                               )
+            par2 = Parenthesis(**kwargs,
+                               id_=2 * k + 1,
+                               vector=vector,
+                               sub_script=v["label"] if 'label' in v else None,
+                               super_script=v["connectivity"].name if 'connectivity' in v else None,
+                               size=v["sizes"][1],
+                               cross_bond=self.bonds[cross_bond2] if cross_bond2 is not None else None
+                               )
+            par1.partner = par2
+            par2.partner = par1
+            parenthesis_list += [par1, par2]
 
         return parenthesis_list
 
-    def _add_parenthesis_coordinates(self, points: list[np.ndarray]):
-        for point in points:
-            if self.parenthesis_coordinates is None:
-                self.parenthesis_coordinates = point.reshape((1, 2))
-            else:
-                self.parenthesis_coordinates = np.vstack((self.parenthesis_coordinates, point))
+    def _add_parenthesis_coordinates(self, points: np.ndarray):
+        """
+        Brackets are appended to a buffer that doubles when full (`parenthesis_coordinates` is a view of it), so adding
+        many brackets one by one is linear.
+        """
+        number = 0 if self.parenthesis_coordinates is None else len(self.parenthesis_coordinates)
+        buffer = self._parenthesis_buffer
+        if buffer is None or self.parenthesis_coordinates is None or self.parenthesis_coordinates.base is not buffer \
+                or number + len(points) > len(buffer):
+            buffer = np.empty((max(2 * (number + len(points)), 8), 2), dtype="float64")
+            if number:
+                buffer[:number] = self.parenthesis_coordinates
+            self._parenthesis_buffer = buffer
+        buffer[number:number + len(points)] = points
+        self.parenthesis_coordinates = buffer[:number + len(points)]
 
     def get_top_atom(self):
         top = self.atoms[0]
@@ -298,26 +507,25 @@ class Molecule:
         return bottom
 
     def add_parenthesis(self, bond_ids: list[int], sub_script: str = None, super_script: str = None):
+        parenthesis = self.parenthesis  # build the ones from the mole file first
         bonds = [self.bonds[id_] for id_ in bond_ids]
-        if self.parenthesis_coordinates is None:
-            self.parenthesis_coordinates = bonds[0].center.reshape((1, 2))
-        else:
-            self.parenthesis_coordinates = np.vstack((self.parenthesis_coordinates, bonds[0].center))
-        self.parenthesis_coordinates = np.vstack((self.parenthesis_coordinates, bonds[1].center))
+        self._add_parenthesis_coordinates(np.array([bonds[0].center, bonds[1].center]))
 
         vector = self.parenthesis_coordinates[-1] - self.parenthesis_coordinates[-2]
 
-        self.parenthesis.append(
+        parenthesis.append(
             Parenthesis(self,
                         id_=len(self.parenthesis_coordinates)-2,
-                        vector=vector
+                        vector=vector,
+                        cross_bond=bonds[0]
                         )
         )
-        self.parenthesis.append(
+        parenthesis.append(
             Parenthesis(self,
                         id_=len(self.parenthesis_coordinates)-1,
                         vector=-vector,
                         sub_script=sub_script,
-                        super_script=super_script
+                        super_script=super_script,
+                        cross_bond=bonds[1]
                         )
         )
@@ -1,4 +1,6 @@
 
+import collections
+
 import numpy as np
 
 from chemdraw.data_types import PointType
@@ -18,7 +20,8 @@ class Parenthesis:
                  contained_bonds: list[Bond] = None,
                  sub_script: str = None,
                  super_script: str = None,
-                 size: float = None
+                 size: float = None,
+                 cross_bond: Bond = None
                  ):
         self.id_ = id_
         self.parent = parent
@@ -30,7 +33,7 @@ class Parenthesis:
         self.partner = None
         self.atoms = atoms if atoms is not None else []
         self.contained_bonds = contained_bonds if contained_bonds is not None else []
-        self.cross_bond = self._get_cross_bond() if self.contained_bonds is not [] else []
+        self.cross_bond = cross_bond
 
         # drawing stuff
         self._show = None
@@ -55,17 +58,8 @@ class Parenthesis:
         return text
 
     def __post_init__(self):
-        if self.contained_bonds == [] and self.atoms:
-            # find bonds if none provided but atoms were
-            bonds = []
-            for atom in self.atoms:
-                for bond in atom.bonds:
-                    if bond not in bonds:
-                        bonds.append(bond)
-                    else:
-                        self.contained_bonds.append(bond)
-                        bonds.remove(bond)
-            self.cross_bond = self._find_cross_bond(bonds)
+        if self.cross_bond is None and self.atoms:
+            self._find_bonds()
 
     @property
     def show(self):
@@ -85,29 +79,14 @@ class Parenthesis:
 
         return self.parent.parenthesis_coordinates[self.id_]
 
-    def _get_cross_bond(self) -> Bond:
-        # get all bonds in and exiting parenthesis
-        bonds = []
-        for atom in self.atoms:
-            bonds += atom.bonds
-
-        # remove non-edge bonds and duplicates
-        edge_bonds = []
-        for bond in bonds:
-            if bond not in self.contained_bonds:
-                if bond not in edge_bonds:
-                    edge_bonds.append(bond)
-
-        return self._find_cross_bond(edge_bonds)
-
-    def _find_cross_bond(self, edge_bonds: list[Bond]) -> Bond:
-        # select bond with closes coordinates
-        closest_bond = None
-        smallest_distance = 10000000
-        for bond in edge_bonds:
-            distance = vector_math.pythagoras_theorem(bond.center, self.parent.parenthesis_coordinates[self.id_])
-            if distance < smallest_distance:
-                closest_bond = bond
-                smallest_distance = distance
-
-        return closest_bond
+    def _find_bonds(self):
+        """ bonds with both atoms inside are contained, bonds with one cross; linear in the bonds of the atoms """
+        counts = collections.Counter(bond.id_ for atom in self.atoms for bond in atom.bonds)
+        bonds = {bond.id_: bond for atom in self.atoms for bond in atom.bonds}
+        if not self.contained_bonds:
+            self.contained_bonds = [bonds[id_] for id_, count in counts.items() if count == 2]
+        edge_bonds = [bonds[id_] for id_, count in counts.items() if count == 1]
+        if edge_bonds:
+            centers = np.array([bond.center for bond in edge_bonds])
+            distances = np.linalg.norm(centers - self.parent.parenthesis_coordinates[self.id_], axis=1)
+            self.cross_bond = edge_bonds[int(np.argmin(distances))]
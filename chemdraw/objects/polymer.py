@@ -1,4 +1,278 @@
+"""
+Polymers drawn as oligomers: the structural repeat unit (SRU/GEN Sgroup of a mole file) is repeated
+`number_repeat_units` times by tiling its coordinate and bond arrays with a rigid transform (no SMILES, no RDKit
+layout), so memory and time are linear in the number of repeat units.
 
+    poly = Polymer(mole_file="mol_files/poly_iPP_generic.txt", number_repeat_units=10)
 
-class Polymer:
-    pass
\ No newline at end of file
+The transform moves the head crossing bond (bond from the head end group into the repeat unit) onto the tail crossing
+bond; copy k is the repeat unit moved by the transform k times, and the tail end group is moved with the last copy.
+    'translate': shift only (crossing bonds parallel)
+    'glide': reflection + shift (zigzag chains, e.g. drawn iPP); mirrored copies get their wedges swapped
+    'rotate': rotation + shift (units curl into a ring/helix)
+    'auto': 'translate' if the crossing bonds are parallel, otherwise 'glide'
+"""
+import numpy as np
+
+from chemdraw.data_types import PointType
+from chemdraw.utils.mole_file_parser import parse_mole_file, Sgroup
+from chemdraw.objects.molecule import Molecule, _process_molecule_inputs
+import chemdraw.utils.graph_traversal as graph_traversal
+import chemdraw.utils.instrumentation as instrumentation
+
+TRANSFORMS = ("auto", "translate", "glide", "rotate")
+STEREO_MIRROR = {1: 6, 6: 1}  # wedge <-> hash
+
+
+def get_repeat_transform(head_out: np.ndarray, head_in: np.ndarray, tail_in: np.ndarray, tail_out: np.ndarray,
+                         transform: str = "auto") -> np.ndarray:
+    """
+    Rigid transform that moves `head_out` onto `tail_in` and the direction `head_out -> head_in` onto
+    `tail_in -> tail_out`.
+
+    Returns
+    -------
+    matrix: np.ndarray[3, 3]
+        homogeneous 2D transform
+
+    """
+    a = head_in - head_out
+    b = tail_out - tail_in
+    angle_a = np.arctan2(a[1], a[0])
+    angle_b = np.arctan2(b[1], b[0])
+    if transform == "auto":
+        difference = np.angle(np.exp(1j * (angle_b - angle_a)))  # wrapped to [-pi, pi]
+        transform = "translate" if abs(difference) < 1e-3 else "glide"
+
+    if transform == "translate":
+        linear = np.eye(2)
+    elif transform == "rotate":
+        angle = angle_b - angle_a
+        linear = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    elif transform == "glide":
+        angle = angle_a + angle_b  # reflection about the line at (angle_a + angle_b)/2
+        linear = np.array([[np.cos(angle), np.sin(angle)], [np.sin(angle), -np.cos(angle)]])
+    else:
+        raise ValueError(f"Invalid transform: '{transform}' (options: {TRANSFORMS})")
+
+    matrix = np.eye(3)
+    matrix[:2, :2] = linear
+    matrix[:2, 2] = tail_in - linear @ head_out
+    return matrix
+
+
+def _transform_powers(matrix: np.ndarray, number: int) -> np.ndarray:
+    """ (number, 3, 3): matrix^0, matrix^1, ... """
+    powers = np.empty((number, 3, 3))
+    powers[0] = np.eye(3)
+    for k in range(1, number):
+        powers[k] = matrix @ powers[k - 1]
+    return powers
+
+
+def _apply(matrix: np.ndarray, coordinates: np.ndarray) -> np.ndarray:
+    return coordinates @ matrix[:2, :2].T + matrix[:2, 2]
+
+
+def _get_repeat_group(s_block: dict, sgroup: int | None) -> tuple[int, dict]:
+    groups = {k: v for k, v in s_block.items() if v["type_"] in (Sgroup.SRU, Sgroup.GEN) and "atoms" in v}
+    if sgroup is not None:
+        if sgroup not in groups:
+            raise ValueError(f"Sgroup {sgroup} is not a repeat unit (repeat units: {list(groups)}).")
+        return sgroup, groups[sgroup]
+    if not groups:
+        raise ValueError("The mole file has no repeat unit (SRU or GEN Sgroup).")
+    id_ = min(groups)
+    return id_, groups[id_]
+
+
+def expand_repeat_unit(atom_symbols: list[str],
+                       atom_coordinates: np.ndarray,
+                       bond_block: np.ndarray,
+                       s_block: dict,
+                       number_repeat_units: int,
+                       sgroup: int = None,
+                       transform: str = "auto"
+                       ) -> tuple[list[str], np.ndarray, np.ndarray, dict, np.ndarray]:
+    """
+    Repeat the repeat unit of a parsed mole file.
+
+    Parameters
+    ----------
+    atom_symbols, atom_coordinates, bond_block, s_block:
+        from `parse_mole_file`
+    number_repeat_units: int
+    sgroup: int
+        id of the repeat unit Sgroup (default: lowest SRU/GEN id)
+    transform: str
+        'auto', 'translate', 'glide' or 'rotate' (see module docstring)
+
+    Returns
+    -------
+    atom_symbols, atom_coordinates, bond_block, s_block:
+        expanded (atoms: head end group, copy 0, copy 1, ..., tail end group; bonds in the same order); the expanded
+        Sgroup is removed, Sgroups of the end groups are kept
+    unit_atom_ids: np.ndarray[number_repeat_units, :]
+        atom ids of each copy
+
+    """
+    if number_repeat_units < 1:
+        raise ValueError(f"'number_repeat_units' must be 1 or more (given: {number_repeat_units}).")
+    sgroup, group = _get_repeat_group(s_block, sgroup)
+    number_atoms = len(atom_symbols)
+    atom_ids = bond_block[:, :2].astype(np.int64) - 1
+
+    unit = np.array(sorted(group["atoms"]), dtype=np.int64)
+    in_unit = np.zeros(number_atoms, dtype=bool)
+    in_unit[unit] = True
+    crossing = np.flatnonzero(in_unit[atom_ids].sum(axis=1) == 1)
+    if len(crossing) != 2:
+        raise ValueError(f"Repeat unit (Sgroup {sgroup}) needs 2 crossing bonds (found {len(crossing)}).")
+    head_bond, tail_bond = _order_crossing_bonds(crossing, atom_ids, atom_coordinates, group.get("position"))
+    head_in, head_out = atom_ids[head_bond] if in_unit[atom_ids[head_bond, 0]] else atom_ids[head_bond, ::-1]
+    tail_in, tail_out = atom_ids[tail_bond] if in_unit[atom_ids[tail_bond, 0]] else atom_ids[tail_bond, ::-1]
+
+    # end groups: atoms reached from the tail without passing through the repeat unit
+    adjacency = graph_traversal.Adjacency.from_bonds(atom_ids, number_atoms)
+    _, _, distance = graph_traversal.breadth_first_order(adjacency, int(tail_out), blocked=in_unit)
+    in_tail = distance >= 0
+    if in_tail[head_out]:
+        raise ValueError(f"The end groups of repeat unit (Sgroup {sgroup}) are bonded to each other.")
+    head = np.flatnonzero(~in_unit & ~in_tail)
+    tail = np.flatnonzero(in_tail)
+
+    matrix = get_repeat_transform(*atom_coordinates[[head_out, head_in, tail_in, tail_out]], transform)
+    powers = _transform_powers(matrix, number_repeat_units)
+    mirrored = np.linalg.det(powers[:, :2, :2]) < 0
+
+    # atoms
+    number_unit = len(unit)
+    unit_coordinates = np.einsum("kij,mj->kmi", powers[:, :2, :2], atom_coordinates[unit]) + powers[:, None, :2, 2]
+    coordinates = np.concatenate((atom_coordinates[head], unit_coordinates.reshape(-1, 2),
+                                  _apply(powers[-1], atom_coordinates[tail])))
+    symbols = [atom_symbols[i] for i in head] + [atom_symbols[i] for i in unit] * number_repeat_units + \
+        [atom_symbols[i] for i in tail]
+    new_ids = np.empty(number_atoms, dtype=np.int64)  # end groups: new id; repeat unit: position in the unit
+    new_ids[head] = np.arange(len(head))
+    new_ids[unit] = np.arange(number_unit)
+    tail_start = len(head) + number_unit * number_repeat_units
+    new_ids[tail] = tail_start + np.arange(len(tail))
+    unit_atom_ids = len(head) + np.arange(number_repeat_units * number_unit).reshape(number_repeat_units, -1)
+
+    # bonds: head end group, head crossing bond, (copy k, bond to copy k+1) for each k, tail end group
+    bond_block = np.asarray(bond_block, dtype=np.int32)
+    both_in_unit = in_unit[atom_ids].all(axis=1)
+    head_bonds = np.flatnonzero(np.isin(atom_ids, head).all(axis=1))
+    tail_bonds = np.flatnonzero(in_tail[atom_ids].all(axis=1))
+
+    head_block = bond_block[head_bonds]
+    head_block[:, :2] = new_ids[atom_ids[head_bonds]] + 1
+    head_link = bond_block[head_bond].copy()
+    head_link[:2] = new_ids[atom_ids[head_bond]] + np.where(in_unit[atom_ids[head_bond]], len(head), 0) + 1
+
+    unit_bonds = np.flatnonzero(both_in_unit)
+    units = np.empty((number_repeat_units, len(unit_bonds) + 1, bond_block.shape[1]), dtype=np.int32)
+    units[:] = np.concatenate((bond_block[unit_bonds], bond_block[[tail_bond]]))
+    offsets = len(head) + number_unit * np.arange(number_repeat_units)[:, None, None]
+    units[:, :-1, :2] = new_ids[atom_ids[unit_bonds]] + offsets + 1
+    # bond to the next copy: tail_in of copy k -> head_in of copy k+1 (tail_out for the last copy)
+    is_in = atom_ids[tail_bond] == tail_in
+    units[:, -1, :2] = np.where(is_in, new_ids[tail_in] + offsets[:, 0],
+                                new_ids[head_in] + offsets[:, 0] + number_unit) + 1
+    units[-1, -1, :2] = np.where(is_in, new_ids[tail_in] + offsets[-1, 0], new_ids[tail_out]) + 1
+    if bond_block.shape[1] > 3:
+        units[mirrored, :, 3] = _mirror_stereo(units[mirrored, :, 3])
+
+    tail_block = bond_block[tail_bonds]
+    tail_block[:, :2] = new_ids[atom_ids[tail_bonds]] + 1
+    if bond_block.shape[1] > 3 and mirrored[-1]:
+        tail_block[:, 3] = _mirror_stereo(tail_block[:, 3])
+
+    bonds = np.concatenate((head_block, head_link[None, :], units.reshape(-1, bond_block.shape[1]), tail_block))
+
+    # Sgroups of the end groups
+    bond_ids = np.full(len(atom_ids), -1, dtype=np.int64)
+    bond_ids[head_bonds] = np.arange(len(head_bonds))
+    bond_ids[head_bond] = len(head_bonds)
+    bond_ids[tail_bond] = len(head_bonds) + units.shape[0] * units.shape[1]
+    bond_ids[tail_bonds] = bond_ids[tail_bond] + 1 + np.arange(len(tail_bonds))
+    s_block_new = {}
+    for id_, group_ in s_block.items():
+        if id_ == sgroup or in_unit[group_.get("atoms", [])].any():
+            continue
+        atoms = group_.get("atoms", [])
+        group_ = dict(group_)
+        if "atoms" in group_:
+            group_["atoms"] = new_ids[group_["atoms"]].tolist()
+        if "bonds" in group_:
+            group_["bonds"] = [i for i in bond_ids[group_["bonds"]].tolist() if i >= 0]
+        if "position" in group_ and in_tail[atoms].any():
+            position = _apply(powers[-1], np.reshape(group_["position"], (-1, 2)))
+            group_["position"] = position.reshape(-1).tolist()
+        s_block_new[id_] = group_
+
+    return symbols, coordinates, bonds, s_block_new, unit_atom_ids
+
+
+def _order_crossing_bonds(crossing: np.ndarray, atom_ids: np.ndarray, atom_coordinates: np.ndarray,
+                          position: list[float] | None) -> tuple[int, int]:
+    """ head crossing bond: the one nearest the first bracket (mole file order without brackets) """
+    if position is None or len(position) < 8:
+        return int(crossing[0]), int(crossing[1])
+    bracket = np.reshape(position[:4], (2, 2)).mean(axis=0)
+    centers = atom_coordinates[atom_ids[crossing]].mean(axis=1)
+    distances = np.linalg.norm(centers - bracket, axis=1)
+    if distances[1] < distances[0]:
+        return int(crossing[1]), int(crossing[0])
+    return int(crossing[0]), int(crossing[1])
+
+
+def _mirror_stereo(stereo: np.ndarray) -> np.ndarray:
+    out = stereo.copy()
+    for before, after in STEREO_MIRROR.items():
+        out[stereo == before] = after
+    return out
+
+
+class Polymer(Molecule):
+    def __init__(self,
+                 mole_file: str,
+                 number_repeat_units: int = 3,
+                 name: str = None,
+                 sgroup: int = None,
+                 transform: str = "auto",
+                 coordinates: PointType = (0, 0)
+                 ):
+        """
+        Parameters
+        ----------
+        mole_file: str
+            file path to mole file or mole file as string; with a repeat unit (SRU or GEN Sgroup)
+        number_repeat_units: int
+            number of repeat units drawn
+        name: str
+            name of polymer
+        sgroup: int
+            id of the repeat unit Sgroup (default: lowest SRU/GEN id)
+        transform: str
+            'auto', 'translate', 'glide' or 'rotate' (see module docstring)
+        coordinates: np.ndarray
+
+        """
+        self.report = instrumentation.new_report("polymer", name)
+        _, mole_file, _ = _process_molecule_inputs(None, mole_file, use_rdkit=False)
+        self.name = name
+        self.smiles = None
+        self._rdkit_molecule = None  # rings and aromaticity come from the bond table
+        self.number_repeat_units = number_repeat_units
+
+        with instrumentation.stage(self.report, "mole file parse"):
+            atom_symbols, atom_coordinates, bond_block, file_version, s_block = parse_mole_file(mole_file)
+        with instrumentation.stage(self.report, "repeat unit expansion"):
+            atom_symbols, atom_coordinates, bond_block, s_block, self.unit_atom_ids = expand_repeat_unit(
+                atom_symbols, atom_coordinates, bond_block, s_block, number_repeat_units, sgroup, transform)
+        self._setup(atom_symbols, atom_coordinates, bond_block, file_version, s_block, coordinates)
+        instrumentation.finish(self.report, self)
+
+    def __repr__(self) -> str:
+        return super().__repr__() + f", # repeat units: {self.number_repeat_units}"
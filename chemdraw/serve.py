@@ -0,0 +1,300 @@
+"""
+Local depiction server (offline; standard library only).
+
+    python -m chemdraw.serve --port 8000
+
+    GET  /render?smiles=CCO&format=svg&layout.width=400&atoms.show_carbons=true
+    POST /render?format=png          (mole file as body)
+    GET  /metrics                    (Prometheus text format)
+    GET  /health
+
+`/render` parameters: `smiles` or `molblock` (or a POST body), `format` (svg, png, json; default svg), `title`, and
+any config option as a dotted path (see chemdraw.drawers.config_options). A `molblock` must be V2000 mol block text;
+it is never read as a file path.
+
+Identical concurrent requests are rendered once (coalesced), responses are kept in an LRU cache, and rendering runs in
+a pool of worker processes (or threads with --threads).
+"""
+import argparse
+import bisect
+import collections
+import concurrent.futures
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from chemdraw.objects.molecule import Molecule
+from chemdraw.drawers.drawer import Drawer, Config
+from chemdraw.drawers.config_options import get_config
+from chemdraw.utils.mole_file_parser import is_mole_block
+
+CONTENT_TYPES = {
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "json": "application/json",
+}
+MAX_BODY = 10 * 1024 * 1024  # [bytes]
+
+
+def render(smiles: str | None, mole_file: str | None, format_: str, config: Config, title: str | None) -> bytes:
+    """ Runs in the worker. `mole_file` is text only (never opened as a path). """
+    molecule = Molecule(smiles=smiles, mole_file=mole_file, read_files=False)
+    return Drawer(molecule, title=title, config=config).draw_bytes(format_)
+
+
+class LRUCache:
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._data: collections.OrderedDict = collections.OrderedDict()
+
+    def __repr__(self) -> str:
+        return f"{len(self._data)}/{self.max_size}"
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key):
+        if key not in self._data:
+            return None
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+
+class Histogram:
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # [s]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)  # last: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_text(self, name: str, labels: str = "") -> list[str]:
+        lines = []
+        cumulative = 0
+        for bucket, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{"," if labels else ""}le="{bucket}"}} {cumulative}')
+        labels = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{labels} {self.sum}")
+        lines.append(f"{name}_count{labels} {self.count}")
+        return lines
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = collections.Counter()  # by status code
+        self.request_duration = collections.defaultdict(Histogram)  # by cache result: hit, miss, coalesced
+        self.render_duration = Histogram()  # worker time of rendered (missed) requests
+
+    def observe_request(self, status: int, result: str | None, duration: float):
+        with self._lock:
+            self.responses[status] += 1
+            if result is not None:
+                self.request_duration[result].observe(duration)
+
+    def observe_render(self, duration: float):
+        with self._lock:
+            self.render_duration.observe(duration)
+
+    def to_text(self, cache: LRUCache, in_flight: int) -> str:
+        with self._lock:
+            lines = ["# TYPE chemdraw_responses_total counter"]
+            lines += [f'chemdraw_responses_total{{status="{status}"}} {count}'
+                      for status, count in sorted(self.responses.items())]
+            lines.append("# TYPE chemdraw_request_duration_seconds histogram")
+            for result, histogram in sorted(self.request_duration.items()):
+                lines += histogram.to_text("chemdraw_request_duration_seconds", f'result="{result}"')
+            lines.append("# TYPE chemdraw_render_duration_seconds histogram")
+            lines += self.render_duration.to_text("chemdraw_render_duration_seconds")
+        lines += [
+            "# TYPE chemdraw_cache_entries gauge",
+            f"chemdraw_cache_entries {len(cache)}",
+            "# TYPE chemdraw_in_flight gauge",
+            f"chemdraw_in_flight {in_flight}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class DepictionService:
+    def __init__(self, workers: int = 4, cache_size: int = 256, processes: bool = True, timeout: float = 30):
+        """
+        Parameters
+        ----------
+        workers: int
+            render workers
+        cache_size: int
+            number of responses kept
+        processes: bool
+            True: worker processes (a huge molecule does not hold up other requests); False: threads
+        timeout: float
+            time [s] a request waits for its render
+        """
+        if processes:
+            self.executor = concurrent.futures.ProcessPoolExecutor(workers)
+        else:
+            self.executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="chemdraw")
+        self.timeout = timeout
+        self.cache = LRUCache(cache_size)
+        self.metrics = Metrics()
+        self._in_flight: dict[tuple, concurrent.futures.Future] = {}
+        self._lock = threading.RLock()  # RLock: done callbacks can run in the submitting thread
+
+    def __repr__(self) -> str:
+        return f"cache: {self.cache}, in flight: {len(self._in_flight)}"
+
+    def render(self, smiles: str | None, mole_file: str | None, format_: str, options: dict[str, str],
+               title: str | None = None) -> tuple[bytes, str]:
+        """
+        Returns
+        -------
+        data: bytes
+            rendered file
+        result: str
+            'hit' (cache), 'coalesced' (joined an identical request in flight) or 'miss' (rendered)
+        """
+        if format_ not in CONTENT_TYPES:
+            raise ValueError(f"Invalid format: '{format_}' (options: {list(CONTENT_TYPES)})")
+        if (smiles is None) == (mole_file is None):
+            raise ValueError("Provide one of 'smiles' or 'molblock'.")
+        if mole_file is not None and not is_mole_block(mole_file):
+            raise ValueError("'molblock' is not a mol block (V2000 counts line and 'M  END').")
+        config = get_config(options)  # raises ValueError for invalid options
+        key = (smiles, mole_file, format_, title, tuple(sorted(options.items())))
+
+        with self._lock:
+            data = self.cache.get(key)
+            if data is not None:
+                return data, "hit"
+
+            future = self._in_flight.get(key)
+            if future is None:
+                result = "miss"
+                start = time.perf_counter()
+                future = self.executor.submit(render, smiles, mole_file, format_, config, title)
+                self._in_flight[key] = future
+                future.add_done_callback(lambda future_: self._done(key, future_, start))
+            else:
+                result = "coalesced"
+
+        return future.result(self.timeout), result
+
+    def _done(self, key: tuple, future: concurrent.futures.Future, start: float):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if not future.cancelled() and future.exception() is None:
+                self.cache.put(key, future.result())
+                self.metrics.observe_render(time.perf_counter() - start)
+
+    def metrics_text(self) -> str:
+        return self.metrics.to_text(self.cache, len(self._in_flight))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server_version = "chemdraw"
+
+    @property
+    def service(self) -> DepictionService:
+        return self.server.service
+
+    def do_GET(self):
+        self._handle(None)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY:
+            self._send(413, b"Body too large.", "text/plain")
+            return
+        self._handle(self.rfile.read(length).decode("utf-8"))
+
+    def _handle(self, body: str | None):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/render":
+            self._render(dict(urllib.parse.parse_qsl(url.query)), body)
+        elif url.path == "/metrics":
+            self._send(200, self.service.metrics_text().encode("utf-8"), "text/plain; version=0.0.4")
+        elif url.path == "/health":
+            self._send(200, b"ok", "text/plain")
+        else:
+            self._send(404, b"Not found.", "text/plain")
+
+    def _render(self, query: dict[str, str], body: str | None):
+        start = time.perf_counter()
+        smiles = query.pop("smiles", None)
+        mole_file = query.pop("molblock", None) or (body or None)
+        format_ = query.pop("format", "svg")
+        title = query.pop("title", None)
+
+        result = None
+        try:
+            data, result = self.service.render(smiles, mole_file, format_, query, title)
+            status, content_type = 200, CONTENT_TYPES[format_]
+        except ValueError as e:
+            status, data, content_type = 400, str(e).encode("utf-8"), "text/plain"
+        except concurrent.futures.TimeoutError:
+            status, data, content_type = 504, b"Render timed out.", "text/plain"
+        except Exception as e:  # noqa: molecule parsing/drawing errors
+            status, data, content_type = 422, f"{type(e).__name__}: {str(e).strip()}".encode("utf-8"), "text/plain"
+
+        self._send(status, data, content_type, {"X-Cache": result} if result else None)
+        self.service.metrics.observe_request(status, result, time.perf_counter() - start)
+
+    def _send(self, status: int, data: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # metrics instead of a line per request
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8000, service: DepictionService = None) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    server.daemon_threads = True
+    server.service = service if service is not None else DepictionService()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="chemdraw depiction server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4, help="render workers")
+    parser.add_argument("--threads", action="store_true", help="render in threads instead of processes")
+    parser.add_argument("--cache-size", type=int, default=256, help="responses kept in the LRU cache")
+    parser.add_argument("--timeout", type=float, default=30, help="render timeout [s]")
+    args = parser.parse_args()
+
+    service = DepictionService(args.workers, args.cache_size, not args.threads, args.timeout)
+    server = make_server(args.host, args.port, service)
+    print(f"chemdraw serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,109 +1,211 @@
 import numpy as np
 
-from chemdraw.objects.atoms import Atom
-from chemdraw.objects.bonds import Bond
-
-
-def findNewCycles(path, cycles, graph):
-    start_node = path[0]
-    next_node = None
-    sub = []
-
-    # visit each edge and each node of each edge
-    for edge in graph:
-        node1, node2 = edge
-        if start_node in edge:
-            if node1 == start_node:
-                next_node = node2
-            else:
-                next_node = node1
-            if not visited(next_node, path):
-                # neighbor node not on path yet
-                sub = [next_node]
-                sub.extend(path)
-                # explore extended path
-                findNewCycles(sub, cycles, graph)
-            elif len(path) > 2 and next_node == path[-1]:
-                # cycle found
-                p = rotate_to_smallest(path)
-                inv = invert(p)
-                if isNew(p, cycles) and isNew(inv, cycles):
-                    cycles.append(p)
-
-
-def invert(path):
-    return rotate_to_smallest(path[::-1])
-
-
-#  rotate cycle path such that it begins with the smallest node
-def rotate_to_smallest(path):
-    n = path.index(min(path))
-    return path[n:] + path[:n]
-
-
-def isNew(path, cycles):
-    return not path in cycles
-
-
-def visited(node, path):
-    return node in path
-
-
-def get_rings(graph: np.ndarray) -> list[list[int]]:
-    cycles = []
-    for edge in graph:
-        for node in edge:
-            findNewCycles([node], cycles, graph)
-
-    return cycles
 
 #####################################################################################################################
+# smallest set of smallest rings (SSSR)
 
-
-def _depth_first_search_recursion(node_index: int, node_visited: list[bool], graph: dict[int, list[int]]):
-    for next_node_index in graph[node_index]:
-        if not node_visited[next_node_index]:
-            node_visited[node_index] = True
-            _depth_first_search_recursion(next_node_index, node_visited, graph)
-
-
-def depth_first_search(graph: dict[int, list[int]]):
-    node_visited = [False] * len(graph)
-
-    for node_index in range(len(graph)):
-        if not node_visited[node_index]:
-            node_visited[node_index] = True
-            _depth_first_search_recursion(node_index, node_visited, graph)
-
-
-def _depth_first_search_recursion_atoms(current_atom: Atom, node_visited: dict[int, bool], counter: int):
-    counter -= 1
-    if counter == 0:
-        return
-
-    for bond in current_atom.bonds:
-        if bond.atoms[0].id_ == current_atom.id_:
-            atom = bond.atoms[1]
-        else:
-            atom = bond.atoms[0]
-
-        if not atom.id_ not in node_visited:
-            node_visited[atom.id_] = True
-            stop_flag = _depth_first_search_recursion(atom, node_visited, limit)
-
-
-class GraphDepth:
-    def __init__(self, start_atom: Atom, depth_limit: int = 10, branch_limit: int = 5):
-        self.depth_limit = depth_limit
-        self.branch_limit = branch_limit
-        self.visited_atoms = set()
-        self.next_branch_atom = None
-        self.start_atom = start_atom
-
-    def depth_first_search_atoms(bond: Bond):
-        graph = GraphDepth(start_atom=bond.atoms[0].id_)
-        _depth_first_search_recursion_atoms(graph)
-
+def get_rings(graph: np.ndarray) -> list[list[int]]:
+    """ Smallest set of smallest rings of an edge list with any node labels (see `get_sssr`). """
+    graph = np.asarray(graph).reshape(-1, 2)
+    nodes, bond_atom_ids = np.unique(graph, return_inverse=True)
+    rings = get_sssr(bond_atom_ids.reshape(-1, 2), len(nodes))
+    return [nodes[ring].tolist() for ring in rings]
+
+
+def get_sssr(bond_atom_ids: np.ndarray, number_atoms: int, symmetrize: bool = True) -> list[list[int]]:
+    """
+    Smallest set of smallest rings (a minimum cycle basis) from the bond table.
+
+    Every ring lies in one biconnected component, so each component with rings is solved on its own (chains, bridges
+    and substituents are skipped; polymers with small ring systems scale linearly).
+    Candidate cycles (Horton): for every atom v and bond (x, y), the shortest paths v->x and v->y closed by the bond.
+    Candidates are taken shortest first if their bond sets are independent (GF(2) elimination, bond sets as int
+    bit sets).
+
+    Parameters
+    ----------
+    bond_atom_ids: np.ndarray[:, 2]
+        atom ids (starting at 0) of every bond
+    number_atoms: int
+    symmetrize: bool
+        also add rings that could replace a ring of the same size in the basis (e.g. all 6 faces of cubane), like
+        RDKit's GetSymmSSSR
+
+    Returns
+    -------
+    rings: list[list[int]]
+        atom ids of every ring, in ring order
+
+    """
+    bond_atom_ids = np.asarray(bond_atom_ids, dtype=np.int64).reshape(-1, 2)
+    rings = []
+    for component in get_biconnected_components(bond_atom_ids, number_atoms):
+        if len(component) == 1:  # bridge
+            continue
+        bonds = bond_atom_ids[component]
+        atoms, local_bonds = np.unique(bonds, return_inverse=True)
+        local_bonds = local_bonds.reshape(-1, 2)
+        number_rings = len(bonds) - len(atoms) + 1
+        if number_rings == 1:  # isolated ring
+            rings.append(atoms[_walk_ring(local_bonds)].tolist())
+            continue
+
+        neighbors = [[] for _ in range(len(atoms))]
+        bond_index = {}
+        for i, (atom1, atom2) in enumerate(local_bonds.tolist()):
+            neighbors[atom1].append(atom2)
+            neighbors[atom2].append(atom1)
+            bond_index[(atom1, atom2)] = bond_index[(atom2, atom1)] = i
+
+        candidates = _horton_candidates(local_bonds, neighbors, bond_index)
+        rings += [atoms[ring].tolist() for ring in _minimum_basis(candidates, number_rings, symmetrize)]
+
+    return rings
+
+
+def get_biconnected_components(bond_atom_ids: np.ndarray, number_atoms: int) -> list[list[int]]:
+    """
+    Bond ids of every biconnected component (Tarjan; iterative, no recursion limit). Components with one bond are
+    bridges (bonds in no ring).
+    """
+    neighbors = [[] for _ in range(number_atoms)]
+    for i, (atom1, atom2) in enumerate(np.asarray(bond_atom_ids).reshape(-1, 2).tolist()):
+        neighbors[atom1].append((atom2, i))
+        neighbors[atom2].append((atom1, i))
+
+    discovery = [-1] * number_atoms
+    low = [0] * number_atoms
+    counter = 0
+    components = []
+    bond_stack = []
+    for root in range(number_atoms):
+        if discovery[root] != -1 or not neighbors[root]:
+            continue
+        discovery[root] = low[root] = counter
+        counter += 1
+        stack = [(root, -1, iter(neighbors[root]))]  # atom, bond to parent, remaining neighbors
+        while stack:
+            atom, parent_bond, remaining = stack[-1]
+            for neighbor, bond in remaining:
+                if bond == parent_bond:
+                    continue
+                if discovery[neighbor] == -1:  # tree bond
+                    bond_stack.append(bond)
+                    discovery[neighbor] = low[neighbor] = counter
+                    counter += 1
+                    stack.append((neighbor, bond, iter(neighbors[neighbor])))
+                    break
+                if discovery[neighbor] < discovery[atom]:  # back bond
+                    bond_stack.append(bond)
+                    low[atom] = min(low[atom], discovery[neighbor])
+            else:  # all neighbors done
+                stack.pop()
+                if not stack:
+                    continue
+                parent = stack[-1][0]
+                low[parent] = min(low[parent], low[atom])
+                if low[atom] >= discovery[parent]:  # parent separates the component below
+                    component = []
+                    while True:
+                        bond = bond_stack.pop()
+                        component.append(bond)
+                        if bond == parent_bond:
+                            break
+                    components.append(component)
+
+    return components
+
+
+def _walk_ring(bonds: np.ndarray) -> list[int]:
+    """ atoms in ring order of a component that is one ring """
+    neighbors = [[] for _ in range(len(bonds))]
+    for atom1, atom2 in bonds.tolist():
+        neighbors[atom1].append(atom2)
+        neighbors[atom2].append(atom1)
+
+    ring = [0, neighbors[0][0]]
+    while len(ring) < len(bonds):
+        atom1, atom2 = neighbors[ring[-1]]
+        ring.append(atom1 if atom1 != ring[-2] else atom2)
+    return ring
+
+
+def _horton_candidates(bonds: np.ndarray, neighbors: list[list[int]], bond_index: dict[tuple[int, int], int]) \
+        -> list[tuple[int, list[int]]]:
+    """ returns (bond bit set, atom ids) of every distinct candidate cycle, shortest first """
+    atoms = np.unique(bonds).tolist()
+    candidates = {}
+    for root in atoms:
+        # breadth first search tree
+        parent = {root: root}
+        queue = [root]
+        for atom in queue:
+            for neighbor in neighbors[atom]:
+                if neighbor not in parent:
+                    parent[neighbor] = atom
+                    queue.append(neighbor)
+
+        for atom1, atom2 in bonds.tolist():
+            if parent.get(atom1) == atom2 or parent.get(atom2) == atom1 or atom1 not in parent:
+                continue
+            path1 = _tree_path(parent, atom1)
+            path2 = _tree_path(parent, atom2)
+            if len(set(path1).intersection(path2)) != 1:  # paths share more than the root
+                continue
+            cycle = path1[::-1] + path2[:-1]
+            bits = 0
+            for i in range(len(cycle)):
+                bits |= 1 << bond_index[(cycle[i - 1], cycle[i])]
+            if bits not in candidates:
+                candidates[bits] = cycle
+
+    return sorted(candidates.items(), key=lambda candidate: len(candidate[1]))
+
+
+def _tree_path(parent: dict[int, int], atom: int) -> list[int]:
+    """ atom -> root """
+    path = [atom]
+    while parent[atom] != atom:
+        atom = parent[atom]
+        path.append(atom)
+    return path
+
+
+def _reduce(bits: int, basis: dict[int, int]) -> int:
+    """ GF(2) reduction by a basis {pivot bit: bit set}; 0 if `bits` is a sum of basis vectors """
+    while bits:
+        pivot = bits.bit_length() - 1
+        if pivot not in basis:
+            return bits
+        bits ^= basis[pivot]
+    return 0
+
+
+def _minimum_basis(candidates: list[tuple[int, list[int]]], number_rings: int, symmetrize: bool) -> list[list[int]]:
+    rings = []
+    basis = {}
+    shorter_basis = {}  # basis of the rings shorter than the current candidate
+    rank = 0
+    ring_size = 0
+    for bits, cycle in candidates:
+        if len(cycle) > ring_size:
+            if rank == number_rings:
+                break
+            ring_size = len(cycle)
+            shorter_basis = dict(basis)
+
+        reduced = _reduce(bits, basis)
+        if reduced:
+            basis[reduced.bit_length() - 1] = reduced
+            rank += 1
+            rings.append(cycle)
+        elif symmetrize and _reduce(bits, shorter_basis):
+            rings.append(cycle)  # could replace a ring of the same size
+
+        if rank == number_rings and not symmetrize:
+            break
+
+    return rings
 
 
 def main():
@@ -0,0 +1,221 @@
+"""
+Traversal of the molecule graph: adjacency as compressed sparse row (CSR) arrays; every function is iterative
+(no recursion limit) and O(atoms + bonds), so 10k atom polymers are fine.
+
+    adjacency = molecule.geometry.adjacency  # or Adjacency.from_bonds(bond_atom_ids, number_atoms)
+    order, parent, distance = breadth_first_order(adjacency, 0)
+    labels = connected_components(adjacency)
+    backbone = longest_path(adjacency)
+    branches = get_branches(adjacency, backbone)
+"""
+import numpy as np
+
+
+class Adjacency:
+    """ The neighbors of atom i are `indices[indptr[i]:indptr[i+1]]`, joined by the bonds `bond_ids[...]`. """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, bond_ids: np.ndarray):
+        self.indptr = indptr
+        self.indices = indices
+        self.bond_ids = bond_ids
+        self._lists = None
+
+    def __repr__(self) -> str:
+        return f"# atoms: {self.number_atoms}, # bonds: {len(self.indices) // 2}"
+
+    @classmethod
+    def from_bonds(cls, bond_atom_ids: np.ndarray, number_atoms: int) -> "Adjacency":
+        bond_atom_ids = np.asarray(bond_atom_ids, dtype=np.int64).reshape(-1, 2)
+        source = np.concatenate((bond_atom_ids[:, 0], bond_atom_ids[:, 1]))
+        target = np.concatenate((bond_atom_ids[:, 1], bond_atom_ids[:, 0]))
+        bond_ids = np.tile(np.arange(len(bond_atom_ids)), 2)
+        order = np.lexsort((target, source))  # by atom, then neighbor
+        indptr = np.zeros(number_atoms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=number_atoms), out=indptr[1:])
+        return cls(indptr, target[order], bond_ids[order])
+
+    @property
+    def number_atoms(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def neighbors(self, atom: int) -> np.ndarray:
+        return self.indices[self.indptr[atom]:self.indptr[atom + 1]]
+
+    def lists(self) -> list[list[int]]:
+        """ neighbors as python lists (fast to loop over) """
+        if self._lists is None:
+            indices = self.indices.tolist()
+            indptr = self.indptr.tolist()
+            self._lists = [indices[indptr[i]:indptr[i + 1]] for i in range(self.number_atoms)]
+        return self._lists
+
+
+def breadth_first_order(adjacency: Adjacency, start: int | list[int], blocked: np.ndarray = None) \
+        -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parameters
+    ----------
+    adjacency: Adjacency
+    start: int | list[int]
+        atom(s) to start from (distance 0)
+    blocked: np.ndarray[bool]
+        atoms not to enter
+
+    Returns
+    -------
+    order: np.ndarray
+        reached atoms in visiting order
+    parent: np.ndarray
+        atom each atom was reached from (-1: start or not reached)
+    distance: np.ndarray
+        number of bonds from the start (-1: not reached)
+
+    """
+    neighbors = adjacency.lists()
+    parent = [-1] * adjacency.number_atoms
+    distance = [-1] * adjacency.number_atoms
+    if blocked is not None:
+        for atom in np.flatnonzero(blocked).tolist():
+            distance[atom] = -2
+
+    order = [start] if isinstance(start, (int, np.integer)) else list(start)
+    for atom in order:
+        distance[atom] = 0
+    for atom in order:  # order grows while looping (queue)
+        for neighbor in neighbors[atom]:
+            if distance[neighbor] == -1:
+                distance[neighbor] = distance[atom] + 1
+                parent[neighbor] = atom
+                order.append(neighbor)
+
+    distance = np.array(distance, dtype=np.int64)
+    distance[distance == -2] = -1
+    return np.array(order, dtype=np.int64), np.array(parent, dtype=np.int64), distance
+
+
+def depth_first_order(adjacency: Adjacency, start: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns
+    -------
+    order: np.ndarray
+        reached atoms in pre-order (neighbors in ascending order)
+    parent: np.ndarray
+        atom each atom was reached from (-1: start or not reached)
+
+    """
+    neighbors = adjacency.lists()
+    parent = [-1] * adjacency.number_atoms
+    visited = [False] * adjacency.number_atoms
+    visited[start] = True
+    order = [start]
+    stack = [(start, iter(neighbors[start]))]
+    while stack:
+        atom, remaining = stack[-1]
+        for neighbor in remaining:
+            if not visited[neighbor]:
+                visited[neighbor] = True
+                parent[neighbor] = atom
+                order.append(neighbor)
+                stack.append((neighbor, iter(neighbors[neighbor])))
+                break
+        else:
+            stack.pop()
+
+    return np.array(order, dtype=np.int64), np.array(parent, dtype=np.int64)
+
+
+def connected_components(adjacency: Adjacency) -> np.ndarray:
+    """ (number_atoms,) component label of each atom (0, 1, ... in order of the lowest atom id) """
+    neighbors = adjacency.lists()
+    labels = [-1] * adjacency.number_atoms
+    label = 0
+    for root in range(adjacency.number_atoms):
+        if labels[root] != -1:
+            continue
+        labels[root] = label
+        queue = [root]
+        for atom in queue:
+            for neighbor in neighbors[atom]:
+                if labels[neighbor] == -1:
+                    labels[neighbor] = label
+                    queue.append(neighbor)
+        label += 1
+
+    return np.array(labels, dtype=np.int64)
+
+
+def longest_path(adjacency: Adjacency, start: int = None) -> np.ndarray:
+    """
+    Backbone: path between the two most distant atoms (two breadth first searches; exact for trees, the longest
+    shortest path when there are rings).
+
+    Parameters
+    ----------
+    adjacency: Adjacency
+    start: int
+        any atom of the component (default: first atom of the largest component)
+
+    Returns
+    -------
+    path: np.ndarray
+        atom ids from one end to the other
+
+    """
+    if adjacency.number_atoms == 0:
+        return np.zeros(0, dtype=np.int64)
+    if start is None:
+        labels = connected_components(adjacency)
+        start = int(np.argmax(labels == np.argmax(np.bincount(labels))))
+
+    order, _, _ = breadth_first_order(adjacency, start)
+    end1 = int(order[-1])
+    order, parent, _ = breadth_first_order(adjacency, end1)
+    end2 = int(order[-1])
+
+    path = [end2]
+    parent = parent.tolist()
+    while path[-1] != end1:
+        path.append(parent[path[-1]])
+    return np.array(path, dtype=np.int64)
+
+
+def get_branches(adjacency: Adjacency, path: np.ndarray) -> list[tuple[int, np.ndarray]]:
+    """
+    Side groups of a path (e.g. the backbone).
+
+    Returns
+    -------
+    branches: list[tuple[int, np.ndarray]]
+        (path atom the branch is bonded to, atoms of the branch) in path order; a ring that bonds back to the path
+        belongs to the first path atom
+
+    """
+    neighbors = adjacency.lists()
+    on_path = np.zeros(adjacency.number_atoms, dtype=bool)
+    on_path[path] = True
+    assigned = on_path.tolist()
+
+    branches = []
+    for path_atom in np.asarray(path).tolist():
+        for neighbor in neighbors[path_atom]:
+            if assigned[neighbor]:
+                continue
+            assigned[neighbor] = True
+            branch = [neighbor]
+            for atom in branch:  # branch grows while looping (queue)
+                for next_atom in neighbors[atom]:
+                    if not assigned[next_atom]:
+                        assigned[next_atom] = True
+                        branch.append(next_atom)
+            branches.append((path_atom, np.array(branch, dtype=np.int64)))
+
+    return branches
+
+
+def branch_points(adjacency: Adjacency) -> np.ndarray:
+    """ atoms with more than two bonds """
+    return np.flatnonzero(adjacency.degrees > 2)
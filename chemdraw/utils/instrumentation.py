@@ -0,0 +1,237 @@
+"""
+Opt-in timing of the steps in `Molecule.__init__` and `Drawer._draw`.
+
+    import chemdraw.utils.instrumentation as instrumentation
+
+    instrumentation.enable()
+    instrumentation.add_hook(lambda report: print(report.to_dict()))  # e.g. push to a metrics system
+
+    drawer = chemdraw.Drawer("CCO")
+    drawer.draw()
+    print(drawer.molecule.report)
+    print(drawer.report)
+
+When disabled (default) no reports are made and `Molecule.report` / `Drawer.report` are None.
+
+`enable(memory=True)` also tracks memory with `tracemalloc` (slow; for profiling only): every report gets the peak and
+retained bytes allocated between its start and finish, and molecule reports get the number of chemistry and format
+objects (`count_objects`). `GridDrawer` makes one report per cell (`GridDrawer.cell_reports`).
+"""
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable
+
+import plotly.graph_objs as go
+
+from chemdraw.drawers.general_classes import Font, Line, Highlight
+
+_enabled = False
+_memory = False
+_started_tracemalloc = False
+_hooks: list[Callable] = []
+_memory_stack: list["Report"] = []  # open reports; nested reports (e.g. molecule in grid cell) share the peak
+
+
+def enable(memory: bool = False):
+    global _enabled, _memory, _started_tracemalloc
+    _enabled = True
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+
+
+def disable():
+    global _enabled, _memory, _started_tracemalloc
+    _enabled = False
+    _memory = False
+    _memory_stack.clear()
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def add_hook(hook: Callable):
+    """ `hook(report: Report)` is called with every finished report. """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Callable):
+    _hooks.remove(hook)
+
+
+class StageRecord:
+    def __init__(self, name: str, wall_time: float, number_traces: int = None, number_annotations: int = None):
+        """
+        Parameters
+        ----------
+        name: str
+            step name
+        wall_time: float
+            time [s]
+        number_traces: int
+            traces added to the figure in the step (None for steps without a figure)
+        number_annotations: int
+            annotations added to the figure in the step (None for steps without a figure)
+        """
+        self.name = name
+        self.wall_time = wall_time
+        self.number_traces = number_traces
+        self.number_annotations = number_annotations
+
+    def __repr__(self) -> str:
+        text = f"{self.name}: {self.wall_time * 1000:.3f} ms"
+        if self.number_traces is not None:
+            text += f", # traces: {self.number_traces}, # annotations: {self.number_annotations}"
+        return text
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "wall_time": self.wall_time,
+            "number_traces": self.number_traces,
+            "number_annotations": self.number_annotations
+        }
+
+
+class Report:
+    def __init__(self, kind: str, name: str = None):
+        """
+        Parameters
+        ----------
+        kind: str
+            what was timed ('molecule', 'draw' or 'update')
+        name: str
+            molecule name or drawer title
+        """
+        self.kind = kind
+        self.name = name
+        self.records: list[StageRecord] = []
+
+        # memory mode only
+        self.peak_memory: int | None = None  # [bytes] above the memory in use at the start
+        self.retained_memory: int | None = None  # [bytes] still allocated at the finish
+        self.object_counts: dict[str, int] | None = None
+        self._start_memory = 0
+        self._peak = 0
+
+    def __repr__(self) -> str:
+        text = f"{self.kind}"
+        if self.name is not None:
+            text += f" ({self.name})"
+        text += f": {self.wall_time * 1000:.3f} ms"
+        if self.peak_memory is not None:
+            text += f", peak: {self.peak_memory / 1024:.1f} kB, retained: {self.retained_memory / 1024:.1f} kB"
+        if self.object_counts is not None:
+            text += "\n    objects: " + ", ".join(f"{k}: {v}" for k, v in self.object_counts.items())
+        for record in self.records:
+            text += "\n    " + repr(record)
+        return text
+
+    def __getitem__(self, name: str) -> StageRecord:
+        for record in self.records:
+            if record.name == name:
+                return record
+        raise KeyError(f"No step '{name}' in report.")
+
+    @property
+    def wall_time(self) -> float:
+        """ sum of the steps [s] """
+        return sum(record.wall_time for record in self.records)
+
+    def to_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "wall_time": self.wall_time,
+            "peak_memory": self.peak_memory,
+            "retained_memory": self.retained_memory,
+            "object_counts": self.object_counts,
+            "records": [record.to_dict() for record in self.records]
+        }
+
+
+def new_report(kind: str, name: str = None) -> Report | None:
+    """ Returns None when instrumentation is disabled. """
+    if not _enabled:
+        return None
+
+    report = Report(kind, str(name) if name is not None else None)
+    if _memory:
+        current = _update_peaks()
+        tracemalloc.reset_peak()
+        report._start_memory = report._peak = current
+        _memory_stack.append(report)
+    return report
+
+
+def _update_peaks() -> int:
+    """ Fold the tracemalloc peak into all open reports; returns the current memory. """
+    current, peak = tracemalloc.get_traced_memory()
+    for report in _memory_stack:
+        report._peak = max(report._peak, peak)
+    return current
+
+
+@contextmanager
+def stage(report: Report | None, name: str, fig: go.Figure = None):
+    """ Time the enclosed step into `report`; does nothing if `report` is None. """
+    if report is None:
+        yield
+        return
+
+    if fig is not None:
+        number_traces, number_annotations = len(fig.data), len(fig.layout.annotations)
+    start = time.perf_counter()
+    yield
+    wall_time = time.perf_counter() - start
+
+    if fig is not None:
+        report.records.append(StageRecord(name, wall_time, len(fig.data) - number_traces,
+                                          len(fig.layout.annotations) - number_annotations))
+    else:
+        report.records.append(StageRecord(name, wall_time))
+
+
+def finish(report: Report | None, molecule=None):
+    """ Pass a finished report to the hooks. `molecule` is used for the object counts in memory mode. """
+    if report is None:
+        return
+
+    if report in _memory_stack:
+        current = _update_peaks()
+        report.peak_memory = report._peak - report._start_memory
+        report.retained_memory = current - report._start_memory
+        _memory_stack.remove(report)
+        if molecule is not None:
+            report.object_counts = count_objects(molecule)
+
+    for hook in _hooks:
+        hook(report)
+
+
+def count_objects(molecule) -> dict[str, int]:
+    """ Number of chemistry objects in the molecule and format objects (Font, Line, Highlight) on them. """
+    rings = molecule.rings if molecule.rings_built else []  # not built: none in memory
+    parenthesis = molecule.parenthesis if molecule.parenthesis_built else []
+    elements = molecule.atoms + molecule.bonds + rings + parenthesis
+    counts = {
+        "Atom": len(molecule.atoms),
+        "Bond": len(molecule.bonds),
+        "Ring": len(rings),
+        "Parenthesis": len(parenthesis),
+        "Font": 0,
+        "Line": 0,
+        "Highlight": 0
+    }
+    for element in elements:
+        for value in vars(element).values():
+            if isinstance(value, (Font, Line, Highlight)):
+                counts[type(value).__name__] += 1
+
+    return counts
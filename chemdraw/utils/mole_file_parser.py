@@ -5,10 +5,16 @@ import numpy as np
 from chemdraw.errors import MoleParsingError
 
 
+def is_mole_block(text: str) -> bool:
+    """ mole file text (V2000 counts line and 'M  END'), not e.g. a path """
+    lines = text.splitlines()
+    return any("V2000" in line for line in lines[:10]) and any(line.startswith("M  END") for line in lines)
+
+
 def parse_mole_file(mole_file: str) -> tuple[list[str], np.ndarray, np.ndarray, str, dict]:
     first_row, atom_block, bond_block, s_block = _parse_mole_file_main(mole_file)
     atom_symbols, atom_coordinates = _get_atoms(atom_block)
-    bond_block = np.array(bond_block, dtype="int16")
+    bond_block = np.array(bond_block, dtype="int32")
     s_group = _get_s_block(s_block)
 
     return atom_symbols, atom_coordinates, bond_block, first_row["file_version"], s_group
@@ -52,23 +58,22 @@ def _parse_mole_file_main(file: str) -> tuple[dict, list[list], list[list], list
     first_row = _parse_first_row(file_list.pop(0))
 
     # atom block
-    atom_block_last_index = _get_block_last_index(file_list)
-    atom_block = _split_block(file_list[:atom_block_last_index + 1])
+    number_atoms, number_bonds = first_row["number_atoms"], first_row["number_bonds"]
+    atom_block = _split_block(file_list[:number_atoms])
 
     # bond block
-    bond_block_last_index = _get_block_last_index(file_list[atom_block_last_index + 1:])
-    bond_block = _split_block(file_list[atom_block_last_index + 1:atom_block_last_index + 2 + bond_block_last_index])
+    bond_block = _split_bond_block(file_list[number_atoms:number_atoms + number_bonds])
 
     # double checks for parse
-    if first_row["number_atoms"] != len(atom_block):
+    if number_atoms != len(atom_block):
         raise MoleParsingError(f"Number of atoms parsed does not match first row atom count. "
-                               f"(first row: {first_row['ring_size']}, parsed: {len(atom_block)})")
-    if first_row["number_bonds"] != len(bond_block):
+                               f"(first row: {number_atoms}, parsed: {len(atom_block)})")
+    if number_bonds != len(bond_block):
         raise MoleParsingError("Number of bonds parsed does not match first row bond count. "
-                               f"(first row: {first_row['number_bonds']}, parsed: {len(bond_block)})")
+                               f"(first row: {number_bonds}, parsed: {len(bond_block)})")
 
     # s group
-    s_group = file_list[atom_block_last_index + 2 + bond_block_last_index:]
+    s_group = file_list[number_atoms + number_bonds:]
 
     return first_row, atom_block, bond_block, s_group
 
@@ -86,10 +91,18 @@ def _parse_first_row(first_row: str) -> dict:
 
 
 def _split_block(block: list[str]) -> list[list[str]]:
-    """[first_atom_index, second_atom_index, bond_type, stereochemistry]"""
+    """[x, y, z, symbol, ...]"""
     return [row.split() for row in block]
 
 
+def _split_bond_block(block: list[str]) -> list[list[int]]:
+    """
+    [first_atom_index, second_atom_index, bond_type, stereochemistry]
+    Fixed width columns, as atom indices above 99 run together (e.g. '100101  1  0').
+    """
+    return [[int(row[i:i + 3].strip() or 0) for i in range(0, 12, 3)] for row in block]
+
+
 def _clean_file_list(file_list: list[str]) -> list[str]:
     for i in range(len(file_list)):
         if "V2000" in file_list[i]:
@@ -98,15 +111,6 @@ def _clean_file_list(file_list: list[str]) -> list[str]:
     raise MoleParsingError("First row not found. (looking for 'V2000')")
 
 
-def _get_block_last_index(file_list: list[str]) -> int:
-    row_length = len(file_list[0].split())
-    for i, row in enumerate(file_list):
-        if len(row.split()) != row_length:
-            return i - 1
-
-    raise MoleParsingError("No transition between atom and bond blocks found.")
-
-
 class Sgroup(enum.Enum):
     SUP = 1  # superatom
     MUL = 2  # multiple group
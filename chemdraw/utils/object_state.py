@@ -0,0 +1,52 @@
+import enum
+import hashlib
+from typing import Any
+
+import numpy as np
+
+
+def get_state(obj: Any) -> Any:
+    """
+    Snapshot of an object as nested tuples of plain values.
+
+    Two objects with equal snapshots draw the same. Attributes named 'parent' are skipped (back references) and
+    so are the names listed in a class's `runtime_attrs` (values that are only set during a draw).
+
+    Parameters
+    ----------
+    obj: Any
+        config, format object (Font, Line, ...), or plain value
+
+    Returns
+    -------
+    state: Any
+        hashable snapshot
+
+    """
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    if isinstance(obj, enum.Enum):
+        return obj.name
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.shape, tuple(obj.ravel().tolist())
+    if isinstance(obj, dict):
+        return tuple((key, get_state(value)) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return tuple(get_state(value) for value in obj)
+    if isinstance(obj, (set, frozenset)):
+        return tuple(sorted(get_state(value) for value in obj))
+    if callable(obj) and hasattr(obj, "__qualname__"):
+        return f"{obj.__module__}.{obj.__qualname__}"
+    if hasattr(obj, "__dict__"):
+        skip = {"parent"} | set(getattr(obj, "runtime_attrs", ()))
+        return type(obj).__name__, \
+            tuple((key, get_state(value)) for key, value in vars(obj).items() if key not in skip)
+
+    return repr(obj)
+
+
+def get_fingerprint(obj: Any) -> str:
+    """ sha256 (hex) of `get_state(obj)`; stable between sessions and machines for the same inputs. """
+    return hashlib.sha256(repr(get_state(obj)).encode("utf-8")).hexdigest()
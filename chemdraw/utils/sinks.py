@@ -0,0 +1,381 @@
+"""
+Destinations for rendered files: a directory, a zip or tar archive, or a pack file (one binary file with an offset
+index; read it back with `PackReader`).
+
+    with open_sink("out.zip") as sink:
+        sink.write("ethanol.svg", data)
+
+Archives are written through a buffer of `chunk_size` bytes (compressed tar files as a stream), so many small images
+turn into a few large writes. `flush()` writes the buffer through; files written before a flush survive the process
+being killed.
+`append=True` keeps what is already there (used to resume interrupted runs); not possible for compressed tar files.
+An archive whose writer was killed (no zip central directory, tar end blocks or pack index) is recovered: every complete
+file is kept, an incomplete last file is dropped with a warning. A file that isn't an archive of the type raises.
+"""
+import abc
+import io
+import json
+import os
+import struct
+import tarfile
+import time
+import warnings
+import zipfile
+import zlib
+
+CHUNK_SIZE = 1024 ** 2  # [bytes]
+
+
+class Sink(abc.ABC):
+    def __init__(self, location: str):
+        self.location = location
+        self.number_files = 0
+        self.number_bytes = 0
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}: {self.location} (# files: {self.number_files})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, name: str, data: bytes):
+        self._write(name, data)
+        self.number_files += 1
+        self.number_bytes += len(data)
+
+    @abc.abstractmethod
+    def _write(self, name: str, data: bytes):
+        ...
+
+    @abc.abstractmethod
+    def names(self) -> list[str]:
+        """ files in the sink (written earlier, when appending, and by this sink) """
+
+    def flush(self):
+        """ Write buffered data through to the file (survives the process being killed, not a power loss). """
+        pass
+
+    def close(self):
+        pass
+
+
+class DirectorySink(Sink):
+    """ Files are written under a temporary name ('.part') and renamed, so a file that exists is complete. """
+
+    def __init__(self, location: str, append: bool = False, chunk_size: int = CHUNK_SIZE):
+        super().__init__(location)
+        os.makedirs(location, exist_ok=True)
+        for name in os.listdir(location):
+            if name.endswith(".part"):  # left by a killed writer
+                os.remove(os.path.join(location, name))
+
+    def _write(self, name: str, data: bytes):
+        path = os.path.join(self.location, name)
+        with open(path + ".part", "wb") as file:
+            file.write(data)
+        os.replace(path + ".part", path)
+
+    def names(self) -> list[str]:
+        return [name for name in os.listdir(self.location) if not name.endswith(".part")]
+
+
+class ZipSink(Sink):
+    def __init__(self, location: str, append: bool = False, chunk_size: int = CHUNK_SIZE):
+        super().__init__(location)
+        if append and os.path.exists(location) and os.path.getsize(location) > 0:
+            if not _is_complete_zip(location):
+                _recover_zip(location)  # zipfile's append mode would start a second archive after the old one
+            self._buffer = open(location, "r+b", buffering=chunk_size)
+            self._file = zipfile.ZipFile(self._buffer, "a", compression=zipfile.ZIP_DEFLATED)
+        else:
+            self._buffer = open(location, "wb", buffering=chunk_size)
+            self._file = zipfile.ZipFile(self._buffer, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def _write(self, name: str, data: bytes):
+        self._file.writestr(name, data)
+
+    def names(self) -> list[str]:
+        return self._file.namelist()
+
+    def flush(self):
+        self._buffer.flush()
+
+    def close(self):
+        self._file.close()
+        self._buffer.close()
+
+
+class TarSink(Sink):
+    def __init__(self, location: str, append: bool = False, chunk_size: int = CHUNK_SIZE):
+        super().__init__(location)
+        compression = _tar_compression(location)
+        if append and os.path.exists(location) and os.path.getsize(location) > 0:
+            if compression:
+                raise ValueError(f"Can't append to a compressed tar file: {location}")
+            _recover_tar(location)
+            self._buffer = open(location, "r+b", buffering=chunk_size)
+            self._file = tarfile.open(fileobj=self._buffer, mode="a")
+        elif compression:
+            self._buffer = open(location, "wb", buffering=chunk_size)
+            self._file = tarfile.open(fileobj=self._buffer, mode="w|" + compression, bufsize=chunk_size)  # stream
+        else:
+            self._buffer = open(location, "wb", buffering=chunk_size)
+            self._file = tarfile.open(fileobj=self._buffer, mode="w")
+
+    def _write(self, name: str, data: bytes):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self._file.addfile(info, io.BytesIO(data))
+
+    def names(self) -> list[str]:
+        return self._file.getnames()
+
+    def flush(self):
+        """ compressed: only what the compressor has given out so far """
+        self._buffer.flush()
+
+    def close(self):
+        self._file.close()
+        self._buffer.close()
+
+
+class PackSink(Sink):
+    """
+    One binary file: header, the files back to back, a JSON index ({name: [offset, size]}) and a footer
+    (index offset, index size, header). Any file can be read with one seek (`PackReader`).
+    Every file is preceded by a record header (magic, name size, data size) and its name, so the index can be rebuilt
+    by scanning when the writer was killed before writing it.
+    """
+    header = b"CDPACK02"
+    footer = struct.Struct("<QQ8s")
+    record = struct.Struct("<4sIQ")
+    record_magic = b"CDPR"
+
+    def __init__(self, location: str, append: bool = False, chunk_size: int = CHUNK_SIZE):
+        super().__init__(location)
+        if append and os.path.exists(location) and os.path.getsize(location) > 0:
+            self._file = open(location, "r+b", buffering=chunk_size)
+            try:
+                index_offset, self.index = _read_pack_index(self._file, location)
+            except ValueError:
+                index_offset, self.index = _scan_pack(self._file, location)
+            self._file.seek(index_offset)
+            self._file.truncate()
+        else:
+            self._file = open(location, "wb", buffering=chunk_size)
+            self._file.write(self.header)
+            self.index: dict[str, tuple[int, int]] = {}
+        self._offset = self._file.tell()
+
+    def _write(self, name: str, data: bytes):
+        name_bytes = name.encode("utf-8")
+        self._file.write(self.record.pack(self.record_magic, len(name_bytes), len(data)))
+        self._file.write(name_bytes)
+        self._file.write(data)
+        self._offset += self.record.size + len(name_bytes)
+        self.index[name] = (self._offset, len(data))
+        self._offset += len(data)
+
+    def names(self) -> list[str]:
+        return list(self.index)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        index = json.dumps(self.index, separators=(",", ":")).encode("utf-8")
+        self._file.write(index)
+        self._file.write(self.footer.pack(self._offset, len(index), self.header))
+        self._file.close()
+
+
+class PackReader:
+    def __init__(self, location: str):
+        self.location = location
+        self._file = open(location, "rb")
+        _, self.index = _read_pack_index(self._file, location)
+
+    def __repr__(self) -> str:
+        return f"{self.location} (# files: {len(self.index)})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.index
+
+    def names(self) -> list[str]:
+        return list(self.index)
+
+    def read(self, name: str) -> bytes:
+        offset, size = self.index[name]
+        self._file.seek(offset)
+        return self._file.read(size)
+
+    def close(self):
+        self._file.close()
+
+
+def _read_pack_index(file, location: str) -> tuple[int, dict[str, tuple[int, int]]]:
+    file.seek(0, os.SEEK_END)
+    if file.tell() < len(PackSink.header) + PackSink.footer.size:
+        raise ValueError(f"Not a (complete) pack file: {location}")
+    file.seek(-PackSink.footer.size, os.SEEK_END)
+    index_offset, index_size, header = PackSink.footer.unpack(file.read(PackSink.footer.size))
+    if header != PackSink.header:
+        raise ValueError(f"Not a (complete) pack file: {location}")
+    file.seek(index_offset)
+    index = json.loads(file.read(index_size).decode("utf-8"))
+    return index_offset, {name: tuple(value) for name, value in index.items()}
+
+
+def _scan_pack(file, location: str) -> tuple[int, dict[str, tuple[int, int]]]:
+    """ Index of a pack file without a (valid) index, from its records; returns the end of the last complete one. """
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    if file.read(len(PackSink.header)) != PackSink.header:
+        raise ValueError(f"Not a pack file: {location}")
+
+    index = {}
+    offset = len(PackSink.header)
+    while offset + PackSink.record.size <= size:
+        file.seek(offset)
+        magic, name_size, data_size = PackSink.record.unpack(file.read(PackSink.record.size))
+        data_offset = offset + PackSink.record.size + name_size
+        if magic != PackSink.record_magic or data_offset + data_size > size:
+            break
+        index[file.read(name_size).decode("utf-8")] = (data_offset, data_size)
+        offset = data_offset + data_size
+
+    _warn_recovered(location, len(index), size - offset)
+    return offset, index
+
+
+def _recover_tar(location: str):
+    """ Cut an unclosed tar file after its last complete file and add the end blocks, so it can be appended to. """
+    size = os.path.getsize(location)
+    if size < tarfile.BLOCKSIZE:  # not even one header
+        with open(location, "r+b") as file:
+            file.truncate(0)
+            file.write(tarfile.NUL * 2 * tarfile.BLOCKSIZE)
+        _warn_recovered(location, 0, size)
+        return
+
+    with open(location, "rb") as file:
+        try:
+            tar = tarfile.open(fileobj=file, mode="r:")
+        except tarfile.ReadError as e:
+            raise ValueError(f"Can't append, not a tar file: {location} ({e})") from None
+        try:
+            while tar.next() is not None:
+                pass
+        except tarfile.ReadError:
+            pass  # data of the last file cut off
+
+        end, number_files = 0, 0
+        for member in tar.members:
+            member_end = member.offset_data + -(-member.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+            if member_end > size:
+                break
+            end, number_files = member_end, number_files + 1
+        file.seek(end)
+        if file.read(2 * tarfile.BLOCKSIZE) == tarfile.NUL * 2 * tarfile.BLOCKSIZE:
+            return  # closed (end blocks)
+
+    with open(location, "r+b") as file:
+        file.truncate(end)
+        file.seek(end)
+        file.write(tarfile.NUL * 2 * tarfile.BLOCKSIZE)
+    _warn_recovered(location, number_files, size - end)
+
+
+def _is_complete_zip(location: str) -> bool:
+    try:
+        zipfile.ZipFile(location).close()
+        return True
+    except zipfile.BadZipFile:  # also an old end record that points to a central directory written over
+        return False
+
+
+def _recover_zip(location: str):
+    """
+    Rewrite a zip file without central directory (writer killed) from its local file headers; the complete files are
+    kept (checked against their CRC).
+    """
+    header = struct.Struct("<4s5H3L2H")  # signature, versions, flags, method, time, date, crc, sizes, name/extra size
+    size = os.path.getsize(location)
+    temporary = location + ".recovered"
+    number_files, offset = 0, 0
+    with open(location, "rb") as file, zipfile.ZipFile(temporary, "w", compression=zipfile.ZIP_DEFLATED) as zip_:
+        if file.read(4) != b"PK\x03\x04":
+            os.remove(temporary)
+            raise ValueError(f"Can't append, not a zip file: {location}")
+        while offset + header.size <= size:
+            file.seek(offset)
+            signature, _, flags, method, time_, date, crc, compressed_size, _, name_size, extra_size = \
+                header.unpack(file.read(header.size))
+            if signature != b"PK\x03\x04" or flags & 0x08 or method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                break
+            name = file.read(name_size).decode("utf-8" if flags & 0x800 else "cp437")
+            file.seek(extra_size, os.SEEK_CUR)
+            data = file.read(compressed_size)
+            if len(data) < compressed_size:
+                break
+            if method == zipfile.ZIP_DEFLATED:
+                try:
+                    data = zlib.decompress(data, -15)
+                except zlib.error:
+                    break
+            if zlib.crc32(data) != crc:
+                break
+            date_time = ((date >> 9) + 1980, (date >> 5) & 0xF, date & 0x1F,
+                         time_ >> 11, (time_ >> 5) & 0x3F, (time_ & 0x1F) * 2)
+            zip_.writestr(zipfile.ZipInfo(name, date_time), data)
+            number_files += 1
+            offset = file.tell()
+
+    os.replace(temporary, location)
+    _warn_recovered(location, number_files, size - offset)
+
+
+def _warn_recovered(location: str, number_files: int, number_bytes_dropped: int):
+    text = f"{location} was not closed (writer killed?); recovered {number_files} files"
+    if number_bytes_dropped:
+        text += f", dropped {number_bytes_dropped} bytes after the last complete file"
+    warnings.warn(text, stacklevel=3)
+
+
+def _tar_compression(location: str) -> str:
+    for extension, compression in ((".tar.gz", "gz"), (".tgz", "gz"), (".tar.bz2", "bz2"), (".tar.xz", "xz")):
+        if location.endswith(extension):
+            return compression
+    return ""
+
+
+def open_sink(location: str, append: bool = False, chunk_size: int = CHUNK_SIZE) -> Sink:
+    """ Sink by extension: .zip, .tar (.tar.gz, .tgz, .tar.bz2, .tar.xz), .pack, otherwise a directory. """
+    if location.endswith(".zip"):
+        return ZipSink(location, append, chunk_size)
+    if location.endswith(".tar") or _tar_compression(location):
+        return TarSink(location, append, chunk_size)
+    if location.endswith(".pack"):
+        return PackSink(location, append, chunk_size)
+    return DirectorySink(location, append, chunk_size)
+
+
+def can_append(location: str) -> bool:
+    """ False for compressed tar files (they can only be rewritten) """
+    return not _tar_compression(location)
@@ -17,6 +17,13 @@ def normalize(vector: np.ndarray) -> np.ndarray:
         return vector
 
 
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """ Normalize each row of a (n, 2) array; zero length rows are returned unchanged. """
+    norms = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+    norms[norms == 0] = 1
+    return vectors / norms[:, np.newaxis]
+
+
 def pythagoras_theorem(point1: PointType, point2: PointType) -> float:
     return ((point2[0] - point1[0]) ** 2 + (point2[1] - point1[1]) ** 2) ** (1 / 2)
 
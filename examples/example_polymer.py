@@ -1,11 +1,10 @@
-
 import chemdraw
 
 
 def main():
-    bigsmiles = "O{[>][<]C(=O)CCCCC(=O)NCCCCCCN[>][<]}"
+    mole_file = "mol_files/poly_iPP_generic.txt"  # isotactic polypropylene repeat unit
 
-    poly = chemdraw.Polymer(bigsmiles)
+    poly = chemdraw.Polymer(mole_file, number_repeat_units=6)
     drawer = chemdraw.Drawer(poly)
     fig = drawer.draw()
     fig.show()